@@ -0,0 +1,547 @@
+"""
+DWTS 面板数据构建（由 notebook 数据预处理单元格提炼而来），输出 panel_data_clean_v2.csv。
+
+与原单元格结果一致（趋势名字匹配改用 name_index.NameIndex，并列时按字典序取舍而不再依赖集合迭代顺序），
+三处逐行热点改为向量化：
+  - 宽表 → 面板：按 (选手, 周, 评委) 三维数组一次性筛选有效分数；
+  - 分数与晋级状态匹配：按 (season, week) merge 出候选对后一次判定，取每行第一个命中的状态行；
+  - 赛季前搜索热度：一次 merge + 按 (选手, 赛季) 分段归约，而不是对每个面板行过滤整张趋势表。
+
+用法：
+    python build_panel.py                      # 读取 ./ 下的原始数据，写出 panel_data_clean_v2.csv
+    python build_panel.py --benchmark          # 与旧的逐行实现对比各步骤耗时并校验结果一致
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from name_index import AliasCache, NameIndex, celebrity_from_couple, normalize_names
+
+# ==================== 配置区 ====================
+DATA_DIR = './'
+OUTPUT_PATH = DATA_DIR + 'panel_data_clean_v2.csv'
+MAX_WEEK = 11
+MAX_JUDGES = 4
+
+# 赛季启动时间查找表
+SEASON_START_DATES = {
+    1: '2005-06-01', 2: '2006-01-05', 3: '2006-09-12', 4: '2007-03-19',
+    5: '2007-09-24', 6: '2008-03-17', 7: '2008-09-22', 8: '2009-03-09',
+    9: '2009-09-21', 10: '2010-03-22', 11: '2010-09-20', 12: '2011-03-21',
+    13: '2011-09-19', 14: '2012-03-19', 15: '2012-09-24', 16: '2013-03-18',
+    17: '2013-09-16', 18: '2014-03-17', 19: '2014-09-15', 20: '2015-03-16',
+    21: '2015-09-14', 22: '2016-03-21', 23: '2016-09-12', 24: '2017-03-20',
+    25: '2017-09-18', 26: '2018-04-30', 27: '2018-09-24', 28: '2019-09-16',
+    29: '2020-09-14', 30: '2021-09-20', 31: '2022-09-19', 32: '2023-09-26',
+    33: '2024-09-17', 34: '2025-03-18',
+}
+
+INDUSTRY_MAPPING = {
+    'Actor/Actress': 1,
+    'Athlete': 2,
+    'Singer/Rapper': 3,
+    'TV Personality': 4,
+    'Model': 5,
+    'News Anchor': 6,
+    'Sports Broadcaster': 7,
+}
+
+KEY_COLUMNS = [
+    'season', 'week', 'celebrity_name', 'ballroom_partner',
+    'celebrity_age', 'celebrity_industry', 'industry_code',
+    'judge1_score', 'judge2_score', 'judge3_score', 'judge4_score',
+    'weekly_total', 'weekly_avg', 'num_judges',
+    'bonus_points',
+    'score_pct', 'relative_score_pct',
+    'cumulative_avg', 'cumulative_total', 'score_volatility', 'score_deviation',
+    'weekly_rank', 'cumulative_rank', 'weeks_survived',
+    'was_bottom_last_week', 'was_eliminated_last_week', 'score_change',
+    'dance_style', 'running_order',
+    'is_eliminated', 'is_bottom_two', 'is_safe', 'is_winner',
+    'search_mean_pre_season', 'search_max_pre_season', 'search_std_pre_season', 'search_recent_3m',
+    'search_mean_log', 'search_max_log', 'search_std_log', 'search_recent_3m_log'
+]
+
+POPULARITY_COLUMNS = [
+    'search_mean_pre_season', 'search_max_pre_season', 'search_std_pre_season', 'search_recent_3m',
+    'search_mean_log', 'search_max_log', 'search_std_log', 'search_recent_3m_log',
+]
+
+SCORE_COLUMNS = [f'judge{j}_score' for j in range(1, MAX_JUDGES + 1)]
+
+
+def get_season_start_date(season):
+    if season in SEASON_START_DATES:
+        return pd.to_datetime(SEASON_START_DATES[season])
+    else:
+        return pd.Timestamp('2005-01-01') + pd.DateOffset(months=(season - 1) * 6)
+
+
+def load_inputs(data_dir=DATA_DIR):
+    df_main = pd.read_csv(data_dir + '2026_MCM_Problem_C_Data.csv', encoding='utf-8-sig')
+    df_trends = pd.read_csv(data_dir + 'dwts_historical_trends.csv')
+    df_weekly = pd.read_csv(data_dir + 'dwts_weekly_details.csv')
+    df_main.columns = df_main.columns.str.strip()
+    return df_main, df_trends, df_weekly
+
+
+# ==================== 第一步：构建分数面板（宽转长）====================
+def build_score_panel(df_main):
+    """
+    把每周 4 位评委的分数列整理成 (选手 × 周 × 评委) 数组，保留至少有一个正分的 (选手, 周)，
+    行序与逐行遍历一致（先选手、后周次）。
+    """
+    weeks = [
+        week for week in range(1, MAX_WEEK + 1)
+        if any(f'week{week}_judge{j}_score' in df_main.columns for j in range(1, MAX_JUDGES + 1))
+    ]
+    scores = np.full((len(df_main), len(weeks), MAX_JUDGES), np.nan)
+    for w, week in enumerate(weeks):
+        # 与逐行实现一致：缺失的评委列挤到后面，judge<k>_score 依次取现存列
+        existing = [c for c in (f'week{week}_judge{j}_score' for j in range(1, MAX_JUDGES + 1)) if c in df_main.columns]
+        for k, col in enumerate(existing):
+            scores[:, w, k] = pd.to_numeric(df_main[col], errors='coerce').to_numpy(dtype=float)
+
+    valid = ~np.isnan(scores) & (scores > 0)
+    rows, week_idx = np.nonzero(valid.any(axis=2))
+    picked = scores[rows, week_idx]
+    picked_valid = valid[rows, week_idx]
+    num_judges = picked_valid.sum(axis=1)
+    weekly_total = np.where(picked_valid, picked, 0.0).sum(axis=1)
+
+    season = df_main['season'].to_numpy()
+    df_score = pd.DataFrame({
+        'celebrity_name': df_main['celebrity_name'].astype(str).str.strip().to_numpy()[rows],
+        'ballroom_partner': df_main['ballroom_partner'].to_numpy()[rows],
+        'celebrity_industry': df_main['celebrity_industry'].to_numpy()[rows],
+        'celebrity_age': pd.to_numeric(df_main['celebrity_age_during_season'], errors='coerce').to_numpy()[rows],
+        'season': season[rows].astype(int) if not pd.isna(season).any() else season[rows],
+        'week': np.asarray(weeks, dtype=np.int64)[week_idx],
+    })
+    for k, col in enumerate(SCORE_COLUMNS):
+        df_score[col] = picked[:, k]
+    df_score['weekly_total'] = weekly_total
+    df_score['weekly_avg'] = weekly_total / num_judges
+    df_score['num_judges'] = num_judges.astype(np.int64)
+    return df_score
+
+
+# ==================== 第二步：清洗结果表 ====================
+def clean_status(df_weekly):
+    df_weekly = df_weekly.copy()
+    df_weekly['Season'] = pd.to_numeric(df_weekly['Season'], errors='coerce')
+    df_weekly['Week'] = pd.to_numeric(df_weekly['Week'], errors='coerce')
+    df_weekly = df_weekly.dropna(subset=['Season', 'Week'])
+    df_weekly['Season'] = df_weekly['Season'].astype(int)
+    df_weekly['Week'] = df_weekly['Week'].astype(int)
+
+    df_weekly['celebrity_raw'] = df_weekly['Celebrity'].fillna('').str.strip()
+    df_weekly['celebrity_first'] = celebrity_from_couple(df_weekly['Celebrity'])
+
+    status = df_weekly['Weekly_Bottom_Two_Status']
+    df_weekly['is_eliminated'] = status.str.contains('Eliminated', case=False, na=False).astype(int)
+    df_weekly['is_bottom_two'] = status.str.contains('Bottom', case=False, na=False).astype(int)
+    df_weekly['is_safe'] = status.str.contains('Safe', case=False, na=False).astype(int)
+    df_weekly['is_winner'] = status.str.contains('Winner', case=False, na=False).astype(int)
+
+    df_weekly.loc[df_weekly['is_eliminated'] == 1, 'is_bottom_two'] = 1
+
+    df_status = df_weekly[['Season', 'Week', 'celebrity_first', 'celebrity_raw', 'Dance_Style', 'Running_Order',
+                           'is_eliminated', 'is_bottom_two', 'is_safe', 'is_winner']].copy()
+    df_status.columns = ['season', 'week', 'celebrity_name', 'celebrity_full', 'dance_style', 'running_order',
+                         'is_eliminated', 'is_bottom_two', 'is_safe', 'is_winner']
+    return df_status
+
+
+# ==================== 第三步：模糊匹配 ====================
+def _status_matches(score_name, status_name, status_full):
+    """分数行与状态行是否视为同一选手（名字互相包含，或姓氏相同且长于 2 个字符）。"""
+    if (status_name and status_name in score_name) or \
+       (score_name and score_name in status_name) or \
+       (status_full and (status_full in score_name or score_name in status_full)):
+        return True
+    score_last = score_name.split()[-1] if score_name else ''
+    status_last = status_name.split()[-1] if status_name else ''
+    return bool(score_last and status_last and len(score_last) > 2 and score_last == status_last)
+
+
+def match_status(df_score, df_status):
+    """
+    按 (season, week) merge 出所有候选 (分数行, 状态行) 对，判定后每个分数行取第一个命中的状态行。
+    同名列（season, week, celebrity_name, name_norm）取状态行的值，状态行独有的列追加在后面。
+    返回 (df_panel, 未匹配的分数行数)。
+    """
+    keys = ['season', 'week']
+    left = df_score[keys + ['name_norm']].assign(_sid=np.arange(len(df_score)))
+    right = df_status[keys + ['name_norm', 'name_full_norm']].assign(_tid=np.arange(len(df_status)))
+    cand = left.merge(right, on=keys, suffixes=('', '_status'))
+    hit = np.fromiter(
+        (_status_matches(s, t, f) for s, t, f in zip(cand['name_norm'], cand['name_norm_status'], cand['name_full_norm'])),
+        dtype=bool, count=len(cand),
+    )
+    first = cand.loc[hit].groupby('_sid', sort=False)['_tid'].min()
+    # 与按 (season, week) 分组逐组遍历的顺序一致：组按键排序，组内保持分数表原顺序
+    order = df_score.iloc[first.index].assign(_sid=first.index).sort_values(keys + ['_sid'], kind='mergesort')['_sid']
+    df_panel = df_score.iloc[order.to_numpy()].reset_index(drop=True)
+    matched_status = df_status.iloc[first.loc[order].to_numpy()].reset_index(drop=True)
+    for col in matched_status.columns:
+        df_panel[col] = matched_status[col]
+    return df_panel, len(df_score) - len(df_panel)
+
+
+# ==================== 第四 ~ 七步：去重、舞种、标准化、动态与滞后特征 ====================
+def add_panel_features(df_panel):
+    df_panel = df_panel.drop_duplicates(subset=['season', 'week', 'celebrity_name', 'weekly_total'])
+
+    df_panel['status_priority'] = (
+        df_panel['is_eliminated'] * 4 +
+        df_panel['is_winner'] * 3 +
+        df_panel['is_bottom_two'] * 2 +
+        df_panel['is_safe'] * 1
+    )
+    # 稳定排序：优先级相同的同名行（如第 8 季的两位 "Steve"）按匹配顺序保留第一行，不随 numpy 版本变化
+    df_panel = df_panel.sort_values('status_priority', ascending=False, kind='mergesort')
+    df_panel = df_panel.drop_duplicates(subset=['season', 'week', 'celebrity_name'], keep='first')
+    df_panel = df_panel.drop('status_priority', axis=1)
+
+    # 修复舞种缺失
+    df_panel = df_panel.sort_values(['celebrity_name', 'season', 'week']).reset_index(drop=True)
+    df_panel['dance_style'] = df_panel.groupby(['celebrity_name', 'season'])['dance_style'].transform(
+        lambda x: x.ffill().bfill()
+    )
+    df_panel['dance_style'] = df_panel['dance_style'].fillna('Unknown')
+
+    # 标准化分数：奖金分 = 各评委超过 10 分的部分之和
+    df_panel = df_panel.sort_values(['season', 'week', 'celebrity_name']).reset_index(drop=True)
+    judges = df_panel[SCORE_COLUMNS].to_numpy(dtype=float)
+    bonus = np.where(np.isnan(judges), 0.0, np.maximum(0, judges - 10)).sum(axis=1)
+    # 逐行实现中没有任何超过 10 分的评委时奖金分全为整数 0，列为 int64
+    df_panel['bonus_points'] = bonus if (judges > 10).any() else bonus.astype(np.int64)
+    df_panel['theoretical_max'] = df_panel['num_judges'] * 10
+    df_panel['score_pct'] = (df_panel['weekly_total'] - df_panel['bonus_points']) / df_panel['theoretical_max']
+    df_panel['score_pct'] = df_panel['score_pct'].clip(0, 1)
+    week_totals = df_panel.groupby(['season', 'week'])['weekly_total'].transform('sum')
+    df_panel['relative_score_pct'] = df_panel['weekly_total'] / week_totals
+    df_panel['weekly_rank'] = df_panel.groupby(['season', 'week'])['weekly_total'].rank(ascending=False, method='min')
+
+    # 动态特征
+    df_panel = df_panel.sort_values(['celebrity_name', 'season', 'week']).reset_index(drop=True)
+    by_run = df_panel.groupby(['celebrity_name', 'season'])
+    df_panel['cumulative_avg'] = by_run['weekly_avg'].transform(lambda x: x.expanding().mean())
+    df_panel['cumulative_total'] = by_run['weekly_total'].cumsum()
+    df_panel['score_volatility'] = by_run['weekly_avg'].transform(lambda x: x.expanding().std()).fillna(0)
+    df_panel['score_deviation'] = df_panel['weekly_avg'] - df_panel['cumulative_avg']
+    df_panel['cumulative_rank'] = df_panel.groupby(['season', 'week'])['cumulative_total'].rank(ascending=False, method='min')
+    df_panel['weeks_survived'] = by_run.cumcount() + 1
+
+    # 滞后特征
+    df_panel['was_bottom_last_week'] = by_run['is_bottom_two'].shift(1).fillna(0).astype(int)
+    df_panel['was_eliminated_last_week'] = by_run['is_eliminated'].shift(1).fillna(0).astype(int)
+    df_panel['score_change'] = by_run['weekly_avg'].diff().fillna(0)
+    return df_panel
+
+
+# ==================== 第八步：合并搜索热度 ====================
+def match_trend_names(panel_names, trend_names, alias_cache=None):
+    """
+    面板名字 → 趋势表名字（均已标准化）；未匹配为 None。
+    用 NameIndex 只对分块候选打分；alias_cache 为 JSON 路径时复用 / 保存解析结果。
+    """
+    index = NameIndex(trend_names)
+    cache = AliasCache(alias_cache, index) if alias_cache else None
+    resolved = index.resolve_many(sorted(panel_names), cache=cache)
+    return resolved, index.last_methods
+
+
+def pre_season_trend_stats(df_panel, df_trends, trend_name_map):
+    """
+    每个 (选手, 赛季) 在赛季开始前的搜索热度统计：均值、最大值、标准差、最近 3 条均值及其 log1p。
+    一次 merge 取出各 (选手, 赛季) 在截止日期前的趋势行（保持趋势表原顺序），再按段用 reduceat 归约，
+    计算方式与逐行 Series.mean/max/std/tail(3) 相同，结果逐位一致。
+    返回与 df_panel 行对齐的特征表，以及匹配到趋势名字的面板行数。
+    """
+    runs = df_panel[['name_norm', 'season']].drop_duplicates().reset_index(drop=True)
+    runs['trend_name'] = runs['name_norm'].map(trend_name_map)
+    seasons = runs['season'].unique()
+    runs['cutoff'] = runs['season'].map({season: get_season_start_date(season) for season in seasons})
+
+    trends = df_trends[['celebrity_name_norm', 'date', 'search_index']].assign(_pos=np.arange(len(df_trends)))
+    rows = runs.reset_index().merge(trends, left_on='trend_name', right_on='celebrity_name_norm', sort=False)
+    rows = rows[rows['date'] < rows['cutoff']].sort_values(['index', '_pos'], kind='mergesort')
+
+    values = rows['search_index'].to_numpy()
+    run_ids = rows['index'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, run_ids[1:] != run_ids[:-1]]) if len(run_ids) else np.array([], dtype=int)
+    counts = np.diff(np.r_[starts, len(values)])
+    as_float = values.astype(np.float64)
+    means = np.add.reduceat(as_float, starts) / counts if len(starts) else np.array([])
+    sqr = (np.repeat(means, counts) - as_float) ** 2
+    # 平方和按段调用 ndarray.sum（与 Series.std 同为成对求和），reduceat 的顺序累加在末位上会不同
+    sqr_sums = np.array([sqr[start:start + n].sum() for start, n in zip(starts, counts)])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stds = np.where(counts > 1, np.sqrt(sqr_sums / (counts - 1)), np.nan)
+    recent = rows.groupby('index', sort=False)['search_index'].tail(3)
+    recent_means = recent.groupby(rows.loc[recent.index, 'index'], sort=False).apply(
+        lambda x: x.to_numpy(dtype=np.float64).sum() / len(x)
+    ).to_numpy()
+
+    stats = pd.DataFrame({
+        'search_mean_pre_season': means,
+        'search_max_pre_season': np.maximum.reduceat(values, starts) if len(starts) else values[:0],
+        'search_std_pre_season': stds,
+        'search_recent_3m': recent_means,
+    }, index=run_ids[starts])
+    stats = stats.reindex(runs.index)
+    max_dtype = values.dtype if len(values) else np.int64
+    stats['search_max_pre_season'] = stats['search_max_pre_season'].fillna(0).astype(max_dtype)
+    stats = stats.fillna(0)
+    for col in ['search_mean', 'search_max', 'search_std']:
+        stats[f'{col}_log'] = np.log1p(stats[f'{col}_pre_season'])
+    stats['search_recent_3m_log'] = np.log1p(stats['search_recent_3m'])
+
+    keyed = pd.concat([runs[['name_norm', 'season']], stats[POPULARITY_COLUMNS]], axis=1)
+    features = df_panel[['name_norm', 'season']].merge(keyed, on=['name_norm', 'season'], how='left')
+    matched = int(df_panel['name_norm'].map(trend_name_map).fillna('').astype(bool).sum())
+    return features[POPULARITY_COLUMNS], matched
+
+
+# ==================== 主流程 ====================
+def build_panel(df_main, df_trends, df_weekly, verbose=True, alias_cache=None):
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    log("\n[步骤1] 构建分数面板...")
+    df_score = build_score_panel(df_main)
+    log(f"✓ 分数面板构建完成: {len(df_score)} 行")
+
+    log("\n[步骤2] 清洗结果表...")
+    df_status = clean_status(df_weekly)
+    log(f"✓ 结果表清洗完成: {len(df_status)} 行")
+
+    log("\n[步骤3] 时空坐标锁定 + 模糊匹配...")
+    df_score['name_norm'] = normalize_names(df_score['celebrity_name'])
+    df_status['name_norm'] = normalize_names(df_status['celebrity_name'])
+    df_status['name_full_norm'] = normalize_names(df_status['celebrity_full'])
+    df_panel, n_unmatched = match_status(df_score, df_status)
+    log(f"✓ 匹配成功: {len(df_panel)} 行 ({len(df_panel)/len(df_score)*100:.1f}%)")
+    log(f"✗ 匹配失败: {n_unmatched} 行")
+
+    log("\n[步骤4-7] 去重、舞种补全、标准化、动态与滞后特征...")
+    df_panel = add_panel_features(df_panel)
+    log(f"✓ 面板特征生成完成: {len(df_panel)} 行")
+
+    log("\n[步骤8] 合并搜索热度...")
+    df_trends = df_trends.copy()
+    df_trends['date'] = pd.to_datetime(df_trends['date'])
+    df_trends['search_index'] = pd.to_numeric(df_trends['search_index'], errors='coerce').fillna(0)
+    df_trends['celebrity_name_norm'] = normalize_names(df_trends['celebrity_name'])
+    panel_names = set(df_panel['name_norm'].unique())
+    trend_names = set(df_trends['celebrity_name_norm'].unique())
+    log(f"  面板中唯一选手: {len(panel_names)} | 趋势中唯一选手: {len(trend_names)} | "
+        f"精确匹配: {len(panel_names & trend_names)}")
+    trend_name_map, methods = match_trend_names(panel_names, trend_names, alias_cache=alias_cache)
+    log("  名字解析: " + "，".join(f"{method} {n}" for method, n in sorted(methods.items())))
+    unmatched = sorted(name for name, target in trend_name_map.items() if target is None)
+    if unmatched:
+        log(f"  ⚠️ 未匹配到趋势数据的选手 ({len(unmatched)}): {', '.join(unmatched)}")
+    df_popularity, matched = pre_season_trend_stats(df_panel, df_trends, trend_name_map)
+    df_panel = pd.concat([df_panel.reset_index(drop=True), df_popularity], axis=1)
+    log(f"✓ 流行度特征合并完成，模糊匹配成功: {matched} ({matched/len(df_panel)*100:.1f}%)")
+
+    log("\n[步骤9-10] 职业编码与最终整理...")
+    df_panel['industry_code'] = df_panel['celebrity_industry'].map(INDUSTRY_MAPPING).fillna(0).astype(int)
+    df_panel_final = df_panel[KEY_COLUMNS].copy()
+    return df_panel_final.sort_values(['season', 'week', 'celebrity_name']).reset_index(drop=True)
+
+
+def print_report(df_panel_final, output_path=OUTPUT_PATH):
+    print("\n" + "=" * 80)
+    print("✅ 数据清洗完成！")
+    print("=" * 80)
+    print(f"\n📊 数据形状: {df_panel_final.shape}")
+    print(f"\n🎯 目标变量分布:")
+    print(f"  淘汰 (Eliminated): {df_panel_final['is_eliminated'].sum()}")
+    print(f"  危险 (Bottom Two): {df_panel_final['is_bottom_two'].sum()}")
+    print(f"  安全 (Safe): {df_panel_final['is_safe'].sum()}")
+    print(f"  冠军 (Winner): {df_panel_final['is_winner'].sum()}")
+    print(f"\n📈 数据覆盖:")
+    print(f"  赛季数: {df_panel_final['season'].nunique()}")
+    print(f"  选手数: {df_panel_final['celebrity_name'].nunique()}")
+    print(f"  平均参赛周数: {df_panel_final.groupby('celebrity_name')['week'].count().mean():.1f}")
+    print(f"\n🔍 修复验证:")
+    print(f"  score_pct 范围: [{df_panel_final['score_pct'].min():.3f}, {df_panel_final['score_pct'].max():.3f}]")
+    print(f"  bonus_points 检测: {(df_panel_final['bonus_points'] > 0).sum()} 次")
+    print(f"  search_mean_log 非零率: {(df_panel_final['search_mean_log'] > 0).mean():.2%}")
+    print(f"  was_bottom_last_week 激活率: {df_panel_final['was_bottom_last_week'].mean():.2%}")
+    missing = df_panel_final.isnull().sum()
+    print(f"\n⚠️  缺失值检查:")
+    print(missing[missing > 0] if missing.sum() > 0 else "  ✓ 无缺失值")
+    inconsistent = df_panel_final[(df_panel_final['is_eliminated'] == 1) & (df_panel_final['is_bottom_two'] == 0)]
+    if len(inconsistent) > 0:
+        print(f"\n❌ 警告：发现 {len(inconsistent)} 条逻辑不一致记录")
+    else:
+        print(f"\n✅ 逻辑一致性验证通过")
+    print(f"\n💾 输出文件: {output_path}")
+
+
+# ==================== 旧的逐行实现（仅供 benchmark_panel 对照）====================
+def _score_panel_legacy(df_main):
+    panel_data = []
+    for idx, row in df_main.iterrows():
+        for week in range(1, MAX_WEEK + 1):
+            week_cols = [f'week{week}_judge{j}_score' for j in range(1, MAX_JUDGES + 1)]
+            existing_cols = [col for col in week_cols if col in df_main.columns]
+            if not existing_cols:
+                continue
+            scores = [pd.to_numeric(row[col], errors='coerce') for col in existing_cols]
+            valid_scores = [s for s in scores if pd.notna(s) and s > 0]
+            if len(valid_scores) == 0:
+                continue
+            panel_data.append({
+                'celebrity_name': str(row['celebrity_name']).strip(),
+                'ballroom_partner': row['ballroom_partner'],
+                'celebrity_industry': row['celebrity_industry'],
+                'celebrity_age': pd.to_numeric(row['celebrity_age_during_season'], errors='coerce'),
+                'season': int(row['season']) if pd.notna(row['season']) else np.nan,
+                'week': week,
+                'judge1_score': scores[0] if len(scores) > 0 else np.nan,
+                'judge2_score': scores[1] if len(scores) > 1 else np.nan,
+                'judge3_score': scores[2] if len(scores) > 2 else np.nan,
+                'judge4_score': scores[3] if len(scores) > 3 else np.nan,
+                'weekly_total': sum(valid_scores),
+                'weekly_avg': np.mean(valid_scores),
+                'num_judges': len(valid_scores)
+            })
+    return pd.DataFrame(panel_data)
+
+
+def _match_status_legacy(df_score, df_status):
+    matched_records = []
+    unmatched = 0
+    for (season, week), score_group in df_score.groupby(['season', 'week']):
+        status_group = df_status[(df_status['season'] == season) & (df_status['week'] == week)]
+        if len(status_group) == 0:
+            unmatched += len(score_group)
+            continue
+        for _, score_row in score_group.iterrows():
+            for _, status_row in status_group.iterrows():
+                if _status_matches(score_row['name_norm'], status_row['name_norm'], status_row['name_full_norm']):
+                    matched_records.append({**score_row.to_dict(), **status_row.to_dict()})
+                    break
+            else:
+                unmatched += 1
+    return pd.DataFrame(matched_records), unmatched
+
+
+def _pre_season_trend_stats_legacy(df_panel, df_trends, trend_name_map):
+    popularity_features = []
+    matched = 0
+    for _, row in df_panel.iterrows():
+        cutoff_date = get_season_start_date(row['season'])
+        matched_name = trend_name_map.get(row['name_norm'])
+        if matched_name:
+            trend_subset = df_trends[
+                (df_trends['celebrity_name_norm'] == matched_name) &
+                (df_trends['date'] < cutoff_date)
+            ]
+            matched += 1
+        else:
+            trend_subset = pd.DataFrame()
+        if len(trend_subset) > 0:
+            search_mean = trend_subset['search_index'].mean()
+            search_max = trend_subset['search_index'].max()
+            search_std = trend_subset['search_index'].std()
+            search_recent_3m = trend_subset.tail(3)['search_index'].mean()
+        else:
+            search_mean = search_max = search_std = search_recent_3m = 0
+        search_std = search_std if pd.notna(search_std) else 0
+        popularity_features.append({
+            'search_mean_pre_season': search_mean,
+            'search_max_pre_season': search_max,
+            'search_std_pre_season': search_std,
+            'search_recent_3m': search_recent_3m,
+            'search_mean_log': np.log1p(search_mean),
+            'search_max_log': np.log1p(search_max),
+            'search_std_log': np.log1p(search_std),
+            'search_recent_3m_log': np.log1p(search_recent_3m),
+        })
+    return pd.DataFrame(popularity_features), matched
+
+
+def benchmark_panel(data_dir=DATA_DIR, repeats=3):
+    """
+    分别对比三处热点（宽转长、状态匹配、赛季前热度统计）的逐行实现与向量化实现的耗时（秒，取中位数），
+    并用 assert_frame_equal(check_exact=True) 校验两者输出完全一致。
+    """
+    def _median(func, *args):
+        times, result = [], None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = func(*args)
+            times.append(time.perf_counter() - t0)
+        return sorted(times)[len(times) // 2], result
+
+    def _same(a, b):
+        try:
+            pd.testing.assert_frame_equal(a, b, check_exact=True)
+            return True
+        except AssertionError:
+            return False
+
+    df_main, df_trends, df_weekly = load_inputs(data_dir)
+    records = []
+
+    t_old, old = _median(_score_panel_legacy, df_main)
+    t_new, df_score = _median(build_score_panel, df_main)
+    records.append({'step': 'wide -> panel', 'rows': len(df_score), 'legacy_s': t_old, 'vectorized_s': t_new,
+                    'identical': _same(old, df_score)})
+
+    df_status = clean_status(df_weekly)
+    df_score['name_norm'] = normalize_names(df_score['celebrity_name'])
+    df_status['name_norm'] = normalize_names(df_status['celebrity_name'])
+    df_status['name_full_norm'] = normalize_names(df_status['celebrity_full'])
+    t_old, (old, _) = _median(_match_status_legacy, df_score, df_status)
+    t_new, (df_panel, _) = _median(match_status, df_score, df_status)
+    records.append({'step': 'status join', 'rows': len(df_panel), 'legacy_s': t_old, 'vectorized_s': t_new,
+                    'identical': _same(old, df_panel)})
+
+    df_panel = add_panel_features(df_panel)
+    df_trends_raw, df_trends = df_trends, df_trends.copy()
+    df_trends['date'] = pd.to_datetime(df_trends['date'])
+    df_trends['search_index'] = pd.to_numeric(df_trends['search_index'], errors='coerce').fillna(0)
+    df_trends['celebrity_name_norm'] = normalize_names(df_trends['celebrity_name'])
+    trend_name_map, _ = match_trend_names(set(df_panel['name_norm'].unique()), set(df_trends['celebrity_name_norm'].unique()))
+    t_old, (old, _) = _median(_pre_season_trend_stats_legacy, df_panel, df_trends, trend_name_map)
+    t_new, (features, _) = _median(pre_season_trend_stats, df_panel, df_trends, trend_name_map)
+    records.append({'step': 'pre-season trends', 'rows': len(features), 'legacy_s': t_old, 'vectorized_s': t_new,
+                    'identical': _same(old, features)})
+
+    t_build, _ = _median(lambda: build_panel(df_main, df_trends_raw, df_weekly, verbose=False))
+    records.append({'step': 'build_panel total', 'rows': len(df_panel), 'legacy_s': np.nan, 'vectorized_s': t_build,
+                    'identical': np.nan})
+    report = pd.DataFrame(records)
+    report['speedup'] = report['legacy_s'] / report['vectorized_s']
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="构建 DWTS 面板数据（panel_data_clean_v2.csv）")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="原始数据所在目录")
+    parser.add_argument("--output", default=None, help="输出路径（默认 <data-dir>/panel_data_clean_v2.csv）")
+    parser.add_argument("--alias-cache", default=None, help="名字解析结果缓存（JSON），趋势名单或手动映射变化时自动失效")
+    parser.add_argument("--benchmark", action="store_true", help="对比逐行实现与向量化实现的耗时并校验一致后退出")
+    parser.add_argument("--repeats", type=int, default=3, help="--benchmark 每项重复次数")
+    args = parser.parse_args()
+    data_dir = args.data_dir if args.data_dir.endswith('/') else args.data_dir + '/'
+
+    if args.benchmark:
+        print(benchmark_panel(data_dir, repeats=args.repeats).to_string(index=False))
+        raise SystemExit(0)
+
+    output_path = args.output or data_dir + 'panel_data_clean_v2.csv'
+    df_main, df_trends, df_weekly = load_inputs(data_dir)
+    print(f"✓ 数据加载完成 | 主表: {len(df_main)} | 周表: {len(df_weekly)} | 趋势: {len(df_trends)}")
+    df_panel_final = build_panel(df_main, df_trends, df_weekly, alias_cache=args.alias_cache)
+    df_panel_final.to_csv(output_path, index=False)
+    print_report(df_panel_final, output_path)
@@ -0,0 +1,437 @@
+"""
+DWTS 张量化数据集（由训练 notebook 中的 DWTSDataset 提炼而来）。
+
+原实现每次 __getitem__ 都切一遍 pandas 分组、.values.astype(np.float32)、再新建补零数组，
+训练又是 batch_size=1，每个 epoch 做几百次零碎的 DataFrame → 张量转换。这里改为：
+  - 构建时一次性把全部 (season, week) 组打包成连续的填充数组 features (G, N_max, F)、
+    industry_code / y_elim / y_bottom / mask (G, N_max)，以及索引 season / week / N_actual / row_index (G,)；
+  - 组内行序、超过 N_max 时取前 N_max 行的截断方式都与原实现相同；
+  - 标准化（各 LOSO 折的 StandardScaler）直接作用在打包好的数组上，折与折之间不再重建数据集；
+  - 取样 / 取批都是对整块张量做索引，GroupBatchLoader 支持真正的 mini-batch；
+  - 打包结果可存为缓存目录（每个数组一个 .npy，按内存映射读取），由数据指纹判定是否失效，
+    所有 LOSO 折、所有进程共用同一份。
+
+用法：
+    python dwts_dataset.py --verify              # 与原逐组实现逐元素对比（含按折标准化）
+    python dwts_dataset.py --benchmark           # 对比一个 epoch 的取数耗时
+    python dwts_dataset.py --cache-dir DIR       # 预先构建缓存
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset
+
+# ==================== 配置区 ====================
+DATA_PATH = './panel_data_clean_v2.csv'
+CACHE_DIR = './dwts_dataset_cache'
+CACHE_VERSION = 1
+
+# 特征分组
+SKILL_FEATURES = ['relative_score_pct', 'score_deviation', 'weekly_rank']
+POP_FEATURES = ['search_mean_log', 'search_recent_3m_log']
+CTX_FEATURES = ['was_bottom_last_week', 'weeks_survived', 'running_order']
+FEATURE_COLUMNS = SKILL_FEATURES + POP_FEATURES + CTX_FEATURES
+
+# notebook 中做 StandardScaler 的列（was_bottom_last_week 不标准化）
+NUMERICAL_FEATURES = [
+    'relative_score_pct', 'score_deviation', 'weekly_rank',
+    'search_mean_log', 'search_recent_3m_log',
+    'weeks_survived', 'running_order'
+]
+
+FEATURE_SLICES = {
+    'X_skill': slice(0, len(SKILL_FEATURES)),
+    'X_pop': slice(len(SKILL_FEATURES), len(SKILL_FEATURES) + len(POP_FEATURES)),
+    'X_ctx': slice(len(SKILL_FEATURES) + len(POP_FEATURES), len(FEATURE_COLUMNS)),
+}
+TENSOR_KEYS = ['X_skill', 'X_pop', 'X_ctx', 'industry_code', 'y_elim', 'y_bottom', 'mask']
+INDEX_KEYS = ['season', 'week', 'N_actual']
+SOURCE_COLUMNS = ['season', 'week'] + FEATURE_COLUMNS + ['industry_code', 'is_eliminated', 'is_bottom_two']
+
+
+def data_fingerprint(df, N_max):
+    """数据集内容的指纹：参与打包的列、行序与 N_max 任一变化，缓存即失效。"""
+    hashed = pd.util.hash_pandas_object(df[SOURCE_COLUMNS], index=False).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update(json.dumps([CACHE_VERSION, int(N_max), SOURCE_COLUMNS]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_group_arrays(df, N_max=20, verbose=False):
+    """
+    把面板按 (season, week) 打包成填充数组。组按 (season, week) 升序，组内保持 df 原有行序，
+    超过 N_max 的组只保留前 N_max 行——与原 DWTSDataset 的 groupby + head(N_max) 相同。
+    特征保持 float64 原值，标准化后再转 float32（与原流程先标准化 DataFrame 再 astype 一致）。
+    """
+    season = df['season'].to_numpy()
+    week = df['week'].to_numpy()
+    order = np.lexsort((week, season))  # 稳定排序，组内保持原行序
+    season, week = season[order], week[order]
+
+    starts = np.flatnonzero(np.r_[True, (season[1:] != season[:-1]) | (week[1:] != week[:-1])])
+    counts = np.diff(np.r_[starts, len(order)])
+    G = len(starts)
+    group_id = np.repeat(np.arange(G), counts)
+    pos = np.arange(len(order)) - np.repeat(starts, counts)
+    keep = pos < N_max
+
+    if verbose:
+        for g in np.flatnonzero(counts > N_max):
+            print(f"警告: Season {season[starts[g]]} Week {week[starts[g]]} 有 {counts[g]} 名选手，"
+                  f"超过 N_max={N_max}，截断")
+
+    rows = order[keep]
+    gi, pi = group_id[keep], pos[keep]
+
+    features = np.zeros((G, N_max, len(FEATURE_COLUMNS)), dtype=np.float64)
+    features[gi, pi] = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)[rows]
+
+    def _padded(column, dtype):
+        out = np.zeros((G, N_max), dtype=dtype)
+        out[gi, pi] = df[column].to_numpy()[rows].astype(dtype)
+        return out
+
+    mask = np.zeros((G, N_max), dtype=np.float32)
+    mask[gi, pi] = 1.0
+    row_index = np.full((G, N_max), -1, dtype=np.int64)
+    row_index[gi, pi] = rows
+
+    arrays = {
+        'features': features,
+        'industry_code': _padded('industry_code', np.int64),
+        'y_elim': _padded('is_eliminated', np.float32),
+        'y_bottom': _padded('is_bottom_two', np.float32),
+        'mask': mask,
+        'season': season[starts].astype(np.int64),
+        'week': week[starts].astype(np.int64),
+        'N_actual': np.minimum(counts, N_max).astype(np.int64),
+        'row_index': row_index,
+    }
+    if verbose:
+        print(f"✓ 数据集构建完成:")
+        print(f"  - 总组数: {G} 个 (season, week) 组")
+        print(f"  - N_max: {N_max}")
+    return arrays
+
+
+# ==================== 缓存 ====================
+def save_group_arrays(arrays, cache_dir, fingerprint):
+    """每个数组存为 cache_dir/<name>.npy，meta.json 最后写入，作为缓存完整的标志。"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    meta_path = cache_dir / 'meta.json'
+    if meta_path.exists():
+        meta_path.unlink()
+    for name, array in arrays.items():
+        tmp = cache_dir / f'{name}.{os.getpid()}.tmp.npy'
+        np.save(tmp, np.ascontiguousarray(array))
+        os.replace(tmp, cache_dir / f'{name}.npy')
+    meta = {
+        'version': CACHE_VERSION,
+        'fingerprint': fingerprint,
+        'N_max': int(arrays['mask'].shape[1]),
+        'feature_columns': FEATURE_COLUMNS,
+        'arrays': sorted(arrays),
+    }
+    tmp = cache_dir / f'meta.{os.getpid()}.tmp.json'
+    tmp.write_text(json.dumps(meta, indent=1), encoding='utf-8')
+    os.replace(tmp, meta_path)
+
+
+def load_group_arrays(cache_dir, fingerprint=None, mmap=True):
+    """读取缓存；缓存不存在、不完整或指纹不符时返回 None。mmap=True 时各数组以只读内存映射打开。"""
+    cache_dir = Path(cache_dir)
+    meta_path = cache_dir / 'meta.json'
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    except ValueError:
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('feature_columns') != FEATURE_COLUMNS:
+        return None
+    if fingerprint is not None and meta.get('fingerprint') != fingerprint:
+        return None
+    try:
+        return {
+            name: np.load(cache_dir / f'{name}.npy', mmap_mode='r' if mmap else None)
+            for name in meta['arrays']
+        }
+    except (OSError, ValueError):
+        return None
+
+
+# ==================== 标准化 ====================
+def fit_standardizer(arrays, groups=None, columns=NUMERICAL_FEATURES):
+    """
+    在 groups 所含的有效行上拟合 StandardScaler：返回 (列下标, 均值, 标准差)。
+    与 sklearn 相同，使用总体标准差，标准差为 0 的列按 1 处理。
+    只统计打包进来的行：若有组被 N_max 截断，被截掉的行不参与拟合（原流程在截断前的 DataFrame 上 fit）。
+    """
+    groups = np.arange(len(arrays['season'])) if groups is None else groups
+    cols = np.array([FEATURE_COLUMNS.index(c) for c in columns])
+    valid = np.asarray(arrays['mask'][groups]) == 1
+    values = np.asarray(arrays['features'][groups])[valid][:, cols]
+    mean = values.mean(axis=0)
+    scale = values.std(axis=0)
+    scale[scale == 0.0] = 1.0
+    return cols, mean, scale
+
+
+def _standardized_features(arrays, groups, standardizer=None):
+    features = np.array(arrays['features'][groups], dtype=np.float64)
+    if standardizer is not None:
+        cols, mean, scale = standardizer
+        features[..., cols] = (features[..., cols] - mean) / scale
+        features[np.asarray(arrays['mask'][groups]) == 0] = 0.0
+    return features.astype(np.float32)
+
+
+# ==================== 数据集 ====================
+class DWTSDataset(Dataset):
+    """
+    DWTS 张量化数据集。DWTSDataset(df, N_max, verbose) 的用法与原实现相同；
+    LOSO 各折用 subset() 从同一份打包数组中取赛季并做标准化，不再重新分组。
+    """
+
+    def __init__(self, df: pd.DataFrame = None, N_max: int = 20, verbose: bool = False,
+                 arrays=None, groups=None, standardizer=None):
+        self.verbose = verbose
+        self.skill_features = SKILL_FEATURES
+        self.pop_features = POP_FEATURES
+        self.ctx_features = CTX_FEATURES
+        self.arrays = arrays if arrays is not None else build_group_arrays(df, N_max, verbose)
+        self.N_max = int(self.arrays['mask'].shape[1])
+        self.groups = np.arange(len(self.arrays['season'])) if groups is None else np.asarray(groups)
+        self.standardizer = standardizer
+
+        features = _standardized_features(self.arrays, self.groups, standardizer)
+        self.tensors = {
+            key: torch.from_numpy(np.ascontiguousarray(features[..., cols]))
+            for key, cols in FEATURE_SLICES.items()
+        }
+        for key in ['industry_code', 'y_elim', 'y_bottom', 'mask'] + INDEX_KEYS:
+            self.tensors[key] = torch.from_numpy(np.array(self.arrays[key][self.groups]))
+        self.row_index = np.array(self.arrays['row_index'][self.groups])
+
+    @classmethod
+    def cached(cls, df, cache_dir=CACHE_DIR, N_max=20, verbose=False):
+        """优先读取 cache_dir 中指纹相符的缓存，否则构建并写入缓存。"""
+        fingerprint = data_fingerprint(df, N_max)
+        arrays = load_group_arrays(cache_dir, fingerprint)
+        if arrays is None:
+            arrays = build_group_arrays(df, N_max, verbose)
+            save_group_arrays(arrays, cache_dir, fingerprint)
+            arrays = load_group_arrays(cache_dir, fingerprint)
+        elif verbose:
+            print(f"✓ 读取数据集缓存: {cache_dir} ({len(arrays['season'])} 个 (season, week) 组)")
+        return cls(arrays=arrays, verbose=verbose)
+
+    @classmethod
+    def load(cls, cache_dir=CACHE_DIR, verbose=False):
+        """直接从缓存目录打开（不校验指纹），供只拿到缓存路径的子进程使用。"""
+        arrays = load_group_arrays(cache_dir)
+        if arrays is None:
+            raise FileNotFoundError(f"数据集缓存不存在或不完整: {cache_dir}")
+        return cls(arrays=arrays, verbose=verbose)
+
+    def season_groups(self, seasons=None, exclude=None):
+        """当前数据集中属于 seasons（且不属于 exclude）的组在底层数组中的下标。"""
+        season = np.asarray(self.arrays['season'])[self.groups]
+        keep = np.ones(len(self.groups), dtype=bool)
+        if seasons is not None:
+            keep &= np.isin(season, list(seasons))
+        if exclude is not None:
+            keep &= ~np.isin(season, list(exclude))
+        return self.groups[keep]
+
+    def season_schedule(self):
+        """
+        赛季并行训练 / 推断的调度表：返回 (seasons, weeks, group_at)。
+        group_at[i, j] 为赛季 seasons[i] 第 weeks[j] 周的组在本数据集中的下标，该周不存在（已结束或缺周）为 -1。
+        """
+        season = self.tensors['season'].numpy()
+        week = self.tensors['week'].numpy()
+        seasons, season_idx = np.unique(season, return_inverse=True)
+        weeks, week_idx = np.unique(week, return_inverse=True)
+        group_at = np.full((len(seasons), len(weeks)), -1, dtype=np.int64)
+        group_at[season_idx, week_idx] = np.arange(len(self))
+        return seasons, weeks, group_at
+
+    def fit_standardizer(self, seasons=None, exclude=None, columns=NUMERICAL_FEATURES):
+        """在选定赛季的原始特征上拟合标准化参数（对应 notebook 中只在训练折上 fit 的 StandardScaler）。"""
+        return fit_standardizer(self.arrays, self.season_groups(seasons, exclude), columns)
+
+    def subset(self, seasons=None, exclude=None, standardizer=None):
+        """按赛季取子集并套用标准化，与原数据集共用底层打包数组。"""
+        return type(self)(arrays=self.arrays, groups=self.season_groups(seasons, exclude),
+                          standardizer=standardizer, verbose=self.verbose)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __getitem__(self, idx) -> dict:
+        item = {key: self.tensors[key][idx] for key in TENSOR_KEYS}
+        for key in INDEX_KEYS:
+            item[key] = int(self.tensors[key][idx])
+        return item
+
+    def batch(self, indices) -> dict:
+        """一次取出多个组，键与 DataLoader 整理后的批次相同（season / week / N_actual 为 int64 张量）。"""
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        return {key: self.tensors[key][indices] for key in TENSOR_KEYS + INDEX_KEYS}
+
+    def loader(self, batch_size=1, shuffle=False, generator=None):
+        return GroupBatchLoader(self, batch_size, shuffle, generator)
+
+
+class GroupBatchLoader:
+    """代替 DataLoader：每个批次直接对打包张量做索引，不经过逐样本整理。可重复迭代（每个 epoch 一次）。"""
+
+    def __init__(self, dataset, batch_size=1, shuffle=False, generator=None):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.generator = generator
+
+    def __len__(self):
+        return (len(self.dataset) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        n = len(self.dataset)
+        if self.shuffle:
+            order = torch.randperm(n, generator=self.generator)
+        else:
+            order = torch.arange(n)
+        for start in range(0, n, self.batch_size):
+            yield self.dataset.batch(order[start:start + self.batch_size])
+
+
+# ==================== 旧实现（逐组切片，仅供校验 / benchmark 对照）====================
+class _DWTSDatasetLegacy:
+    """notebook 中的 DWTSDataset：__getitem__ 每次切 pandas 分组并新建补零数组（去掉了 torch 转换）。"""
+
+    def __init__(self, df, N_max=20):
+        self.N_max = N_max
+        self.groups = []
+        for (season, week), group_df in df.groupby(['season', 'week']):
+            if len(group_df) > N_max:
+                group_df = group_df.head(N_max)
+            self.groups.append((season, week, group_df))
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __getitem__(self, idx):
+        season, week, group_df = self.groups[idx]
+        N_actual = min(len(group_df), self.N_max)
+        group_df = group_df.head(N_actual)
+        out = {'season': season, 'week': week, 'N_actual': N_actual}
+        for key, columns in [('X_skill', SKILL_FEATURES), ('X_pop', POP_FEATURES), ('X_ctx', CTX_FEATURES)]:
+            padded = np.zeros((self.N_max, len(columns)), dtype=np.float32)
+            padded[:N_actual] = group_df[columns].values.astype(np.float32)
+            out[key] = padded
+        for key, column, dtype in [('industry_code', 'industry_code', np.int64),
+                                   ('y_elim', 'is_eliminated', np.float32),
+                                   ('y_bottom', 'is_bottom_two', np.float32)]:
+            padded = np.zeros(self.N_max, dtype=dtype)
+            padded[:N_actual] = group_df[column].values.astype(dtype)
+            out[key] = padded
+        mask = np.zeros(self.N_max, dtype=np.float32)
+        mask[:N_actual] = 1.0
+        out['mask'] = mask
+        return out
+
+
+def _compare(dataset, legacy):
+    """逐组逐键比较，返回不一致的 (组下标, 键) 列表。"""
+    mismatches = []
+    if len(dataset) != len(legacy):
+        return [('len', len(dataset), len(legacy))]
+    for idx in range(len(legacy)):
+        old, new = legacy[idx], dataset[idx]
+        for key in TENSOR_KEYS + INDEX_KEYS:
+            a = old[key]
+            b = new[key].numpy() if isinstance(new[key], torch.Tensor) else new[key]
+            if not np.array_equal(np.asarray(a), np.asarray(b)):
+                mismatches.append((idx, key))
+    return mismatches
+
+
+def verify_dataset(df, N_max=20, test_seasons=None):
+    """
+    与原逐组实现逐元素对比：整表（未标准化）一次，再对每个测试赛季按 notebook 的 LOSO 流程
+    （训练折上 fit StandardScaler，分别 transform 训练 / 测试折）各比一次。返回 {场景: 不一致数}。
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    full = DWTSDataset(df, N_max=N_max)
+    results = {'raw': len(_compare(full, _DWTSDatasetLegacy(df, N_max)))}
+    seasons = sorted(df['season'].unique())
+    for test_season in (seasons[-5:] if test_seasons is None else test_seasons):
+        train_df = df[df['season'] != test_season].copy()
+        test_df = df[df['season'] == test_season].copy()
+        scaler = StandardScaler()
+        train_df[NUMERICAL_FEATURES] = scaler.fit_transform(train_df[NUMERICAL_FEATURES])
+        test_df[NUMERICAL_FEATURES] = scaler.transform(test_df[NUMERICAL_FEATURES])
+
+        standardizer = full.fit_standardizer(exclude=[test_season])
+        train_ds = full.subset(exclude=[test_season], standardizer=standardizer)
+        test_ds = full.subset(seasons=[test_season], standardizer=standardizer)
+        results[f'fold_s{test_season}'] = (
+            len(_compare(train_ds, _DWTSDatasetLegacy(train_df, N_max)))
+            + len(_compare(test_ds, _DWTSDatasetLegacy(test_df, N_max)))
+        )
+    return results
+
+
+def benchmark_dataset(df, N_max=20, epochs=5, batch_sizes=(1, 32)):
+    """对比构建耗时与一个 epoch 的取数耗时（秒，取 epochs 次的中位数）。"""
+    def _median(func, repeats):
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t0)
+        return sorted(times)[len(times) // 2]
+
+    legacy = _DWTSDatasetLegacy(df, N_max)
+    dataset = DWTSDataset(df, N_max=N_max)
+    rows = [
+        {'case': 'build legacy', 'seconds': _median(lambda: _DWTSDatasetLegacy(df, N_max), 3)},
+        {'case': 'build packed', 'seconds': _median(lambda: DWTSDataset(df, N_max=N_max), 3)},
+        {'case': 'epoch legacy bs=1', 'seconds': _median(lambda: [legacy[i] for i in range(len(legacy))], epochs)},
+    ]
+    for batch_size in batch_sizes:
+        loader = dataset.loader(batch_size=batch_size, shuffle=True)
+        rows.append({'case': f'epoch packed bs={batch_size}', 'seconds': _median(lambda: list(loader), epochs)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DWTS 张量化数据集")
+    parser.add_argument("--data", default=DATA_PATH, help="面板数据 CSV")
+    parser.add_argument("--n-max", type=int, default=20, help="每组最多选手数")
+    parser.add_argument("--cache-dir", default=None, help="构建（或校验已有的）数据集缓存目录")
+    parser.add_argument("--verify", action="store_true", help="与原逐组实现逐元素对比")
+    parser.add_argument("--benchmark", action="store_true", help="对比构建与一个 epoch 的取数耗时")
+    args = parser.parse_args()
+
+    df_raw = pd.read_csv(args.data)
+    if args.cache_dir:
+        t0 = time.perf_counter()
+        ds = DWTSDataset.cached(df_raw, args.cache_dir, N_max=args.n_max, verbose=True)
+        print(f"✓ 缓存就绪: {args.cache_dir} ({len(ds)} 组, {time.perf_counter() - t0:.3f}s)")
+    if args.verify:
+        results = verify_dataset(df_raw, N_max=args.n_max)
+        for case, n in results.items():
+            print(f"  {case}: {'一致' if n == 0 else f'{n} 处不一致'}")
+    if args.benchmark:
+        print(benchmark_dataset(df_raw, N_max=args.n_max).to_string(index=False))
@@ -0,0 +1,703 @@
+"""
+DWTS 隐变量推断模型（由训练 notebook 提炼而来）：隐变量推断引擎、赛季感知融合层、完整模型、复合损失、
+Hit-rate@k 以及逐组训练 / 评估函数。放在模块里，LOSO 多进程训练的子进程与推断脚本都从这里导入。
+
+train_one_epoch / evaluate 按 (season, week) 逐组推进；train_one_epoch_seasons / evaluate_seasons /
+predict_seasons 则把全部赛季沿 batch 维堆叠、按周同步推进（v_prev 为按赛季的批量张量，已结束或缺周的赛季
+不进入该周的批次），每个 epoch 只有 ~11 步。
+
+训练单元格与全量训练单元格的两处差异用参数保留：
+  - SeasonAwareFusion(rank_prior=True)：按赛季计分制度（排名制 / 百分比制）初始化 alpha_s、g_s；
+  - CompositeLoss(lambda_top2=...)：倒数两名的淘汰概率质量项，lambda_top2=0 时不计算。
+"""
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+# 训练单元格的超参数
+HYPERPARAMS = {
+    'N_max': 20,
+    'hidden_dim': 64,
+    'lambda_bottom': 0.7,   # 调高：强调倒数预测
+    'lambda_kl': 0.05,      # 调低：给隐变量更多自由
+    'lambda_smooth': 0.1,
+    'tau': 0.1,             # 调高初始值：防止过度自信
+    'learning_rate': 5e-4,  # 调低：训练更稳
+    'batch_size': 1,
+    'num_epochs': 100,
+    'early_stop_patience': 15,
+    'num_industries': 8,
+    'industry_embed_dim': 8,
+}
+
+NUM_SEASONS = 34
+RANK_SEASONS = [1, 2] + list(range(28, NUM_SEASONS + 1))
+
+
+# ==================== 隐变量推断引擎 ====================
+class LatentInferenceEngine(nn.Module):
+    def __init__(self, pop_dim: int, ctx_dim: int, hidden_dim: int = 64,
+                 num_industries: int = 8, industry_embed_dim: int = 8):
+        super().__init__()
+
+        self.industry_embedding = nn.Embedding(num_industries, industry_embed_dim)
+
+        input_dim = pop_dim + industry_embed_dim + ctx_dim + 1
+
+        self.prior_mlp = nn.Sequential(
+            nn.Linear(input_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(hidden_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+        )
+
+        self.mu_head = nn.Linear(hidden_dim, 1)
+        self.logvar_head = nn.Linear(hidden_dim, 1)
+
+        self.gamma = nn.Parameter(torch.tensor(0.5))
+        self.delta = nn.Parameter(torch.tensor(0.3))
+
+    def forward(self, X_pop, X_ctx, industry_code, v_prev, mask):
+        B, N = mask.shape
+
+        industry_embed = self.industry_embedding(industry_code)
+        was_bottom = X_ctx[:, :, 0]
+
+        # 强制参数非负，符合社会学直觉
+        gamma_clamped = torch.clamp(self.gamma, min=0.0)
+        delta_clamped = torch.clamp(self.delta, min=0.0)
+        momentum_term = gamma_clamped * v_prev.unsqueeze(-1)
+
+        mlp_input = torch.cat([
+            X_pop,
+            industry_embed,
+            X_ctx,
+            momentum_term
+        ], dim=-1)
+
+        h = self.prior_mlp(mlp_input)
+        mu_base = self.mu_head(h).squeeze(-1)
+        logvar = self.logvar_head(h).squeeze(-1)
+
+        mu = mu_base + delta_clamped * was_bottom
+
+        if self.training:
+            std = torch.exp(0.5 * logvar)
+            eps = torch.randn_like(std)
+            z = mu + eps * std
+        else:
+            z = mu
+
+        z_masked = z.masked_fill(mask == 0, -1e9)
+        v_hat = F.softmax(z_masked, dim=-1)
+
+        return v_hat, mu, logvar
+
+
+# ==================== 赛季感知融合层 ====================
+class SeasonAwareFusion(nn.Module):
+    def __init__(self, num_seasons: int = NUM_SEASONS, rank_prior: bool = False):
+        super().__init__()
+        if rank_prior:
+            # 排名制赛季偏向排名融合，百分比制赛季偏向百分比融合
+            rank_seasons = set(RANK_SEASONS)
+            alpha_init = torch.full((num_seasons,), 0.5)
+            g_init = torch.full((num_seasons,), 0.8)
+            for season in range(1, num_seasons + 1):
+                if season in rank_seasons:
+                    alpha_init[season - 1] = 0.55
+                    g_init[season - 1] = 0.2
+            self.alpha_s = nn.Parameter(torch.logit(alpha_init.clamp(0.01, 0.99)))
+            self.g_s = nn.Parameter(torch.logit(g_init.clamp(0.01, 0.99)))
+        else:
+            self.alpha_s = nn.Parameter(torch.ones(num_seasons) * 0.5)
+            self.g_s = nn.Parameter(torch.ones(num_seasons) * 0.5)
+
+    def forward(self, X_skill, v_hat, season_ids, mask, is_test=False):
+        B, N = mask.shape
+
+        pct_J = X_skill[:, :, 0]
+        rank_J = X_skill[:, :, 2]
+
+        N_t = mask.sum(dim=1, keepdim=True)
+        R_J = (N_t - rank_J) / (N_t - 1 + 1e-8)
+        R_J = R_J * mask
+
+        v_hat_masked = v_hat.masked_fill(mask == 0, -1e9)
+        rank_V = torch.argsort(torch.argsort(v_hat_masked, dim=1, descending=True), dim=1).float()
+        rank_V = rank_V + 1
+        R_V = (N_t - rank_V) / (N_t - 1 + 1e-8)
+        R_V = R_V * mask
+
+        # 测试模式下，使用训练赛季参数的均值
+        if is_test:
+            alpha_val = torch.sigmoid(self.alpha_s).mean()
+            g_val = torch.sigmoid(self.g_s).mean()
+            alpha = alpha_val.expand(B)
+            g = g_val.expand(B)
+        else:
+            alpha = torch.sigmoid(self.alpha_s[season_ids])
+            g = torch.sigmoid(self.g_s[season_ids])
+
+        S_pct = alpha.unsqueeze(1) * pct_J + (1 - alpha.unsqueeze(1)) * v_hat
+        S_rank = alpha.unsqueeze(1) * R_J + (1 - alpha.unsqueeze(1)) * R_V
+        S_final = g.unsqueeze(1) * S_pct + (1 - g.unsqueeze(1)) * S_rank
+        S_final = S_final * mask
+
+        return S_final
+
+
+# ==================== 完整模型 ====================
+class DWTSModel(nn.Module):
+    def __init__(self, skill_dim, pop_dim, ctx_dim, hidden_dim, num_seasons, tau,
+                 num_industries, industry_embed_dim, rank_prior=False):
+        super().__init__()
+
+        self.latent_engine = LatentInferenceEngine(
+            pop_dim, ctx_dim, hidden_dim, num_industries, industry_embed_dim
+        )
+        self.fusion_layer = SeasonAwareFusion(num_seasons, rank_prior=rank_prior)
+
+        # tau 为可学习参数
+        self.tau = nn.Parameter(torch.tensor(float(tau)), requires_grad=True)
+
+    def forward(self, batch, v_prev=None, is_test=False):
+        mask = batch['mask']
+        week = batch['week'][0].item()
+
+        # 第一周使用均匀分布
+        if v_prev is None or week == 1:
+            N_t = mask.sum(dim=1, keepdim=True)
+            v_prev = mask / N_t
+
+        return self.score(batch['X_skill'], batch['X_pop'], batch['X_ctx'], batch['industry_code'],
+                          mask, batch['season'] - 1, v_prev, is_test=is_test)
+
+    def score(self, X_skill, X_pop, X_ctx, industry_code, mask, season_ids, v_prev, is_test: bool = False):
+        """张量版前向：v_prev 由调用方给出（第一周为均匀分布），供批量推断与 TorchScript 导出使用。"""
+        v_hat, mu, logvar = self.latent_engine(X_pop, X_ctx, industry_code, v_prev, mask)
+
+        S_final = self.fusion_layer(X_skill, v_hat, season_ids, mask, is_test=is_test)
+
+        S_masked = S_final.masked_fill(mask == 0, 1e9)
+
+        # 限制 tau 范围，防止除以零或过度自信
+        tau_clamped = torch.clamp(self.tau, min=0.05, max=0.5)
+        p_elim = F.softmax(-S_masked / tau_clamped, dim=-1)
+
+        p_bottom = torch.sigmoid(-S_final)
+        p_bottom = p_bottom * mask
+
+        return {
+            'p_elim': p_elim,
+            'p_bottom': p_bottom,
+            'v_hat': v_hat,
+            'mu': mu,
+            'logvar': logvar,
+            'S_final': S_final,
+        }
+
+
+def build_model(hyperparams=HYPERPARAMS, rank_prior=False):
+    """按超参数构建 DWTSModel（特征维度固定为 skill 3 / pop 2 / ctx 3）。"""
+    return DWTSModel(
+        skill_dim=3,
+        pop_dim=2,
+        ctx_dim=3,
+        hidden_dim=hyperparams['hidden_dim'],
+        num_seasons=NUM_SEASONS,
+        tau=hyperparams['tau'],
+        num_industries=hyperparams['num_industries'],
+        industry_embed_dim=hyperparams['industry_embed_dim'],
+        rank_prior=rank_prior,
+    )
+
+
+# ==================== 复合损失函数 ====================
+class CompositeLoss(nn.Module):
+    def __init__(self, lambda_bottom, lambda_kl, lambda_smooth, lambda_top2=0.0):
+        super().__init__()
+        self.lambda_bottom = lambda_bottom
+        self.lambda_top2 = lambda_top2
+        self.lambda_kl = lambda_kl
+        self.lambda_smooth = lambda_smooth
+
+    def forward(self, outputs, batch, v_hat_prev=None, prev_mask=None):
+        """prev_mask: (B,) 布尔，赛季并行时标出 v_hat_prev 有效（上一周存在）的行，平滑项只在这些行上计算。"""
+        p_elim = outputs['p_elim']
+        p_bottom = outputs['p_bottom']
+        v_hat = outputs['v_hat']
+        mu = outputs['mu']
+        logvar = outputs['logvar']
+
+        y_elim = batch['y_elim']
+        y_bottom = batch['y_bottom']
+        mask = batch['mask']
+
+        elim_mask = (y_elim == 1) & (mask == 1)
+        if elim_mask.sum() > 0:
+            L_elim = -torch.log(p_elim[elim_mask] + 1e-10).mean()
+        else:
+            L_elim = torch.tensor(0.0, device=p_elim.device)
+
+        active_mask = mask == 1
+        if active_mask.sum() > 0:
+            L_bottom = F.binary_cross_entropy(
+                p_bottom[active_mask],
+                y_bottom[active_mask],
+                reduction='mean'
+            )
+        else:
+            L_bottom = torch.tensor(0.0, device=p_bottom.device)
+
+        if active_mask.sum() > 0:
+            kl_div = -0.5 * (1 + logvar - mu.pow(2) - logvar.exp())
+            kl_per_sample = kl_div[active_mask].sum()
+            L_KL = kl_per_sample / active_mask.sum()
+        else:
+            L_KL = torch.tensor(0.0, device=mu.device)
+
+        if self.lambda_top2:
+            L_top2 = top2_loss(p_elim, y_bottom, mask)
+        else:
+            L_top2 = torch.tensor(0.0, device=p_elim.device)
+
+        smooth_mask = active_mask if prev_mask is None else active_mask & prev_mask.unsqueeze(1)
+        if v_hat_prev is not None and smooth_mask.sum() > 0:
+            smooth_diff = (v_hat - v_hat_prev).pow(2)
+            L_smooth = smooth_diff[smooth_mask].mean()
+        else:
+            L_smooth = torch.tensor(0.0, device=v_hat.device)
+
+        total_loss = (
+            L_elim +
+            self.lambda_bottom * L_bottom +
+            self.lambda_top2 * L_top2 +
+            self.lambda_kl * L_KL +
+            self.lambda_smooth * L_smooth
+        )
+
+        loss_dict = {
+            'total': total_loss.item(),
+            'elim': L_elim.item(),
+            'bottom': L_bottom.item(),
+            'top2': L_top2.item(),
+            'kl': L_KL.item(),
+            'smooth': L_smooth.item(),
+        }
+
+        return total_loss, loss_dict
+
+
+def build_criterion(hyperparams=HYPERPARAMS):
+    return CompositeLoss(
+        lambda_bottom=hyperparams['lambda_bottom'],
+        lambda_kl=hyperparams['lambda_kl'],
+        lambda_smooth=hyperparams['lambda_smooth'],
+        lambda_top2=hyperparams.get('lambda_top2', 0.0),
+    )
+
+
+def top2_loss(p_elim, y_bottom, mask):
+    """
+    倒数两名项：每组淘汰概率落在真实倒数两名上的质量取 -log，对有倒数两名的组求和后除以组数 B。
+    整批一次完成：质量 = (p_elim * 倒数两名掩码).sum(1)，没有倒数两名的组贡献 0。
+    """
+    bottom_mask = (y_bottom == 1) & (mask == 1)
+    bottom_mass = (p_elim * bottom_mask).sum(dim=1)
+    has_bottom = bottom_mask.any(dim=1)
+    nll = torch.where(has_bottom, -torch.log(bottom_mass + 1e-10), torch.zeros_like(bottom_mass))
+    return nll.sum() / p_elim.size(0)
+
+
+# ==================== 评估指标 ====================
+def hits_at_k(p_elim, y_elim, mask, k=2):
+    """
+    逐组判断真实淘汰者是否落在淘汰概率前 k 名（只在有效选手中排，有效选手不足 k 人时取全部）。
+    返回 (hit, has_elim)，均为 (B,) 布尔；整批一次 topk，再用 scatter 还原成前 k 名掩码。
+    """
+    active = mask == 1
+    true_elim = (y_elim == 1) & active
+    scores = p_elim.masked_fill(~active, -1)
+    k_max = min(k, p_elim.size(1))
+    topk_idx = torch.topk(scores, k=k_max, dim=1)[1]
+    # 第 j 名只有在 j < min(k, 有效人数) 时才算入前 k 名
+    within_k = torch.arange(k_max, device=p_elim.device).unsqueeze(0) < active.sum(dim=1, keepdim=True)
+    in_topk = torch.zeros_like(active).scatter(1, topk_idx, within_k)
+    hit = (in_topk & true_elim).any(dim=1)
+    return hit, true_elim.any(dim=1)
+
+
+def hit_rate_at_k(p_elim, y_elim, mask, k=2):
+    """Hit-rate@k：在有淘汰的组中，真实淘汰者落在前 k 名的比例；没有淘汰的批次返回 0.0。"""
+    hit, has_elim = hits_at_k(p_elim, y_elim, mask, k)
+    total = has_elim.sum().item()
+    return hit.sum().item() / total if total > 0 else 0.0
+
+
+# ==================== 训练与评估函数 ====================
+def train_one_epoch(model, dataloader, criterion, optimizer, device):
+    model.train()
+    total_loss = 0
+    loss_components = {'elim': 0, 'bottom': 0, 'top2': 0, 'kl': 0, 'smooth': 0}
+    num_batches = 0
+
+    v_hat_cache = {}
+
+    for batch in dataloader:
+        batch = {k: v.to(device) if isinstance(v, torch.Tensor) else v
+                 for k, v in batch.items()}
+
+        season = batch['season'][0].item()
+        week = batch['week'][0].item()
+
+        key = (season, week - 1)
+        v_prev = v_hat_cache.get(key, None)
+
+        outputs = model(batch, v_prev=v_prev)
+        loss, loss_dict = criterion(outputs, batch, v_hat_prev=v_prev)
+
+        optimizer.zero_grad()
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+        optimizer.step()
+
+        v_hat_cache[(season, week)] = outputs['v_hat'].detach()
+
+        total_loss += loss.item()
+        for k in loss_components:
+            loss_components[k] += loss_dict[k]
+        num_batches += 1
+
+    avg_loss = total_loss / num_batches
+    avg_components = {k: v / num_batches for k, v in loss_components.items()}
+
+    return avg_loss, avg_components
+
+
+def evaluate(model, dataloader, criterion, device):
+    model.eval()
+    total_loss = 0
+    hit_rate_2 = 0
+    num_batches = 0
+
+    v_hat_cache = {}
+
+    with torch.no_grad():
+        for batch in dataloader:
+            batch = {k: v.to(device) if isinstance(v, torch.Tensor) else v
+                     for k, v in batch.items()}
+
+            season = batch['season'][0].item()
+            week = batch['week'][0].item()
+            key = (season, week - 1)
+            v_prev = v_hat_cache.get(key, None)
+
+            # 开启测试模式
+            outputs = model(batch, v_prev=v_prev, is_test=True)
+            loss, _ = criterion(outputs, batch, v_hat_prev=v_prev)
+
+            hr = hit_rate_at_k(outputs['p_elim'], batch['y_elim'], batch['mask'], k=2)
+
+            v_hat_cache[(season, week)] = outputs['v_hat']
+
+            total_loss += loss.item()
+            hit_rate_2 += hr
+            num_batches += 1
+
+    avg_loss = total_loss / num_batches
+    avg_hit_rate = hit_rate_2 / num_batches
+
+    return avg_loss, avg_hit_rate
+
+
+# ==================== 赛季并行（赛季沿 batch 维堆叠，按周推进）====================
+def iter_season_steps(dataset, device):
+    """
+    逐周产出 (rows, batch, has_prev)：rows 为本周仍在进行的赛季（season_schedule 中的行号），
+    batch 为这些赛季本周的组，has_prev 标出上一周存在的赛季（第一周、缺周之后为 False）。
+    """
+    seasons, weeks, group_at = dataset.season_schedule()
+    for j, week in enumerate(weeks):
+        rows = np.flatnonzero(group_at[:, j] >= 0)
+        if j > 0 and weeks[j - 1] == week - 1:
+            has_prev = group_at[rows, j - 1] >= 0
+        else:
+            has_prev = np.zeros(len(rows), dtype=bool)
+        batch = {k: v.to(device) for k, v in dataset.batch(group_at[rows, j]).items()}
+        yield torch.from_numpy(rows).to(device), batch, torch.from_numpy(has_prev).to(device)
+
+
+def _season_v_prev(v_state, rows, has_prev, mask):
+    """取各赛季上一周的 v_hat；上一周不存在的赛季用本周的均匀分布（与逐组版本 v_prev=None 时相同）。"""
+    uniform = mask / mask.sum(dim=1, keepdim=True)
+    return torch.where(has_prev.unsqueeze(1), v_state[rows], uniform)
+
+
+def train_one_epoch_seasons(model, dataset, criterion, optimizer, device):
+    """
+    赛季并行的一个 epoch：每周一步，批内为所有仍在进行的赛季，每步更新一次参数。
+    返回值与 train_one_epoch 相同（按步平均）。
+    """
+    model.train()
+    total_loss = 0
+    loss_components = {'elim': 0, 'bottom': 0, 'top2': 0, 'kl': 0, 'smooth': 0}
+    num_batches = 0
+
+    v_state = torch.zeros(len(dataset.season_schedule()[0]), dataset.N_max, device=device)
+
+    for rows, batch, has_prev in iter_season_steps(dataset, device):
+        v_prev = _season_v_prev(v_state, rows, has_prev, batch['mask'])
+
+        outputs = model(batch, v_prev=v_prev)
+        loss, loss_dict = criterion(outputs, batch, v_hat_prev=v_prev if has_prev.any() else None,
+                                    prev_mask=has_prev)
+
+        optimizer.zero_grad()
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+        optimizer.step()
+
+        v_state[rows] = outputs['v_hat'].detach()
+
+        total_loss += loss.item()
+        for k in loss_components:
+            loss_components[k] += loss_dict[k]
+        num_batches += 1
+
+    avg_loss = total_loss / num_batches
+    avg_components = {k: v / num_batches for k, v in loss_components.items()}
+
+    return avg_loss, avg_components
+
+
+def evaluate_seasons(model, dataset, criterion, device):
+    """
+    赛季并行评估。Hit-rate@2 与 evaluate 相同（命中组数 / 全部组数）；损失按周步平均，
+    数据集只含一个赛季（LOSO 测试折）时与 evaluate 完全一致。
+    """
+    model.eval()
+    total_loss = 0
+    hits = 0
+    num_batches = 0
+
+    v_state = torch.zeros(len(dataset.season_schedule()[0]), dataset.N_max, device=device)
+
+    with torch.no_grad():
+        for rows, batch, has_prev in iter_season_steps(dataset, device):
+            v_prev = _season_v_prev(v_state, rows, has_prev, batch['mask'])
+
+            outputs = model(batch, v_prev=v_prev, is_test=True)
+            loss, _ = criterion(outputs, batch, v_hat_prev=v_prev if has_prev.any() else None,
+                                prev_mask=has_prev)
+
+            hit, _ = hits_at_k(outputs['p_elim'], batch['y_elim'], batch['mask'], k=2)
+            hits += hit.sum().item()
+
+            v_state[rows] = outputs['v_hat']
+
+            total_loss += loss.item()
+            num_batches += 1
+
+    avg_loss = total_loss / num_batches
+    avg_hit_rate = hits / len(dataset)
+
+    return avg_loss, avg_hit_rate
+
+
+def predict_seasons(model, dataset, device, is_test=True, scorer=None):
+    """
+    赛季并行推断（torch.inference_mode）：返回与数据集组顺序对齐的 v_hat，形状 (G, N_max)。
+    scorer 为 FanVoteScorer 或其 TorchScript 版本时用它代替 model 前向（只有测试模式）。
+    """
+    model.eval()
+    seasons, weeks, group_at = dataset.season_schedule()
+
+    with torch.inference_mode():
+        v_state = torch.zeros(len(seasons), dataset.N_max, device=device)
+        v_hat = torch.zeros(len(dataset), dataset.N_max)
+        for j, (rows, batch, has_prev) in enumerate(iter_season_steps(dataset, device)):
+            v_prev = _season_v_prev(v_state, rows, has_prev, batch['mask'])
+            if scorer is not None:
+                v_step, _ = scorer(batch['X_skill'], batch['X_pop'], batch['X_ctx'], batch['industry_code'],
+                                   batch['mask'], batch['season'], v_prev)
+            else:
+                v_step = model(batch, v_prev=v_prev, is_test=is_test)['v_hat']
+            v_state[rows] = v_step
+            v_hat[torch.from_numpy(group_at[rows.cpu().numpy(), j])] = v_step.cpu()
+
+    return v_hat.numpy()
+
+
+def predict_groups(model, dataset, device, is_test=True):
+    """逐组推断（notebook 提取 v_hat 的循环，batch_size=1），作为 predict_seasons 的对照。"""
+    model.eval()
+    v_hat = np.zeros((len(dataset), dataset.N_max), dtype=np.float32)
+    v_hat_cache = {}
+    with torch.no_grad():
+        for idx, batch in enumerate(dataset.loader(batch_size=1)):
+            batch = {k: v.to(device) for k, v in batch.items()}
+            season, week = batch['season'][0].item(), batch['week'][0].item()
+            outputs = model(batch, v_prev=v_hat_cache.get((season, week - 1)), is_test=is_test)
+            v_hat_cache[(season, week)] = outputs['v_hat']
+            v_hat[idx] = outputs['v_hat'][0].cpu().numpy()
+    return v_hat
+
+
+class FanVoteScorer(nn.Module):
+    """
+    推断用的纯张量接口（测试模式）：输入各特征张量、赛季号与 v_prev，输出 (v_hat, p_elim)。
+    没有 dict 输入和 Python 分支，可以 torch.jit.trace 导出为 TorchScript。
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, X_skill, X_pop, X_ctx, industry_code, mask, season, v_prev):
+        outputs = self.model.score(X_skill, X_pop, X_ctx, industry_code, mask, season - 1, v_prev, is_test=True)
+        return outputs['v_hat'], outputs['p_elim']
+
+
+# ==================== 旧实现（逐组循环，仅供校验 / benchmark 对照）====================
+def _top2_loss_loop(p_elim, y_bottom, mask):
+    L_top2 = torch.tensor(0.0, device=p_elim.device)
+    for i in range(p_elim.size(0)):
+        bottom_mask = (y_bottom[i] == 1) & (mask[i] == 1)
+        if bottom_mask.sum() == 0:
+            continue
+        bottom_mass = p_elim[i][bottom_mask].sum()
+        L_top2 = L_top2 - torch.log(bottom_mass + 1e-10)
+    return L_top2 / p_elim.size(0)
+
+
+def _hit_rate_at_k_loop(p_elim, y_elim, mask, k=2):
+    B, N = p_elim.shape
+    hits = 0
+    total = 0
+
+    for i in range(B):
+        active_idx = mask[i] == 1
+        true_elim_idx = (y_elim[i] == 1) & active_idx
+
+        if true_elim_idx.sum() == 0:
+            continue
+
+        p_elim_active = p_elim[i].clone()
+        p_elim_active[~active_idx] = -1
+
+        topk_idx = torch.topk(p_elim_active, k=min(k, active_idx.sum().item()))[1]
+
+        if true_elim_idx[topk_idx].sum() > 0:
+            hits += 1
+
+        total += 1
+
+    return hits / total if total > 0 else 0.0
+
+
+def _random_batch(B, N=20, generator=None, ties=False):
+    """随机批次：有效人数 1..16，部分组没有淘汰 / 倒数两名；ties=True 时把概率量化成少数几档制造并列。"""
+    n_active = torch.randint(1, 17, (B,), generator=generator)
+    mask = (torch.arange(N).unsqueeze(0) < n_active.unsqueeze(1)).float()
+    logits = torch.randn(B, N, generator=generator)
+    if ties:
+        logits = torch.round(logits * 2) / 2
+    p_elim = F.softmax(logits.masked_fill(mask == 0, -1e9), dim=-1)
+    y_elim = ((torch.rand(B, N, generator=generator) < 0.15) & (mask == 1)).float()
+    y_bottom = ((torch.rand(B, N, generator=generator) < 0.2) & (mask == 1)).float()
+    return p_elim, y_elim, y_bottom, mask
+
+
+def verify_vectorized(trials=500, seed=0):
+    """
+    与逐组循环版本对比：hit_rate_at_k 结果与每组命中逐一相同，top2_loss 的值与梯度在浮点误差内相同。
+    返回各项不一致的次数。
+    """
+    generator = torch.Generator().manual_seed(seed)
+    mismatches = {'hit_rate': 0, 'hits_per_group': 0, 'top2_value': 0, 'top2_grad': 0}
+    for trial in range(trials):
+        B = int(torch.randint(1, 65, (1,), generator=generator))
+        p_elim, y_elim, y_bottom, mask = _random_batch(B, generator=generator, ties=trial % 2 == 1)
+        for k in (1, 2, 3):
+            if hit_rate_at_k(p_elim, y_elim, mask, k) != _hit_rate_at_k_loop(p_elim, y_elim, mask, k):
+                mismatches['hit_rate'] += 1
+            hit, has_elim = hits_at_k(p_elim, y_elim, mask, k)
+            for i in range(B):
+                if bool(has_elim[i]) and bool(hit[i]) != bool(
+                        _hit_rate_at_k_loop(p_elim[i:i + 1], y_elim[i:i + 1], mask[i:i + 1], k)):
+                    mismatches['hits_per_group'] += 1
+
+        p_new = p_elim.clone().requires_grad_(True)
+        p_old = p_elim.clone().requires_grad_(True)
+        new, old = top2_loss(p_new, y_bottom, mask), _top2_loss_loop(p_old, y_bottom, mask)
+        if not torch.allclose(new, old, rtol=1e-6, atol=1e-7):
+            mismatches['top2_value'] += 1
+        new.backward()
+        if old.requires_grad:
+            old.backward()
+            grad_old = p_old.grad
+        else:
+            grad_old = torch.zeros_like(p_elim)
+        if not torch.allclose(p_new.grad, grad_old, rtol=1e-5, atol=1e-7):
+            mismatches['top2_grad'] += 1
+    return mismatches
+
+
+def benchmark_vectorized(batch_sizes=(1, 4, 16, 64, 256), repeats=50, seed=0):
+    """逐组循环与整批实现的耗时对比（微秒 / 次，取中位数）；top2 计入一次反向传播。"""
+    import time
+
+    import pandas as pd
+
+    def _median_us(func):
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t0)
+        return sorted(times)[len(times) // 2] * 1e6
+
+    def _top2_step(loss_fn, p_elim, y_bottom, mask):
+        p = p_elim.clone().requires_grad_(True)
+        loss = loss_fn(p, y_bottom, mask)
+        if loss.requires_grad:
+            loss.backward()
+
+    generator = torch.Generator().manual_seed(seed)
+    rows = []
+    for B in batch_sizes:
+        p_elim, y_elim, y_bottom, mask = _random_batch(B, generator=generator)
+        row = {'batch_size': B}
+        row['hit_loop_us'] = _median_us(lambda: _hit_rate_at_k_loop(p_elim, y_elim, mask, 2))
+        row['hit_vec_us'] = _median_us(lambda: hit_rate_at_k(p_elim, y_elim, mask, 2))
+        row['top2_loop_us'] = _median_us(lambda: _top2_step(_top2_loss_loop, p_elim, y_bottom, mask))
+        row['top2_vec_us'] = _median_us(lambda: _top2_step(top2_loss, p_elim, y_bottom, mask))
+        row['hit_speedup'] = row['hit_loop_us'] / row['hit_vec_us']
+        row['top2_speedup'] = row['top2_loop_us'] / row['top2_vec_us']
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DWTS 模型组件")
+    parser.add_argument("--verify", action="store_true",
+                        help="整批版 top2_loss / hit_rate_at_k 与逐组循环版本对比，有任何不一致时以退出码 1 结束")
+    parser.add_argument("--benchmark", action="store_true", help="batch size 1–256 下两种实现的耗时对比")
+    parser.add_argument("--trials", type=int, default=500, help="--verify 的随机批次数")
+    args = parser.parse_args()
+
+    status = 0
+    if args.verify:
+        mismatches = verify_vectorized(args.trials)
+        for name, n in mismatches.items():
+            print(f"  {name}: {'一致' if n == 0 else f'{n} 处不一致'}")
+        status = int(any(mismatches.values()))
+    if args.benchmark:
+        print(benchmark_vectorized().to_string(index=False, float_format=lambda x: f'{x:.1f}'))
+    raise SystemExit(status)
@@ -1,21 +1,42 @@
 import argparse
 import json
+import os
 import random
+import sqlite3
+import tempfile
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager, nullcontext
 from pathlib import Path
 from urllib.parse import urlparse
 
+import numpy as np
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 import re
 from pytrends.request import TrendReq
 
+from http_utils import (
+    AimdLimiter, HostConcurrencyLimiter, cached_get, get_http_cache, make_session, set_http_cache, set_url_rewrite,
+)
+from name_index import dedupe_names
+
 # 请求头，避免被服务屏蔽
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (MCM_Research_Bot; mailto:your_email@example.com)"
 }
 RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# 并发抓取社交媒体数据时各域名同时在途的请求上限（未列出的域名用 SOCIAL_DEFAULT_CONCURRENCY）
+SOCIAL_DOMAIN_CONCURRENCY = {
+    "en.wikipedia.org": 4,
+    "www.wikidata.org": 4,
+    "www.instagram.com": 1,
+    "cdn.syndication.twimg.com": 1,
+    "www.tiktok.com": 1,
+    "www.youtube.com": 2,
+}
+SOCIAL_DEFAULT_CONCURRENCY = 2
 
 # 1. 完整明星名单整理 (去重处理)
 raw_list = [
@@ -94,26 +115,35 @@ def load_all_stars(data_path: Path):
         try:
             df = pd.read_csv(data_path)
             names = df.get("celebrity_name", pd.Series(dtype=str)).dropna().astype(str)
-            unique_names = sorted(set(name.strip() for name in names if name.strip()))
+            # 按标准化名字去重，同一明星的不同写法只抓一次
+            unique_names = dedupe_names(name.strip() for name in names if name.strip())
             if unique_names:
                 return unique_names
         except Exception as exc:
             print(f"读取 {data_path} 失败，使用默认名单：{exc}")
     else:
         print(f"未找到 {data_path}，使用默认名单。")
-    return sorted(list(set(raw_list)))
+    return dedupe_names(raw_list)
 
 
 REPO_ROOT = Path(__file__).resolve().parent
 DATA_PATH = REPO_ROOT / "2026_MCM_Problem_C_Data.csv"
 ALL_STARS = load_all_stars(DATA_PATH)
 
+TRENDS_AMBIGUOUS_NAMES = ["Mario", "The Situation", "Prince", "Romeo"]
+TRENDS_BATCH_SIZE = 5  # Google Trends 限制一次 5 个关键词
+
+
+def _trends_search_term(name):
+    return f"{name} DWTS" if name in TRENDS_AMBIGUOUS_NAMES else name
+
+
 def fetch_all_trends(star_list, output_file="dwts_historical_trends.csv"):
     """
     抓取 2004 至今的所有热度数据，通过 Long-term 趋势定位明星的 Popularity
     """
     pytrends = TrendReq(hl='en-US', tz=360)
-    all_data = pd.DataFrame()
+    frames = []  # 最后一次性拼接，避免逐批 concat 的二次方拷贝
     
     # Google Trends 限制一次 5 个关键词
     batch_size = 5
@@ -123,12 +153,7 @@ def fetch_all_trends(star_list, output_file="dwts_historical_trends.csv"):
         print(f"正在处理第 {i//batch_size + 1} 组: {batch}")
         
         # 针对潜在歧义词的处理
-        search_terms = []
-        for name in batch:
-            if name in ["Mario", "The Situation", "Prince", "Romeo"]:
-                search_terms.append(f"{name} DWTS")
-            else:
-                search_terms.append(name)
+        search_terms = [_trends_search_term(name) for name in batch]
         
         try:
             # 采用 'all' 时间范围 (2004-present) 以确保覆盖所有赛季
@@ -140,7 +165,7 @@ def fetch_all_trends(star_list, output_file="dwts_historical_trends.csv"):
                 # 转为长表格式
                 df_reset = df.reset_index()
                 melted = df_reset.melt(id_vars='date', var_name='celebrity_name', value_name='search_index')
-                all_data = pd.concat([all_data, melted])
+                frames.append(melted)
                 
             # 随机休眠防止封禁 (很重要！)
             wait = random.uniform(10, 20)
@@ -152,21 +177,252 @@ def fetch_all_trends(star_list, output_file="dwts_historical_trends.csv"):
             continue
             
     # 保存结果
+    all_data = pd.concat(frames) if frames else pd.DataFrame()
     all_data.to_csv(output_file, index=False)
     print(f"✅ 完成！数据已保存至 {output_file}")
 
 
-def _request_with_retry(url, params=None, headers=None, retries=3, timeout=20):
+class TrendsStore:
+    """
+    Google Trends 抓取的断点续跑存储（一个目录）：
+    - rows.csv：每批的长表行（date, celebrity_name, search_index, batch）逐批追加并落盘；
+    - batches.jsonl：每批行写完后追加一条完成记录（批次号、姓名、关键词、行数、模式）。
+    行已写入但记录未写入（中途崩溃）的批次不算完成，续跑时会重抓；
+    导出时同一 (celebrity_name, date) 只保留最后写入的一行，因此重复追加无害。
+    """
+
+    ROW_COLUMNS = ["date", "celebrity_name", "search_index", "batch"]
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.rows_path = self.store_dir / "rows.csv"
+        self.log_path = self.store_dir / "batches.jsonl"
+
+    def completed(self):
+        if not self.log_path.exists():
+            return []
+        records = []
+        for line in self.log_path.read_text(encoding="utf-8").splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # 崩溃时写了一半的记录
+        return records
+
+    def done_names(self):
+        return {name for rec in self.completed() if rec.get("mode") == "full" for name in rec["names"]}
+
+    def next_batch_id(self):
+        return max((rec["batch"] for rec in self.completed()), default=-1) + 1
+
+    @staticmethod
+    def _append_durably(path, text):
+        with open(path, "a+b") as fh:
+            # 上次崩溃可能留下不完整的最后一行，先截断到最后一个换行符
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            if size:
+                fh.seek(max(0, size - 65536))
+                tail = fh.read()
+                if not tail.endswith(b"\n"):
+                    fh.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+            fh.write(text.encode("utf-8"))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def append_batch(self, batch_id, names, terms, rows, mode="full", anchor=None):
+        """追加一批长表行（date, celebrity_name, search_index）并记录该批完成。"""
+        rows = rows.assign(batch=batch_id)[self.ROW_COLUMNS]
+        header = not self.rows_path.exists() or self.rows_path.stat().st_size == 0
+        self._append_durably(self.rows_path, rows.to_csv(index=False, header=header))
+        record = {
+            "batch": batch_id,
+            "mode": mode,
+            "names": list(names),
+            "terms": list(terms),
+            "rows": len(rows),
+            "anchor": anchor,
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._append_durably(self.log_path, json.dumps(record, ensure_ascii=False) + "\n")
+
+    def read_rows(self):
+        """按写入顺序读出全部原始行（含锚点词与重复行）。"""
+        if not self.rows_path.exists():
+            return pd.DataFrame(columns=self.ROW_COLUMNS)
+        return pd.read_csv(self.rows_path, dtype={"date": str, "celebrity_name": str})
+
+    def anchors(self):
+        return {rec["anchor"] for rec in self.completed() if rec.get("anchor")}
+
+    def load_rows(self, terms=None, rows=None):
+        """
+        读出全部行（不含锚点词），同一 (celebrity_name, date) 保留最后一次写入。
+        按 terms 中的关键词顺序（其余关键词按首次出现顺序排在后面）与日期排序。
+        """
+        rows = self.read_rows() if rows is None else rows
+        rows = rows[~rows["celebrity_name"].isin(self.anchors())]
+        rows = rows.drop_duplicates(["celebrity_name", "date"], keep="last")
+        first_seen = rows.groupby("celebrity_name", sort=False).ngroup()
+        rank = {term: i for i, term in enumerate(dict.fromkeys(terms or []))}
+        order = rows["celebrity_name"].map(rank).fillna(len(rank) + first_seen)
+        return (
+            rows.assign(_order=order)
+            .sort_values(["_order", "date"], kind="mergesort")
+            .drop(columns="_order")
+            .reset_index(drop=True)
+        )
+
+    def last_dates(self):
+        rows = self.load_rows()
+        return rows.groupby("celebrity_name")["date"].max().to_dict()
+
+    def export(self, output_file, terms=None):
+        rows = self.load_rows(terms)
+        rows[["date", "celebrity_name", "search_index"]].to_csv(output_file, index=False)
+        return rows
+
+
+def fetch_all_trends_checkpointed(
+    star_list,
+    output_file="dwts_historical_trends.csv",
+    store_dir="dwts_trends_store",
+    refresh=False,
+    sleep_range=(10, 20),
+    anchor=None,
+):
+    """
+    可断点续跑的 Google Trends 抓取：每批结果立即追加进 TrendsStore 并记录完成，
+    重启后只抓尚未完成的明星；结束时导出与 fetch_all_trends 相同格式的 output_file。
+    refresh=True 时按已完成的批次原样重查，只追加每个关键词上次最后日期及之后的行
+    （最后一个月可能是不完整数据，会被新值覆盖）。注意重查结果按新的载荷重新缩放到 0-100。
+    出错时按 5、10、20…秒（最长 60 秒）退避，失败的批次留待下次续跑。
+    anchor 为固定锚点词时每批只放 4 位明星外加锚点，供 normalize_trends_store 做跨批归一化。
+    """
+    store = TrendsStore(store_dir)
+    if refresh:
+        since = store.last_dates()
+        plan = [
+            (rec["names"], rec["terms"], rec.get("anchor"))
+            for rec in store.completed() if rec.get("mode") == "full"
+        ]
+    else:
+        since = {}
+        done = store.done_names()
+        missing = [name for name in star_list if name not in done]
+        print(f"已完成 {len(star_list) - len(missing)} 位明星，剩余 {len(missing)} 位待抓取")
+        size = TRENDS_BATCH_SIZE - 1 if anchor else TRENDS_BATCH_SIZE
+        plan = [
+            (batch, [_trends_search_term(name) for name in batch] + ([anchor] if anchor else []), anchor)
+            for batch in (missing[i:i + size] for i in range(0, len(missing), size))
+        ]
+
+    pytrends = TrendReq(hl='en-US', tz=360) if plan else None
+    batch_id = store.next_batch_id()
+    failures = 0
+    for k, (names, terms, batch_anchor) in enumerate(plan, start=1):
+        print(f"正在处理第 {k}/{len(plan)} 组: {names}")
+        try:
+            pytrends.build_payload(terms, cat=0, timeframe='all', geo='US', gprop='')
+            df = pytrends.interest_over_time()
+        except Exception as e:
+            failures += 1
+            wait = min(60, 5 * 2 ** (failures - 1))
+            print(f"抓取 {names} 时发生错误: {e}，{wait} 秒后继续")
+            time.sleep(wait)
+            continue
+        failures = 0
+
+        if df.empty:
+            melted = pd.DataFrame(columns=["date", "celebrity_name", "search_index"])
+        else:
+            df = df.drop(columns=['isPartial'], errors='ignore')
+            melted = df.reset_index().melt(id_vars='date', var_name='celebrity_name', value_name='search_index')
+            melted["date"] = pd.to_datetime(melted["date"]).dt.strftime("%Y-%m-%d")
+            if refresh:
+                # 锚点词保留完整序列，归一化时才能与参考批次对齐
+                last = melted["celebrity_name"].map(since).fillna("").where(melted["celebrity_name"] != batch_anchor, "")
+                melted = melted[melted["date"] >= last]
+        store.append_batch(batch_id, names, terms, melted, mode="refresh" if refresh else "full", anchor=batch_anchor)
+        batch_id += 1
+        time.sleep(random.uniform(*sleep_range))
+
+    rows = store.export(output_file, terms=[_trends_search_term(name) for name in star_list])
+    print(f"✅ 完成！{rows['celebrity_name'].nunique()} 个关键词、{len(rows)} 行已保存至 {output_file}")
+
+
+def solve_anchor_scales(anchor_rows):
+    """
+    由每批锚点词的序列求各批缩放系数（向量化最小二乘）。
+    anchor_rows 含 batch, date, search_index；以锚点总量最大（量化误差最小）的批次为参考，
+    对每批 b 求 s_b = argmin Σ_t (s_b·a_b(t) − a_ref(t))²，即 Σ a_b·a_ref / Σ a_b²。
+    锚点全为 0 的批次无法定标，系数为 NaN。
+    """
+    mat = anchor_rows.pivot_table(index="batch", columns="date", values="search_index", aggfunc="last")
+    values = mat.to_numpy(dtype=float)
+    totals = np.nansum(values, axis=1)
+    ref = values[int(np.argmax(totals))]
+    both = ~np.isnan(values) & ~np.isnan(ref)
+    num = np.where(both, values * ref, 0.0).sum(axis=1)
+    den = np.where(both, values * values, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.where(den > 0, num / den, np.nan)
+    return pd.DataFrame({
+        "batch": mat.index,
+        "scale": scale,
+        "anchor_total": totals,
+        "anchor_max": np.nanmax(np.where(np.isnan(values), -np.inf, values), axis=1),
+        "n_points": both.sum(axis=1),
+        "reference": mat.index == mat.index[int(np.argmax(totals))],
+    })
+
+
+def normalize_trends_store(store_dir, output_file="dwts_historical_trends_normalized.csv", star_list=None):
+    """
+    离线跨批归一化：读取 TrendsStore 中已录制的各批结果，按锚点词求出各批缩放系数
+    （写入 store_dir/scale_factors.csv），输出 date, celebrity_name, search_index（原值）,
+    search_index_norm（统一到参考批次锚点尺度后的值）。不发起任何 Trends 请求。
+    """
+    store = TrendsStore(store_dir)
+    anchors = store.anchors()
+    if len(anchors) != 1:
+        raise ValueError(f"需要所有批次使用同一个锚点词，实际为: {sorted(anchors)}")
+    anchor = anchors.pop()
+    rows = store.read_rows()
+    anchored = {rec["batch"] for rec in store.completed() if rec.get("anchor") == anchor}
+    rows = rows[rows["batch"].isin(anchored)]
+
+    factors = solve_anchor_scales(rows[rows["celebrity_name"] == anchor])
+    factors.to_csv(store.store_dir / "scale_factors.csv", index=False)
+    rows = rows.merge(factors[["batch", "scale"]], on="batch", how="left")
+    rows["search_index_norm"] = rows["search_index"] * rows["scale"]
+
+    terms = [_trends_search_term(name) for name in star_list] if star_list else None
+    out = store.load_rows(terms, rows=rows)
+    out[["date", "celebrity_name", "search_index", "search_index_norm"]].to_csv(output_file, index=False)
+    n_bad = int(factors["scale"].isna().sum())
+    print(f"✅ 锚点 {anchor!r}：{len(factors)} 批，系数范围 "
+          f"{factors['scale'].min():.3f}–{factors['scale'].max():.3f}，已保存至 {output_file}")
+    if n_bad:
+        print(f"⚠️ {n_bad} 批锚点全为 0，无法定标（search_index_norm 为空）")
+    return out, factors
+
+
+def _request_with_retry(url, params=None, headers=None, retries=3, timeout=20, session=None, limiter=None):
     headers = headers or DEFAULT_HEADERS
     response = None
     for attempt in range(retries):
-        try:
-            response = requests.get(url, params=params, headers=headers, timeout=timeout)
-        except requests.RequestException:
-            response = None
-        if response and response.status_code == 200:
-            return response
-        if response and response.status_code not in RETRY_STATUS_CODES:
+        # 只在请求期间占用并发名额，退避等待时释放；自适应限速器（AimdLimiter）通过 ticket 得知每次的状态码
+        with limiter.slot(url) if limiter is not None else nullcontext() as ticket:
+            try:
+                response = cached_get(url, params=params, headers=headers, timeout=timeout, session=session)
+            except requests.RequestException:
+                response = None
+            if ticket is not None:
+                ticket.status = response.status_code if response is not None else None
+        # Response 的真值对 4xx 为 False，必须与 None 比较，否则 404 也会被重试
+        if response is not None and response.status_code not in RETRY_STATUS_CODES:
             return response
         time.sleep(2 ** attempt)
     return response
@@ -204,14 +460,14 @@ def _extract_handle(url):
     return path.split("/")[0].lstrip("@")
 
 
-def _find_wikipedia_title(name):
+def _find_wikipedia_title(name, session=None, limiter=None):
     params = {
         "action": "query",
         "list": "search",
         "srsearch": name,
         "format": "json",
     }
-    response = _request_with_retry("https://en.wikipedia.org/w/api.php", params=params)
+    response = _request_with_retry("https://en.wikipedia.org/w/api.php", params=params, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return ""
     try:
@@ -224,14 +480,14 @@ def _find_wikipedia_title(name):
     return results[0].get("title", "")
 
 
-def _fetch_wikipedia_html(title):
+def _fetch_wikipedia_html(title, session=None, limiter=None):
     params = {
         "action": "parse",
         "page": title,
         "prop": "text",
         "format": "json",
     }
-    response = _request_with_retry("https://en.wikipedia.org/w/api.php", params=params)
+    response = _request_with_retry("https://en.wikipedia.org/w/api.php", params=params, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return ""
     try:
@@ -241,14 +497,14 @@ def _fetch_wikipedia_html(title):
     return data.get("parse", {}).get("text", {}).get("*", "")
 
 
-def _fetch_wikidata_id(title):
+def _fetch_wikidata_id(title, session=None, limiter=None):
     params = {
         "action": "query",
         "prop": "pageprops",
         "titles": title,
         "format": "json",
     }
-    response = _request_with_retry("https://en.wikipedia.org/w/api.php", params=params)
+    response = _request_with_retry("https://en.wikipedia.org/w/api.php", params=params, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return ""
     try:
@@ -261,11 +517,11 @@ def _fetch_wikidata_id(title):
     return ""
 
 
-def _fetch_wikidata_social_links(wikidata_id):
+def _fetch_wikidata_social_links(wikidata_id, session=None, limiter=None):
     if not wikidata_id:
         return {}
     url = "https://www.wikidata.org/wiki/Special:EntityData/{}.json".format(wikidata_id)
-    response = _request_with_retry(url)
+    response = _request_with_retry(url, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return {}
     try:
@@ -273,7 +529,11 @@ def _fetch_wikidata_social_links(wikidata_id):
     except ValueError:
         return {}
     entity = data.get("entities", {}).get(wikidata_id, {})
-    claims = entity.get("claims", {})
+    return _social_links_from_claims(entity.get("claims", {}))
+
+
+def _social_links_from_claims(claims):
+    """由维基数据实体的 claims 生成社交媒体链接字典。"""
 
     def _get_claim_value(pid):
         claim_list = claims.get(pid, [])
@@ -301,6 +561,114 @@ def _fetch_wikidata_social_links(wikidata_id):
         links["facebook"] = f"https://www.facebook.com/{facebook_id}"
     return links
 
+
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+API_BATCH_SIZE = 50  # titles= 与 wbgetentities ids= 单次上限
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _query_pageprops_batch(titles):
+    """
+    批量查询页面属性（titles=A|B|...，跟随重定向）。
+    返回 {查询标题: (页面标题, wikibase_item, 是否消歧义页)}，不存在的页面不在结果中。
+    """
+    resolved = {}
+    for batch in _chunks(list(dict.fromkeys(titles)), API_BATCH_SIZE):
+        params = {
+            "action": "query",
+            "prop": "pageprops",
+            "titles": "|".join(batch),
+            "redirects": 1,
+            "format": "json",
+        }
+        response = _request_with_retry(WIKIPEDIA_API, params=params)
+        if not response or response.status_code != 200:
+            continue
+        try:
+            query = response.json().get("query", {})
+        except ValueError:
+            continue
+        alias = {}
+        for item in query.get("normalized", []) + query.get("redirects", []):
+            alias[item["from"]] = item["to"]
+        pages = {
+            page.get("title"): page
+            for page in query.get("pages", {}).values()
+            if "missing" not in page and "invalid" not in page
+        }
+        for title in batch:
+            target, seen = title, set()
+            while target in alias and target not in seen:
+                seen.add(target)
+                target = alias[target]
+            page = pages.get(target)
+            if page is not None:
+                props = page.get("pageprops", {})
+                resolved[title] = (page["title"], props.get("wikibase_item", ""), "disambiguation" in props)
+    return resolved
+
+
+def _fetch_wikidata_claims_batch(wikidata_ids):
+    """wbgetentities 每次最多 50 个实体，返回 {实体 ID: claims}。"""
+    claims = {}
+    for batch in _chunks(list(dict.fromkeys(wikidata_ids)), API_BATCH_SIZE):
+        params = {
+            "action": "wbgetentities",
+            "ids": "|".join(batch),
+            "props": "claims",
+            "format": "json",
+        }
+        response = _request_with_retry(WIKIDATA_API, params=params)
+        if not response or response.status_code != 200:
+            continue
+        try:
+            entities = response.json().get("entities", {})
+        except ValueError:
+            continue
+        for wikidata_id, entity in entities.items():
+            claims[wikidata_id] = entity.get("claims", {})
+    return claims
+
+
+def resolve_social_metadata(star_list):
+    """
+    批量解析整份名单的维基百科标题、维基数据 ID 与社交账号链接（P2003/P2002/P7085/P2397/P2013）。
+    先按姓名直接批量查询页面（titles=A|B|...）；查不到或落在消歧义页的姓名
+    再逐个走搜索 API（搜索无法批量），其标题再批量补查 wikibase_item；
+    最后用 wbgetentities 批量取 claims。
+    返回 {姓名: {"wikipedia_title", "wikidata_id", "links"}}，links 与 _fetch_wikidata_social_links 相同。
+    """
+    direct = _query_pageprops_batch(star_list)
+    titles, wikidata_ids, searched = {}, {}, []
+    for name in star_list:
+        hit = direct.get(name)
+        if hit and not hit[2]:
+            titles[name], wikidata_ids[name] = hit[0], hit[1]
+        else:
+            searched.append(name)
+    for name in searched:
+        titles[name] = _find_wikipedia_title(name)
+    searched_props = _query_pageprops_batch([titles[name] for name in searched if titles[name]])
+    for name in searched:
+        wikidata_ids[name] = searched_props.get(titles[name], ("", "", False))[1] if titles[name] else ""
+
+    claims = _fetch_wikidata_claims_batch([qid for qid in wikidata_ids.values() if qid])
+    return {
+        name: {
+            "wikipedia_title": titles[name],
+            "wikidata_id": wikidata_ids[name],
+            "links": _social_links_from_claims(claims[wikidata_ids[name]])
+            if wikidata_ids[name] in claims else {},
+        }
+        for name in star_list
+    }
+
+
 def _match_domain(url, domain):
     parsed = urlparse(url)
     host = parsed.netloc.lower()
@@ -330,13 +698,13 @@ def _extract_social_links(html):
     return links
 
 
-def _fetch_instagram_followers(handle):
+def _fetch_instagram_followers(handle, session=None, limiter=None):
     if not handle:
         return None
     url = f"https://www.instagram.com/{handle}/?__a=1&__d=dis"
-    response = _request_with_retry(url)
+    response = _request_with_retry(url, session=session, limiter=limiter)
     if not response or response.status_code != 200:
-        return _fetch_instagram_followers_fallback(handle)
+        return _fetch_instagram_followers_fallback(handle, session=session, limiter=limiter)
     try:
         data = response.json()
     except ValueError:
@@ -350,11 +718,11 @@ def _fetch_instagram_followers(handle):
     return _parse_abbrev_number(count)
 
 
-def _fetch_instagram_followers_fallback(handle):
+def _fetch_instagram_followers_fallback(handle, session=None, limiter=None):
     if not handle:
         return None
     url = f"https://www.instagram.com/{handle}/"
-    response = _request_with_retry(url)
+    response = _request_with_retry(url, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return None
     match = re.search(r'"edge_followed_by":\{"count":(\d+)\}', response.text)
@@ -362,11 +730,11 @@ def _fetch_instagram_followers_fallback(handle):
         return None
     return _parse_abbrev_number(match.group(1))
 
-def _fetch_twitter_followers(handle):
+def _fetch_twitter_followers(handle, session=None, limiter=None):
     if not handle:
         return None
     url = "https://cdn.syndication.twimg.com/widgets/followbutton/info.json"
-    response = _request_with_retry(url, params={"screen_names": handle})
+    response = _request_with_retry(url, params={"screen_names": handle}, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return None
     data = response.json()
@@ -375,11 +743,11 @@ def _fetch_twitter_followers(handle):
     return _parse_abbrev_number(data[0].get("followers_count"))
 
 
-def _fetch_tiktok_followers(handle):
+def _fetch_tiktok_followers(handle, session=None, limiter=None):
     if not handle:
         return None
     url = f"https://www.tiktok.com/@{handle}"
-    response = _request_with_retry(url)
+    response = _request_with_retry(url, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return None
     match = re.search(r'"followerCount":(\d+)', response.text)
@@ -388,10 +756,10 @@ def _fetch_tiktok_followers(handle):
     return _parse_abbrev_number(match.group(1))
 
 
-def _fetch_youtube_followers(url):
+def _fetch_youtube_followers(url, session=None, limiter=None):
     if not url:
         return None
-    response = _request_with_retry(url)
+    response = _request_with_retry(url, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return None
     match = re.search(
@@ -411,7 +779,66 @@ def _parse_dance_style(raw_text):
     return split_match[0].strip()
 
 
-def fetch_social_followers(star_list, output_file="dwts_social_followers.csv"):
+def _submit(pool, func, *args, **kwargs):
+    """pool 为 None 时就地执行；两种情况都返回 Future，异常在 result() 时抛出。"""
+    if pool is not None:
+        return pool.submit(func, *args, **kwargs)
+    future = Future()
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def _fetch_wikidata_links_for_title(title, session=None, limiter=None):
+    wikidata_id = _fetch_wikidata_id(title, session=session, limiter=limiter)
+    return _fetch_wikidata_social_links(wikidata_id, session=session, limiter=limiter)
+
+
+def _collect_social_row(name, pool=None, resolved=None, session=None, limiter=None):
+    """
+    抓取单个明星的一行社交媒体数据。
+    给定线程池时，维基百科正文与维基数据两条链路并行，四个平台的粉丝量也并行抓取。
+    resolved 为 resolve_social_metadata 的结果时跳过标题搜索与维基数据请求。
+    session / limiter 原样传给每个请求（并发模式下由调用方创建并负责关闭）。
+    """
+    http = {"session": session, "limiter": limiter}
+    title = resolved["wikipedia_title"] if resolved is not None else _find_wikipedia_title(name, **http)
+    if not title:
+        return {"celebrity_name": name}
+    html_future = _submit(pool, _fetch_wikipedia_html, title, **http)
+    if resolved is None:
+        wikidata_future = _submit(pool, _fetch_wikidata_links_for_title, title, **http)
+    links = _extract_social_links(html_future.result())
+    wikidata_links = resolved["links"] if resolved is not None else wikidata_future.result()
+    for key, value in wikidata_links.items():
+        links.setdefault(key, value)
+    instagram_handle = _extract_handle(links.get("instagram", ""))
+    twitter_handle = _extract_handle(links.get("twitter", ""))
+    tiktok_handle = _extract_handle(links.get("tiktok", ""))
+    youtube_url = links.get("youtube", "")
+
+    followers = {
+        "instagram_followers": _submit(pool, _fetch_instagram_followers, instagram_handle, **http),
+        "twitter_followers": _submit(pool, _fetch_twitter_followers, twitter_handle, **http),
+        "tiktok_followers": _submit(pool, _fetch_tiktok_followers, tiktok_handle, **http),
+        "youtube_subscribers": _submit(pool, _fetch_youtube_followers, youtube_url, **http),
+    }
+    return {
+        "celebrity_name": name,
+        "wikipedia_title": title,
+        "instagram_handle": instagram_handle,
+        "twitter_handle": twitter_handle,
+        "tiktok_handle": tiktok_handle,
+        "youtube_url": youtube_url,
+        **{key: future.result() for key, future in followers.items()},
+        "facebook_url": links.get("facebook", ""),
+    }
+
+
+def fetch_social_followers(star_list, output_file="dwts_social_followers.csv", workers=1, domain_concurrency=None,
+                           batched=False):
     """
     抓取维基百科/维基数据中的社交媒体账号，并提取粉丝量。
     输出字段包含：
@@ -419,48 +846,58 @@ def fetch_social_followers(star_list, output_file="dwts_social_followers.csv"):
     - instagram_handle, twitter_handle, tiktok_handle, youtube_url, facebook_url
     - instagram_followers, twitter_followers, tiktok_followers, youtube_subscribers
     注意：社交媒体粉丝量为公开页面抓取结果，接口可能限制或失效，返回空值不代表为零。
+    workers > 1 时多个明星并行流水线抓取，以按域名的并发上限代替全局随机休眠；
+    输出行顺序与 star_list 一致。batched=True 时先用 resolve_social_metadata 批量解析标题与账号。
     """
-    results = []
-    for name in star_list:
-        print(f"正在抓取 {name} 的社交媒体粉丝量...")
-        try:
-            title = _find_wikipedia_title(name)
-            if not title:
+    resolved = None
+    if batched:
+        print(f"批量解析 {len(star_list)} 位明星的维基百科 / 维基数据元数据...")
+        resolved = resolve_social_metadata(star_list)
+    if workers <= 1:
+        results = []
+        for name in star_list:
+            print(f"正在抓取 {name} 的社交媒体粉丝量...")
+            try:
+                results.append(_collect_social_row(name, resolved=resolved[name] if resolved else None))
+            except Exception as exc:
+                print(f"抓取 {name} 时发生错误: {exc}")
                 results.append({"celebrity_name": name})
-                continue
-            html = _fetch_wikipedia_html(title)
-            links = _extract_social_links(html)
-            wikidata_id = _fetch_wikidata_id(title)
-            wikidata_links = _fetch_wikidata_social_links(wikidata_id)
-            for key, value in wikidata_links.items():
-                links.setdefault(key, value)
-            instagram_handle = _extract_handle(links.get("instagram", ""))
-            twitter_handle = _extract_handle(links.get("twitter", ""))
-            tiktok_handle = _extract_handle(links.get("tiktok", ""))
-            youtube_url = links.get("youtube", "")
-
-            results.append({
-                "celebrity_name": name,
-                "wikipedia_title": title,
-                "instagram_handle": instagram_handle,
-                "twitter_handle": twitter_handle,
-                "tiktok_handle": tiktok_handle,
-                "youtube_url": youtube_url,
-                "instagram_followers": _fetch_instagram_followers(instagram_handle),
-                "twitter_followers": _fetch_twitter_followers(twitter_handle),
-                "tiktok_followers": _fetch_tiktok_followers(tiktok_handle),
-                "youtube_subscribers": _fetch_youtube_followers(youtube_url),
-                "facebook_url": links.get("facebook", ""),
-            })
-        except Exception as exc:
-            print(f"抓取 {name} 时发生错误: {exc}")
-            results.append({"celebrity_name": name})
-        time.sleep(random.uniform(1.5, 3.0))
+            time.sleep(random.uniform(1.5, 3.0))
+    else:
+        results = _fetch_social_followers_concurrently(star_list, workers, domain_concurrency, resolved)
 
     pd.DataFrame(results).to_csv(output_file, index=False)
     print(f"✅ 社交媒体粉丝量已保存至 {output_file}")
 
 
+def _fetch_social_followers_concurrently(star_list, workers, domain_concurrency=None, resolved=None):
+    limits = {**SOCIAL_DOMAIN_CONCURRENCY, **(domain_concurrency or {})}
+    limiter = HostConcurrencyLimiter(SOCIAL_DEFAULT_CONCURRENCY, per_host=limits)
+    session = make_session(pool_size=max(limits.values()) * 2, headers=DEFAULT_HEADERS)
+
+    def _one(name):
+        try:
+            return _collect_social_row(name, stage_pool, resolved[name] if resolved else None,
+                                       session=session, limiter=limiter)
+        except Exception as exc:
+            print(f"抓取 {name} 时发生错误: {exc}")
+            return {"celebrity_name": name}
+
+    # 两个线程池：明星级任务在 star_pool 中等待 stage_pool 里的子请求，避免同池嵌套等待造成死锁
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers * 4) as stage_pool, \
+                ThreadPoolExecutor(max_workers=workers) as star_pool:
+            results = []
+            for i, row in enumerate(star_pool.map(_one, star_list), start=1):
+                results.append(row)
+                if i % 20 == 0 or i == len(star_list):
+                    print(f"社交媒体粉丝量：{i}/{len(star_list)}，用时 {time.perf_counter() - started:.1f}s")
+    finally:
+        session.close()
+    return results
+
+
 def add_running_order_and_dance_style(
     order_file="dwts_weekly_details.csv",
     output_file="dwts_weekly_details_enriched.csv",
@@ -489,26 +926,37 @@ def _format_gdelt_datetime(dt_value):
     return dt_value.strftime("%Y%m%d%H%M%S")
 
 
-def fetch_negative_news_ratio(name, start_dt, end_dt, max_records=250):
+GDELT_DOC_API = "https://api.gdeltproject.org/api/v2/doc/doc"
+
+
+def _gdelt_params(name, start_dt, end_dt, max_records=250):
+    return {
+        "query": f'"{name}"',
+        "format": "json",
+        "mode": "ArtList",
+        "maxrecords": max_records,
+        "sort": "DateDesc",
+        "startdatetime": _format_gdelt_datetime(start_dt),
+        "enddatetime": _format_gdelt_datetime(end_dt),
+    }
+
+
+def fetch_negative_news_ratio(name, start_dt, end_dt, max_records=250, session=None, limiter=None):
     """
     使用 GDELT 2.1 获取指定时间段负面新闻占比，返回 tone < 0 的文章比例。
     """
     try:
-        params = {
-            "query": f'"{name}"',
-            "format": "json",
-            "mode": "ArtList",
-            "maxrecords": max_records,
-            "sort": "DateDesc",
-            "startdatetime": _format_gdelt_datetime(start_dt),
-            "enddatetime": _format_gdelt_datetime(end_dt),
-        }
+        params = _gdelt_params(name, start_dt, end_dt, max_records)
     except ValueError as exc:
         print(f"GDELT 时间格式错误：{exc}")
         return 0.0
-    response = _request_with_retry("https://api.gdeltproject.org/api/v2/doc/doc", params=params)
+    response = _request_with_retry(GDELT_DOC_API, params=params, session=session, limiter=limiter)
     if not response or response.status_code != 200:
         return 0.0
+    return _negative_ratio_from_response(response)
+
+
+def _negative_ratio_from_response(response):
     try:
         data = response.json()
     except ValueError:
@@ -532,20 +980,201 @@ def fetch_negative_news_ratio(name, start_dt, end_dt, max_records=250):
     return negative / total
 
 
-def adjust_heat_with_negative_news(
-    trends_path="dwts_historical_trends.csv",
-    output_file="dwts_historical_trends_adjusted.csv",
-    granularity="M",
-    cache_path="dwts_heat_cache.json",
-    max_pairs=None,
-    sleep_range=(1.0, 2.0),
-):
+HEAT_KEY_COLUMNS = ["celebrity_name", "period_key"]
+
+
+class HeatCache:
     """
-    结合 Google Trends 与 GDELT 负面新闻比例修正趋势热度。
-    search_index_adjusted = search_index * (1 - negative_news_ratio)
-    performance_heat = search_index * (1 - negative_news_ratio)
-    black_red_heat = search_index * negative_news_ratio
+    负面新闻比例缓存：cache_path 为压缩后的 JSON 快照（{"name||period": ratio}，与旧格式兼容），
+    新结果逐条追加到 <cache_path>.log（JSONL），每 compact_every 条把快照与日志合并重写一次。
+    读取时快照之上重放日志，日志末尾被截断的半行会被忽略。
+    """
+
+    def __init__(self, cache_path="dwts_heat_cache.json", compact_every=500):
+        self.path = Path(cache_path)
+        self.log_path = self.path.with_name(self.path.name + ".log")
+        self.compact_every = compact_every
+        self.entries = {}
+        self._pending = 0
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                self.entries = {}
+        if self.log_path.exists():
+            for line in self.log_path.read_text(encoding="utf-8").splitlines():
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                self.entries[self.key(rec["name"], rec["period"])] = rec["ratio"]
+                self._pending += 1
+
+    @staticmethod
+    def key(name, period_key):
+        return f"{name}||{period_key}"
+
+    def __contains__(self, pair):
+        return self.key(*pair) in self.entries
+
+    def put(self, name, period_key, ratio):
+        self.entries[self.key(name, period_key)] = ratio
+        with open(self.log_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps({"name": name, "period": period_key, "ratio": ratio}, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """把全部条目原子地写回快照并清空日志。"""
+        if not self._pending and self.path.exists():
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.log_path.unlink(missing_ok=True)
+        self._pending = 0
+
+    def flush(self):
+        """与 HeatStore.flush 相同的接口：日志已逐条落盘，这里把它合并进快照。"""
+        self.compact()
+
+    def close(self):
+        self.flush()
+
+    def table(self):
+        return heat_entries_table(self.entries)
+
+
+def heat_entries_table(entries):
+    """把 {"name||period": ratio} 转成 (celebrity_name, period_key, negative_news_ratio) 表。"""
+    keys = pd.Series(list(entries.keys()), dtype=object)
+    parts = keys.str.rsplit("||", n=1, expand=True) if len(keys) else pd.DataFrame(columns=[0, 1])
+    return pd.DataFrame({
+        "celebrity_name": parts[0].to_numpy(dtype=object),
+        "period_key": parts[1].to_numpy(dtype=object),
+        "negative_news_ratio": pd.to_numeric(pd.Series(list(entries.values()), dtype=object), errors="coerce"),
+    })
+
+
+class HeatStore:
+    """
+    基于 SQLite 的负面新闻比例缓存，可被同一台机器上的多个进程同时读写。
+    表 heat_cache(celebrity_name, period_key) 为主键，记录 ratio 与抓取时间 fetched_at（Unix 秒）；
+    WAL 模式下读者不阻塞写者，写入攒满 batch_size 条后在一个 BEGIN IMMEDIATE 事务中批量 upsert，
+    多个写进程靠 SQLite 文件锁串行提交（busy timeout 60 秒）。
+    ttl_days 不为空时，早于该期限抓取的条目视为过期，会被重新抓取并覆盖。
+    首次创建且同目录存在旧的 JSON 缓存（同名 .json 及其 .log）时自动导入。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS heat_cache (
+            celebrity_name TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            ratio REAL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (celebrity_name, period_key)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, db_path="dwts_heat_cache.sqlite", ttl_days=None, batch_size=50):
+        self.path = Path(db_path)
+        self.ttl = ttl_days * 86400 if ttl_days is not None else None
+        self.batch_size = batch_size
+        self._buffer = []
+        self._fresh = set()
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(self.SCHEMA)
+        legacy = self.path.with_suffix(".json")
+        if legacy.exists() and not self.conn.execute("SELECT 1 FROM heat_cache LIMIT 1").fetchone():
+            self.import_json(legacy)
+        self._fresh = self._fresh_keys()
+
+    def _fresh_keys(self):
+        sql, params = "SELECT celebrity_name, period_key FROM heat_cache", ()
+        if self.ttl is not None:
+            sql, params = sql + " WHERE fetched_at >= ?", (time.time() - self.ttl,)
+        return set(self.conn.execute(sql, params).fetchall())
+
+    def __contains__(self, pair):
+        return tuple(pair) in self._fresh
+
+    def put(self, name, period_key, ratio):
+        self._buffer.append((name, period_key, ratio, time.time()))
+        self._fresh.add((name, period_key))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def put_many(self, rows):
+        """rows 为 (celebrity_name, period_key, ratio[, fetched_at]) 序列，在一个事务中写入。"""
+        now = time.time()
+        rows = [tuple(r) if len(r) == 4 else (*r, now) for r in rows]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO heat_cache (celebrity_name, period_key, ratio, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (celebrity_name, period_key) DO UPDATE SET "
+                "ratio = excluded.ratio, fetched_at = excluded.fetched_at",
+                rows,
+            )
+        self._fresh.update((r[0], r[1]) for r in rows)
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def flush(self):
+        """把缓冲中尚未提交的写入在一个事务中提交。"""
+        if self._buffer:
+            rows, self._buffer = self._buffer, []
+            self.put_many(rows)
+
+    def import_json(self, json_path):
+        """导入旧的 JSON 快照（及其追加日志），抓取时间记为文件修改时间。"""
+        legacy = HeatCache(json_path, compact_every=float("inf"))
+        fetched_at = Path(json_path).stat().st_mtime
+        self.put_many(
+            (*key.rsplit("||", 1), ratio, fetched_at) for key, ratio in legacy.entries.items()
+        )
+        print(f"📥 已从 {json_path} 导入 {len(legacy.entries)} 条负面新闻缓存")
+
+    def table(self):
+        """
+        批量导出为 (celebrity_name, period_key, negative_news_ratio, fetched_at) DataFrame。
+        过期条目同样导出（未重抓时旧值仍优于缺失），需要时可按 fetched_at 过滤。
+        """
+        table = pd.read_sql_query(
+            "SELECT celebrity_name, period_key, ratio AS negative_news_ratio, fetched_at FROM heat_cache", self.conn,
+        )
+        table["fetched_at"] = pd.to_datetime(table["fetched_at"], unit="s")
+        return table
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def open_heat_cache(cache_path, ttl_days=None):
     """
+    按扩展名选择缓存：.json 为单进程的 HeatCache，其余（.sqlite/.db）为可多进程共享的 HeatStore。
+    两者都提供 put / flush / table / close，用完需 close()（或 with contextlib.closing(...)）。
+    """
+    if Path(cache_path).suffix == ".json":
+        if ttl_days is not None:
+            raise ValueError("JSON 缓存不记录抓取时间，TTL 需要使用 SQLite 缓存")
+        return HeatCache(cache_path)
+    return HeatStore(cache_path, ttl_days=ttl_days)
+
+
+def load_trends_for_heat(trends_path, granularity="M"):
+    """读取趋势长表并附加 period_key（先对去重后的日期求周期，再映射回各行）。"""
     df = pd.read_csv(trends_path)
     required_columns = {"date", "search_index", "celebrity_name"}
     missing = required_columns - set(df.columns)
@@ -555,73 +1184,245 @@ def adjust_heat_with_negative_news(
     df = df.dropna(subset=["date"])
     df["search_index"] = pd.to_numeric(df["search_index"], errors="coerce")
     df = df.dropna(subset=["search_index"])
-    df["period_key"] = df["date"].dt.to_period(granularity).astype(str)
+    codes, dates = pd.factorize(df["date"])
+    periods = pd.DatetimeIndex(dates).to_period(granularity).astype(str)
+    df["period_key"] = np.asarray(periods, dtype=object)[codes]
+    return df
 
-    cache_file = Path(cache_path)
-    cache = {}
-    if cache_file.exists():
-        try:
-            cache = json.loads(cache_file.read_text(encoding="utf-8"))
-        except Exception:
-            cache = {}
 
-    def _cache_key(name, period_key):
-        return f"{name}||{period_key}"
+def join_negative_news(df, cache_table):
+    """按 (celebrity_name, period_key) 左连接缓存表，得到 negative_news_ratio 列（保持行序）。"""
+    table = cache_table.drop_duplicates(HEAT_KEY_COLUMNS, keep="last")
+    ratio = df[HEAT_KEY_COLUMNS].merge(table, on=HEAT_KEY_COLUMNS, how="left")["negative_news_ratio"]
+    return df.assign(negative_news_ratio=ratio.to_numpy())
 
-    unique_pairs = (
-        df[["celebrity_name", "period_key"]]
-        .drop_duplicates()
-        .itertuples(index=False, name=None)
-    )
-    processed = 0
-    interrupted = False
-    for name, period_key in unique_pairs:
-        key = _cache_key(name, period_key)
-        if key in cache:
-            continue
-        if max_pairs is not None and processed >= max_pairs:
-            break
-        period_start = pd.Period(period_key).start_time
-        period_end = pd.Period(period_key).end_time
-        try:
-            cache[key] = fetch_negative_news_ratio(name, period_start, period_end)
-        except KeyboardInterrupt:
-            interrupted = True
-            break
-        processed += 1
-        cache_file.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
-        time.sleep(random.uniform(*sleep_range))
 
-    cache_file.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
-    df["negative_news_ratio"] = pd.to_numeric(
-        df.apply(
-            lambda row: cache.get(_cache_key(row["celebrity_name"], row["period_key"])),
-            axis=1,
-        ),
+def _join_negative_news_legacy(df, cache):
+    """旧实现：逐行拼接字符串键查字典，仅供 benchmark_heat_join 对照。"""
+    return df.assign(negative_news_ratio=pd.to_numeric(
+        df.apply(lambda row: cache.get(HeatCache.key(row["celebrity_name"], row["period_key"])), axis=1),
         errors="coerce",
-    )
+    ))
+
+
+def split_heat(df):
+    """由 negative_news_ratio 拆分表现热度与黑红热度，缺失比例按 0 处理。"""
     df["negative_news_ratio"] = df["negative_news_ratio"].fillna(0)
-    missing_ratios = df["negative_news_ratio"].isna().sum()
-    if missing_ratios:
-        print(f"⚠️ 仍有 {missing_ratios} 条记录缺少负面新闻比例，可继续运行补全。")
     df["search_index_raw"] = df["search_index"]
     df["search_index"] = df["search_index_raw"] * (1 - df["negative_news_ratio"])
     df["performance_heat"] = df["search_index_raw"] * (1 - df["negative_news_ratio"])
     df["black_red_heat"] = df["search_index_raw"] * df["negative_news_ratio"]
-    df.to_csv(output_file, index=False)
+    return df
+
+
+def _fetch_pair_ratio(name, period_key, limiter, session=None, retries=3):
+    """抓取单个 (明星, 周期) 的负面新闻比例；仍被限流或连接失败时返回 None（不写缓存，留待重试）。"""
+    period = pd.Period(period_key)
+    try:
+        params = _gdelt_params(name, period.start_time, period.end_time)
+    except ValueError as exc:
+        print(f"GDELT 时间格式错误：{exc}")
+        return 0.0
+    response = _request_with_retry(GDELT_DOC_API, params=params, retries=retries,
+                                  session=session, limiter=limiter)
+    if response is None or response.status_code in AimdLimiter.THROTTLE_STATUS:
+        return None
+    if response.status_code != 200:
+        return 0.0
+    return _negative_ratio_from_response(response)
+
+
+def backfill_negative_news(pairs, cache, max_concurrency=16, initial_concurrency=2, rounds=3, progress_every=100):
+    """
+    并发回填负面新闻比例：线程池最多 max_concurrency 个线程，实际在途请求数由 AimdLimiter 自适应调节
+    （成功时加性增加，429 / 5xx / 连接错误时减半）。结果在主线程写入 cache（SQLite 连接不跨线程）。
+    重试后仍被限流的组合不写缓存，下一轮重新排队，最多 rounds 轮。
+    返回统计：完成 / 失败数、耗时、吞吐（组合/秒）以及限速器状态。
+    """
+    pending = list(pairs)
+    limiter = AimdLimiter(initial=initial_concurrency, maximum=max_concurrency)
+    session = make_session(pool_size=max_concurrency, headers=DEFAULT_HEADERS)
+    started = time.perf_counter()
+    done = 0
+    interrupted = False
+
+    def _report():
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0.0
+        remaining = len(pending) - done
+        state = limiter.stats()
+        eta = f"{remaining / rate / 60:.1f} 分钟" if rate else "未知"
+        print(f"GDELT 回填：{done}/{len(pending)}，{rate:.2f} 组/秒，并发上限 {state['limit']:.1f}"
+              f"（峰值在途 {state['peak_in_flight']}），限流 {state['throttles']} 次，预计剩余 {eta}")
+
+    pool = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        queue = pending
+        for _ in range(rounds):
+            futures = {pool.submit(_fetch_pair_ratio, name, period_key, limiter, session): (name, period_key)
+                       for name, period_key in queue}
+            throttled = []
+            for future in as_completed(futures):
+                ratio = future.result()
+                if ratio is None:
+                    throttled.append(futures[future])
+                    continue
+                cache.put(*futures[future], ratio)
+                done += 1
+                if done % progress_every == 0:
+                    _report()
+            queue = throttled
+            if not queue:
+                break
+    except KeyboardInterrupt:
+        interrupted = True
+        queue = []
+    finally:
+        pool.shutdown(wait=not interrupted, cancel_futures=True)
+        cache.flush()
+        session.close()
+    if done % progress_every:
+        _report()
+    elapsed = time.perf_counter() - started
+    if queue:
+        print(f"⚠️ {len(queue)} 个组合 {rounds} 轮后仍被限流，未写入缓存，可稍后续跑。")
+    return {
+        "pairs": len(pending),
+        "done": done,
+        "failed": len(queue),
+        "seconds": elapsed,
+        "pairs_per_sec": done / elapsed if elapsed else 0.0,
+        "interrupted": interrupted,
+        **limiter.stats(),
+    }
+
+
+def adjust_heat_with_negative_news(
+    trends_path="dwts_historical_trends.csv",
+    output_file="dwts_historical_trends_adjusted.csv",
+    granularity="M",
+    cache_path="dwts_heat_cache.sqlite",
+    max_pairs=None,
+    sleep_range=(1.0, 2.0),
+    ttl_days=None,
+    shard=None,
+    workers=None,
+):
+    """
+    结合 Google Trends 与 GDELT 负面新闻比例修正趋势热度。
+    search_index_adjusted = search_index * (1 - negative_news_ratio)
+    performance_heat = search_index * (1 - negative_news_ratio)
+    black_red_heat = search_index * negative_news_ratio
+    shard=(i, n) 时只抓取第 i 份（共 n 份，按组合序号取模）并写入共享的 SQLite 缓存，不输出结果；
+    各分片跑完后不带 shard 再运行一次即可导出。
+    workers 不为空时改用 backfill_negative_news 并发抓取（最多 workers 个在途请求，忽略 sleep_range）。
+    """
+    df = load_trends_for_heat(trends_path, granularity)
+    with closing(open_heat_cache(cache_path, ttl_days=ttl_days)) as cache:
+        unique_pairs = df[HEAT_KEY_COLUMNS].drop_duplicates()
+        if shard is not None:
+            index, count = shard
+            unique_pairs = unique_pairs.iloc[index::count]
+        unique_pairs = unique_pairs.itertuples(index=False, name=None)
+        processed = 0
+        interrupted = False
+        if workers:
+            todo = [pair for pair in unique_pairs if pair not in cache]
+            stats = backfill_negative_news(todo[:max_pairs], cache, max_concurrency=workers)
+            processed, interrupted = stats["done"], stats["interrupted"]
+            unique_pairs = []
+        for name, period_key in unique_pairs:
+            if (name, period_key) in cache:
+                continue
+            if max_pairs is not None and processed >= max_pairs:
+                break
+            period_start = pd.Period(period_key).start_time
+            period_end = pd.Period(period_key).end_time
+            try:
+                cache.put(name, period_key, fetch_negative_news_ratio(name, period_start, period_end))
+            except KeyboardInterrupt:
+                interrupted = True
+                break
+            processed += 1
+            time.sleep(random.uniform(*sleep_range))
+
+        cache.flush()
+        cache_table = cache.table() if shard is None else None
+    if shard is not None:
+        print(f"✅ 分片 {shard[0]}/{shard[1]} 新抓取 {processed} 个组合，已写入 {cache_path}")
+        return
+    df = join_negative_news(df, cache_table)
+    missing_ratios = df["negative_news_ratio"].isna().sum()
+    if missing_ratios:
+        print(f"⚠️ 仍有 {missing_ratios} 条记录缺少负面新闻比例（按 0 计），可继续运行补全。")
+    split_heat(df).to_csv(output_file, index=False)
     if interrupted:
         print(f"⚠️ 中断保存缓存与部分结果至 {output_file}")
         return
     print(f"✅ 修正后的趋势热度已保存至 {output_file}")
 
+
+def benchmark_heat_join(trends_path="dwts_historical_trends.csv", granularity="M", repeats=3, seed=0):
+    """
+    在完整趋势表上对比负面新闻比例的查找方式（秒，取中位数）：
+    逐行 apply 查字典 vs 按 (celebrity_name, period_key) merge；以及把全部组合逐条写入缓存时
+    每条重写整个 JSON vs 追加日志 + 定期压缩。缓存比例为随机值（约 10% 缺失），并校验两种结果一致。
+    """
+    def _median(func):
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - t0)
+        return sorted(times)[len(times) // 2], result
+
+    t_load, df = _median(lambda: load_trends_for_heat(trends_path, granularity))
+    pairs = df[HEAT_KEY_COLUMNS].drop_duplicates()
+    rng = np.random.default_rng(seed)
+    ratios = rng.random(len(pairs)).round(4)
+    keep = rng.random(len(pairs)) > 0.1
+    entries = {
+        HeatCache.key(name, period): float(r)
+        for (name, period), r, k in zip(pairs.itertuples(index=False, name=None), ratios, keep) if k
+    }
+    t_apply, legacy = _median(lambda: _join_negative_news_legacy(df, entries))
+    t_merge, merged = _median(lambda: join_negative_news(df, heat_entries_table(entries)))
+    identical = legacy["negative_news_ratio"].equals(merged["negative_news_ratio"])
+
+    items = list(entries.items())[: min(len(entries), 2000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        rewrite_path = Path(tmp) / "rewrite.json"
+        t0 = time.perf_counter()
+        snapshot = {}
+        for key, ratio in items:
+            snapshot[key] = ratio
+            rewrite_path.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+        t_rewrite = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        log_cache = HeatCache(Path(tmp) / "log.json")
+        for key, ratio in items:
+            log_cache.put(*key.rsplit("||", 1), ratio)
+        log_cache.compact()
+        t_log = time.perf_counter() - t0
+        reloaded = HeatCache(Path(tmp) / "log.json").entries == snapshot
+
+    return pd.DataFrame([
+        {"step": "load + period_key", "n": len(df), "seconds": t_load},
+        {"step": "lookup: apply", "n": len(df), "seconds": t_apply},
+        {"step": "lookup: merge", "n": len(df), "seconds": t_merge, "identical": identical},
+        {"step": "cache: rewrite JSON per pair", "n": len(items), "seconds": t_rewrite},
+        {"step": "cache: append log + compact", "n": len(items), "seconds": t_log, "identical": reloaded},
+    ])
+
 # 3. 运行抓取
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="DWTS 数据抓取工具")
     parser.add_argument(
         "--mode",
-        choices=["trends", "social", "heat", "all", "order"],
+        choices=["trends", "social", "heat", "all", "order", "normalize"],
         default="trends",
-        help="选择抓取模式：trends=Google Trends，social=社交媒体粉丝量，heat=负面新闻热度拆分，order=整理周次明细",
+        help="选择抓取模式：trends=Google Trends，social=社交媒体粉丝量，heat=负面新闻热度拆分，order=整理周次明细，"
+             "normalize=离线按锚点词归一化 --trends-store 中的 Trends 数据",
     )
     parser.add_argument(
         "--order-file",
@@ -645,8 +1446,20 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--heat-cache",
-        default="dwts_heat_cache.json",
-        help="负面新闻缓存文件路径（可用于断点续跑）",
+        default="dwts_heat_cache.sqlite",
+        help="负面新闻缓存路径（可用于断点续跑）：.sqlite 可被多个进程共享（同名旧 .json 缓存会被自动导入），.json 为旧格式",
+    )
+    parser.add_argument(
+        "--heat-ttl-days",
+        type=float,
+        default=None,
+        help="负面新闻缓存有效期（天），过期条目重新抓取；需 SQLite 缓存",
+    )
+    parser.add_argument(
+        "--heat-shard",
+        default=None,
+        metavar="I/N",
+        help="只抓取第 I 份（共 N 份，I 从 0 开始）写入共享缓存，可在多个进程中并行运行",
     )
     parser.add_argument(
         "--heat-limit",
@@ -666,12 +1479,89 @@ if __name__ == "__main__":
         default=2.0,
         help="负面新闻抓取间隔最大秒数",
     )
+    parser.add_argument(
+        "--heat-workers",
+        type=int,
+        default=None,
+        help="并发回填负面新闻比例，最多 N 个在途请求（AIMD 自适应：遇 429/5xx 减半、成功后逐步增加）",
+    )
+    parser.add_argument(
+        "--benchmark-heat",
+        action="store_true",
+        help="在 --trends-file 上对比负面新闻比例的 apply/merge 查找与缓存写入方式后退出",
+    )
+    parser.add_argument(
+        "--trends-store",
+        default=None,
+        help="Google Trends 断点续跑存储目录；指定后逐批落盘，重启只抓未完成的明星",
+    )
+    parser.add_argument(
+        "--trends-anchor",
+        default=None,
+        help="配合 --trends-store：每批固定加入的锚点词（如 \"Dancing with the Stars\"），用于跨批归一化",
+    )
+    parser.add_argument(
+        "--trends-normalized-output",
+        default="dwts_historical_trends_normalized.csv",
+        help="normalize 模式的输出路径",
+    )
+    parser.add_argument(
+        "--trends-refresh",
+        action="store_true",
+        help="配合 --trends-store：重查已完成批次，只追加上次之后的新日期",
+    )
+    parser.add_argument(
+        "--social-workers",
+        type=int,
+        default=1,
+        help="社交媒体抓取并行的明星数；1 为逐个抓取并随机休眠，>1 时按域名限制并发",
+    )
+    parser.add_argument(
+        "--social-batched",
+        action="store_true",
+        help="先批量解析维基百科标题、维基数据 ID 与社交账号（titles=A|B / wbgetentities 每次 50 个）",
+    )
+    parser.add_argument(
+        "--mock-base",
+        default=None,
+        help="把所有请求改写到本地 mock 服务（如 http://127.0.0.1:9000，路径为 /<原主机名>/<原路径>）",
+    )
+    parser.add_argument(
+        "--http-cache",
+        default=None,
+        help="磁盘 HTTP 缓存目录（与 fetch_order.py 共用；未过期直接命中，过期后条件请求）",
+    )
     args = parser.parse_args()
+    heat_shard = None
+    if args.heat_shard:
+        try:
+            heat_shard = tuple(int(part) for part in args.heat_shard.split("/"))
+            if len(heat_shard) != 2 or not 0 <= heat_shard[0] < heat_shard[1]:
+                raise ValueError
+        except ValueError:
+            parser.error("--heat-shard 格式应为 I/N，且 0 <= I < N")
+    if args.benchmark_heat:
+        print(benchmark_heat_join(args.trends_file).to_string(index=False))
+        raise SystemExit(0)
+    if args.http_cache:
+        set_http_cache(args.http_cache)
+    if args.mock_base:
+        set_url_rewrite(args.mock_base)
 
     if args.mode in {"trends", "all"}:
-        fetch_all_trends(ALL_STARS)
+        if args.trends_store:
+            fetch_all_trends_checkpointed(
+                ALL_STARS, args.trends_file, store_dir=args.trends_store, refresh=args.trends_refresh,
+                anchor=args.trends_anchor,
+            )
+        else:
+            fetch_all_trends(ALL_STARS)
+    if args.mode == "normalize":
+        if not args.trends_store:
+            parser.error("normalize 模式需要 --trends-store")
+        normalize_trends_store(args.trends_store, args.trends_normalized_output, star_list=ALL_STARS)
     if args.mode in {"social", "all"}:
-        fetch_social_followers(ALL_STARS)
+        fetch_social_followers(ALL_STARS, workers=args.social_workers, batched=args.social_batched)
     if args.mode in {"heat", "all"}:
         adjust_heat_with_negative_news(
             args.trends_file,
@@ -679,6 +1569,11 @@ if __name__ == "__main__":
             cache_path=args.heat_cache,
             max_pairs=args.heat_limit,
             sleep_range=(args.heat_sleep_min, args.heat_sleep_max),
+            ttl_days=args.heat_ttl_days,
+            shard=heat_shard,
+            workers=args.heat_workers,
         )
     if args.mode in {"order", "all"}:
-        add_running_order_and_dance_style(args.order_file, args.order_output)
\ No newline at end of file
+        add_running_order_and_dance_style(args.order_file, args.order_output)
+    if get_http_cache() is not None:
+        print(f"HTTP 缓存统计：{get_http_cache().stats()}")
\ No newline at end of file
@@ -1,10 +1,19 @@
+import argparse
+import importlib.util
+import io
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from http_utils import (
+    HostRateLimiter, PageCorpus, cached_get, get_http_cache, get_page_corpus,
+    make_session, set_http_cache, set_page_corpus,
+)
+
 DEFAULT_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (MCM_Research_Bot; mailto:your_email@example.com)'
 }
@@ -12,17 +21,16 @@ SEASON_URL_OVERRIDES = {
     34: "https://en.wikipedia.org/wiki/Dancing_with_the_Stars_(American_TV_series)_season_34"
 }
 
-def _request_with_retry(url, headers=None, retries=3, timeout=30):
+def _request_with_retry(url, headers=None, retries=3, timeout=30, session=None, limiter=None):
     headers = headers or DEFAULT_HEADERS
     response = None
     for attempt in range(retries):
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = cached_get(url, headers=headers, timeout=timeout, session=session, limiter=limiter)
         except requests.RequestException:
             response = None
-        if response and response.status_code == 200:
-            return response
-        if response and response.status_code not in {429, 500, 502, 503, 504}:
+        # Response 的真值对 4xx 为 False，必须与 None 比较，否则 404 也会被重试
+        if response is not None and response.status_code not in {429, 500, 502, 503, 504}:
             return response
         time.sleep(2 ** attempt)
     return response
@@ -80,141 +88,175 @@ def _parse_bottom_two_status(cell, row):
     return ""
 
 
-def scrape_dwts_weekly_details(season_num):
+def season_url(season_num, url_template=None):
+    """赛季页面地址；url_template（如 "http://127.0.0.1:8000/season_{season}.html"）可指向本地替身服务。"""
+    if url_template:
+        return url_template.format(season=season_num)
+    return SEASON_URL_OVERRIDES.get(
+        season_num,
+        f"https://en.wikipedia.org/wiki/Dancing_with_the_Stars_(American_season_{season_num})"
+    )
+
+
+HTML_BACKENDS = ["lxml", "html.parser", "legacy"]
+# lxml 为可选依赖，未安装时退回标准库 html.parser
+DEFAULT_HTML_BACKEND = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+# 只保留标题与表格：SoupStrainer 作用于顶层，未命中的标签被丢弃、其子标签继续参与匹配
+_HEADINGS_AND_TABLES = SoupStrainer(['h2', 'h3', 'table'])
+
+
+def _week_tables(html, backend=DEFAULT_HTML_BACKEND):
+    """
+    依文档顺序产出 (wikitable, 其前最近的 h2/h3 标题)。
+    lxml / html.parser：用 SoupStrainer 只建标题与表格子树，一次前向遍历关联标题；
+    legacy：完整解析后对每个表格调用 find_previous（原实现，用于对照）。
+    """
+    if backend == "legacy":
+        soup = BeautifulSoup(html, 'html.parser')
+        for table in soup.find_all('table', {'class': 'wikitable'}):
+            yield table, table.find_previous(['h2', 'h3'])
+        return
+    soup = BeautifulSoup(html, backend, parse_only=_HEADINGS_AND_TABLES)
+    heading = None
+    for tag in soup.find_all(['h2', 'h3', 'table']):
+        if tag.name != 'table':
+            heading = tag
+        elif 'wikitable' in (tag.get('class') or []):
+            yield tag, heading
+
+
+def parse_weekly_details(html, season_num, backend=DEFAULT_HTML_BACKEND):
+    """从赛季页面 HTML 中解析周次明细行（见 scrape_dwts_weekly_details）。"""
+    # 寻找“Weekly scores and songs”或类似的标题
+    all_data = []
+
+    # 维基百科的周次数据通常存储在具有 'wikitable' 类的表格中
+    # 我们寻找包含 "Order" 或 "Running order" 列头的表格
+    current_week = 0
+    for table, heading in _week_tables(html, backend):
+        rows = table.find_all('tr')
+        header_text = heading.text.lower() if heading else ""
+
+        # 过滤掉非周次评分表的表格
+        if 'week' not in header_text and 'scores' not in header_text:
+            continue
+
+        # 提取周次（例如从 "Week 1: Spring 2024" 中提取 1）
+        week_match = re.search(r'week\s+(\d+)', header_text)
+        if week_match:
+            current_week = week_match.group(1)
+        else:
+            # 如果 h3 没写，可能是连续的表格，累加周次
+            current_week += 1
+
+        header_cells = rows[0].find_all(['th', 'td']) if rows else []
+        headers = [cell.get_text(strip=True) for cell in header_cells]
+
+        # 寻找出场顺序（Order）、选手名、舞蹈种类与结果列索引
+        order_idx = -1
+        couple_idx = -1
+        dance_idx = -1
+        result_idx = -1
+        for idx, h in enumerate(headers):
+            lower_h = h.lower()
+            if 'order' in lower_h:
+                order_idx = idx
+            if 'couple' in lower_h or 'pair' in lower_h or 'contestant' in lower_h:
+                couple_idx = idx
+            if 'dance' in lower_h or 'style' in lower_h:
+                dance_idx = idx
+            if 'result' in lower_h or 'status' in lower_h:
+                result_idx = idx
+
+        if couple_idx != -1:
+            running_order = 0
+            last_order = ""
+            last_celebrity = ""
+            last_partner = ""
+            last_couple = ""
+            last_status = ""
+            for row in rows[1:]:
+                prev_couple = last_couple
+                cols = row.find_all(['td', 'th'])
+                if not cols:
+                    continue
+                has_couple_cell = len(cols) > couple_idx
+                couple_cell = cols[couple_idx] if has_couple_cell else None
+                celebrity, partner, couple = _parse_couple(couple_cell) if has_couple_cell else ("", "", "")
+                shifted = False
+                if has_couple_cell and (celebrity or partner or couple):
+                    if _looks_like_score(celebrity):
+                        if not last_couple:
+                            continue
+                        shifted = True
+                        celebrity = ""
+                        partner = ""
+                        couple = ""
+                    else:
+                        last_celebrity = celebrity
+                        last_partner = partner
+                        last_couple = couple
+
+                order = ""
+                if order_idx != -1 and len(cols) > order_idx:
+                    order = _clean_text(cols[order_idx])
+                if not order or order.lower() in {"order", "running order"}:
+                    if order_idx == -1:
+                        if has_couple_cell and (celebrity or partner or couple):
+                            if prev_couple and couple == prev_couple and last_order:
+                                order = last_order
+                            else:
+                                running_order += 1
+                                order = str(running_order)
+                        else:
+                            order = last_order
+                    else:
+                        order = last_order
+                if order:
+                    last_order = order
+
+                if not (last_celebrity or last_couple) or not order:
+                    continue
+
+                dance_idx_effective = dance_idx + 1 if shifted and dance_idx != -1 else dance_idx
+                result_idx_effective = result_idx + 1 if shifted and result_idx != -1 else result_idx
+                dance_style = _clean_text(cols[dance_idx_effective]) if dance_idx_effective != -1 and len(cols) > dance_idx_effective else ""
+                if dance_style.lower() in {"group", "no scores received", "no score received"}:
+                    continue
+                result_cell = cols[result_idx_effective] if result_idx_effective != -1 and len(cols) > result_idx_effective else None
+                bottom_status = _parse_bottom_two_status(result_cell, row)
+                if not bottom_status and last_status:
+                    bottom_status = last_status
+                if bottom_status:
+                    last_status = bottom_status
+
+                all_data.append({
+                    'Season': season_num,
+                    'Week': current_week,
+                    'Running_Order': order,
+                    'Celebrity': last_celebrity,
+                    'Ballroom_Partner': last_partner,
+                    'Couple': last_couple,
+                    'Dance_Style': dance_style,
+                    'Weekly_Bottom_Two_Status': bottom_status
+                })
+    return all_data
+
+
+def scrape_dwts_weekly_details(season_num, url=None, session=None, limiter=None, backend=DEFAULT_HTML_BACKEND):
     """
     抓取指定赛季维基百科页面中的周次信息：
     Running_Order, Celebrity, Ballroom_Partner, Couple, Dance_Style, Weekly_Bottom_Two_Status
     """
-    url = SEASON_URL_OVERRIDES.get(
-        season_num,
-        f"https://en.wikipedia.org/wiki/Dancing_with_the_Stars_(American_season_{season_num})"
-    )
+    url = url or season_url(season_num)
 
     try:
-        response = _request_with_retry(url)
+        response = _request_with_retry(url, session=session, limiter=limiter)
         if not response or response.status_code != 200:
             print(f"Season {season_num} 页面请求失败")
             return None
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # 寻找“Weekly scores and songs”或类似的标题
-        all_data = []
-
-        # 维基百科的周次数据通常存储在具有 'wikitable' 类的表格中
-        # 我们寻找包含 "Order" 或 "Running order" 列头的表格
-        tables = soup.find_all('table', {'class': 'wikitable'})
-
-        current_week = 0
-        for table in tables:
-            rows = table.find_all('tr')
-            heading = table.find_previous(['h2', 'h3'])
-            header_text = heading.text.lower() if heading else ""
-
-            # 过滤掉非周次评分表的表格
-            if 'week' not in header_text and 'scores' not in header_text:
-                continue
-
-            # 提取周次（例如从 "Week 1: Spring 2024" 中提取 1）
-            week_match = re.search(r'week\s+(\d+)', header_text)
-            if week_match:
-                current_week = week_match.group(1)
-            else:
-                # 如果 h3 没写，可能是连续的表格，累加周次
-                current_week += 1
-
-            header_cells = rows[0].find_all(['th', 'td']) if rows else []
-            headers = [cell.get_text(strip=True) for cell in header_cells]
-
-            # 寻找出场顺序（Order）、选手名、舞蹈种类与结果列索引
-            order_idx = -1
-            couple_idx = -1
-            dance_idx = -1
-            result_idx = -1
-            for idx, h in enumerate(headers):
-                lower_h = h.lower()
-                if 'order' in lower_h:
-                    order_idx = idx
-                if 'couple' in lower_h or 'pair' in lower_h or 'contestant' in lower_h:
-                    couple_idx = idx
-                if 'dance' in lower_h or 'style' in lower_h:
-                    dance_idx = idx
-                if 'result' in lower_h or 'status' in lower_h:
-                    result_idx = idx
-
-            if couple_idx != -1:
-                running_order = 0
-                last_order = ""
-                last_celebrity = ""
-                last_partner = ""
-                last_couple = ""
-                last_status = ""
-                for row in rows[1:]:
-                    prev_couple = last_couple
-                    cols = row.find_all(['td', 'th'])
-                    if not cols:
-                        continue
-                    has_couple_cell = len(cols) > couple_idx
-                    couple_cell = cols[couple_idx] if has_couple_cell else None
-                    celebrity, partner, couple = _parse_couple(couple_cell) if has_couple_cell else ("", "", "")
-                    shifted = False
-                    if has_couple_cell and (celebrity or partner or couple):
-                        if _looks_like_score(celebrity):
-                            if not last_couple:
-                                continue
-                            shifted = True
-                            celebrity = ""
-                            partner = ""
-                            couple = ""
-                        else:
-                            last_celebrity = celebrity
-                            last_partner = partner
-                            last_couple = couple
-
-                    order = ""
-                    if order_idx != -1 and len(cols) > order_idx:
-                        order = _clean_text(cols[order_idx])
-                    if not order or order.lower() in {"order", "running order"}:
-                        if order_idx == -1:
-                            if has_couple_cell and (celebrity or partner or couple):
-                                if prev_couple and couple == prev_couple and last_order:
-                                    order = last_order
-                                else:
-                                    running_order += 1
-                                    order = str(running_order)
-                            else:
-                                order = last_order
-                        else:
-                            order = last_order
-                    if order:
-                        last_order = order
-
-                    if not (last_celebrity or last_couple) or not order:
-                        continue
-
-                    dance_idx_effective = dance_idx + 1 if shifted and dance_idx != -1 else dance_idx
-                    result_idx_effective = result_idx + 1 if shifted and result_idx != -1 else result_idx
-                    dance_style = _clean_text(cols[dance_idx_effective]) if dance_idx_effective != -1 and len(cols) > dance_idx_effective else ""
-                    if dance_style.lower() in {"group", "no scores received", "no score received"}:
-                        continue
-                    result_cell = cols[result_idx_effective] if result_idx_effective != -1 and len(cols) > result_idx_effective else None
-                    bottom_status = _parse_bottom_two_status(result_cell, row)
-                    if not bottom_status and last_status:
-                        bottom_status = last_status
-                    if bottom_status:
-                        last_status = bottom_status
-
-                    all_data.append({
-                        'Season': season_num,
-                        'Week': current_week,
-                        'Running_Order': order,
-                        'Celebrity': last_celebrity,
-                        'Ballroom_Partner': last_partner,
-                        'Couple': last_couple,
-                        'Dance_Style': dance_style,
-                        'Weekly_Bottom_Two_Status': bottom_status
-                    })
-
+        all_data = parse_weekly_details(response.text, season_num, backend=backend)
         if not all_data:
             print(f"Season {season_num} 未找到包含出场顺序的周次表格。")
         return all_data
@@ -223,6 +265,91 @@ def scrape_dwts_weekly_details(season_num):
         print(f"解析 Season {season_num} 时出错: {e}")
         return None
 
+def benchmark_parsers(pages_dir, backends=None, repeats=3):
+    """
+    对已保存的赛季页面（pages_dir/season_<N>.html）逐季比较各解析后端耗时（毫秒，取中位数），
+    并校验输出行与 legacy 实现逐字节一致。
+    """
+    backends = backends or [b for b in HTML_BACKENDS if b != "lxml" or DEFAULT_HTML_BACKEND == "lxml"]
+    pages = sorted(Path(pages_dir).glob("season_*.html"), key=lambda p: int(re.search(r'\d+', p.stem).group()))
+    records = []
+    for page in pages:
+        season_num = int(re.search(r'\d+', page.stem).group())
+        html = page.read_text(encoding="utf-8")
+        record = {"season": season_num, "kb": len(html.encode("utf-8")) / 1024}
+        outputs = {}
+        for backend in backends:
+            times = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                rows = parse_weekly_details(html, season_num, backend=backend)
+                times.append(time.perf_counter() - t0)
+            record[f"{backend}_ms"] = sorted(times)[len(times) // 2] * 1000
+            outputs[backend] = pd.DataFrame(rows).to_csv(index=False)
+        record["rows"] = len(rows)
+        record["identical"] = len(set(outputs.values())) == 1
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def diff_against_golden(df_order, golden_path):
+    """
+    将抓取结果与基准 CSV 逐行比较（均按字符串读取，重复行按出现次数计）。
+    返回 (是否逐字节一致, 差异行 DataFrame)；差异行的 _side 列为 output / golden。
+    """
+    output_csv = df_order.to_csv(index=False)
+    golden_csv = Path(golden_path).read_text(encoding="utf-8")
+    if output_csv == golden_csv:
+        return True, pd.DataFrame()
+    output = pd.read_csv(io.StringIO(output_csv), dtype=str, keep_default_na=False)
+    golden = pd.read_csv(io.StringIO(golden_csv), dtype=str, keep_default_na=False)
+    cols = [c for c in golden.columns if c in output.columns]
+    output = output[cols].assign(_n=output.groupby(cols).cumcount())
+    golden = golden[cols].assign(_n=golden.groupby(cols).cumcount())
+    merged = output.merge(golden, on=cols + ["_n"], how="outer", indicator=True)
+    diff = merged[merged["_merge"] != "both"].drop(columns="_n")
+    diff["_side"] = diff.pop("_merge").map({"left_only": "output", "right_only": "golden"}).astype(str)
+    return False, diff.reset_index(drop=True)
+
+
+def benchmark_replay(corpus_path, seasons, golden_path=None, backend=DEFAULT_HTML_BACKEND,
+                     url_template=None, repeats=3):
+    """
+    在回放语料库上跑完整的逐季抓取流程（不联网），报告 pages/sec、rows/sec，
+    并可与基准 dwts_weekly_details.csv 比较。计时取 repeats 次中最快的一次。
+    """
+    corpus = set_page_corpus(PageCorpus(corpus_path, mode="replay"))
+    best = None
+    for _ in range(repeats):
+        served_before = corpus.counters["served"]
+        rows = []
+        t0 = time.perf_counter()
+        for s in seasons:
+            data = scrape_dwts_weekly_details(s, url=season_url(s, url_template), backend=backend)
+            if data:
+                rows.extend(data)
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best[0]:
+            best = (elapsed, corpus.counters["served"] - served_before, rows)
+    set_page_corpus(None)
+    corpus.close()
+
+    elapsed, pages, rows = best
+    df_order = pd.DataFrame(rows)
+    report = {
+        "pages": pages,
+        "rows": len(df_order),
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else float("nan"),
+        "rows_per_sec": len(df_order) / elapsed if elapsed else float("nan"),
+    }
+    diff = pd.DataFrame()
+    if golden_path:
+        report["identical"], diff = diff_against_golden(df_order, golden_path)
+        report["diff_rows"] = len(diff)
+    return report, diff
+
+
 def _load_target_seasons(data_path):
     if not data_path.exists():
         return [2, 4, 11, 27, 28, 31, 32, 33, 34]
@@ -235,21 +362,111 @@ def _load_target_seasons(data_path):
         return [2, 4, 11, 27, 28, 31, 32, 33, 34]
 
 
+def scrape_seasons_concurrently(seasons, workers=4, rate=1.0, burst=1, url_template=None, backend=DEFAULT_HTML_BACKEND):
+    """
+    线程池并发抓取多个赛季：共享一个带连接池的 Session，
+    按主机令牌桶限速（每秒 rate 个请求，突发 burst 个），结果按 seasons 顺序拼接。
+    """
+    session = make_session(pool_size=workers, headers=DEFAULT_HEADERS)
+    limiter = HostRateLimiter(rate=rate, capacity=burst)
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                scrape_dwts_weekly_details, s,
+                url=season_url(s, url_template), session=session, limiter=limiter, backend=backend,
+            ): s
+            for s in seasons
+        }
+        for fut in as_completed(futures):
+            s = futures[fut]
+            results[s] = fut.result()
+            print(f"Season {s} 完成：{len(results[s] or [])} 行")
+    session.close()
+
+    all_rows = []
+    for s in seasons:
+        if results.get(s):
+            all_rows.extend(results[s])
+    return all_rows
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="抓取 DWTS 各赛季周次明细（出场顺序、舞种、淘汰状态）")
+    parser.add_argument("--workers", type=int, default=1, help="并发线程数；1 为逐季抓取，真实请求之间至少间隔 2 秒（缓存命中不等待）")
+    parser.add_argument("--rate", type=float, default=1.0, help="并发模式下每个主机每秒最多请求数（<=0 不限速）")
+    parser.add_argument("--burst", type=int, default=1, help="并发模式下每个主机允许的突发请求数")
+    parser.add_argument("--url-template", default=None, help="赛季页面地址模板，如 http://127.0.0.1:8000/season_{season}.html")
+    parser.add_argument("--output", default="dwts_weekly_details.csv", help="输出 CSV 路径")
+    parser.add_argument("--parser", choices=HTML_BACKENDS, default=DEFAULT_HTML_BACKEND, help="HTML 解析后端（legacy 为原完整解析实现）")
+    parser.add_argument("--benchmark-parse", default=None, metavar="DIR", help="对 DIR 下保存的 season_<N>.html 比较各解析后端耗时后退出")
+    parser.add_argument("--http-cache", default=None, help="磁盘 HTTP 缓存目录（未过期直接命中，过期后条件请求）")
+    parser.add_argument("--record", default=None, metavar="ZIP", help="把抓取到的每个页面录制进压缩语料库 ZIP（新建）")
+    parser.add_argument("--replay", default=None, metavar="ZIP", help="从语料库 ZIP 回放页面，不联网")
+    parser.add_argument("--benchmark-replay", action="store_true", help="配合 --replay：报告 pages/sec、rows/sec 并与 --golden 比较后退出")
+    parser.add_argument("--golden", default="dwts_weekly_details.csv", help="--benchmark-replay 的基准 CSV")
+    args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record 与 --replay 不能同时使用")
+    if args.benchmark_replay and not args.replay:
+        parser.error("--benchmark-replay 需要 --replay")
+    if args.http_cache:
+        set_http_cache(args.http_cache)
+    if args.benchmark_parse:
+        report = benchmark_parsers(args.benchmark_parse)
+        print(report.to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+        totals = report.filter(like="_ms").sum()
+        print("合计(ms)：" + "，".join(f"{c[:-3]}={v:.0f}" for c, v in totals.items()))
+        print(f"输出一致：{bool(report['identical'].all())}")
+        raise SystemExit(0)
+
     # --- 执行批量抓取 ---
     repo_root = Path(__file__).resolve().parent
     data_path = repo_root / "2026_MCM_Problem_C_Data.csv"
     all_seasons_order = []
     target_seasons = _load_target_seasons(data_path)
 
-    for s in target_seasons:
-        print(f"正在抓取 Season {s} 的周次明细...")
-        data = scrape_dwts_weekly_details(s)
-        if data:
-            all_seasons_order.extend(data)
-        time.sleep(2)  # 礼貌抓取
+    if args.benchmark_replay:
+        golden = args.golden if Path(args.golden).exists() else None
+        report, diff = benchmark_replay(args.replay, target_seasons, golden_path=golden,
+                                        backend=args.parser, url_template=args.url_template)
+        print(f"回放 {report['pages']} 页 / {report['rows']} 行，用时 {report['seconds']:.2f}s："
+              f"{report['pages_per_sec']:.1f} pages/sec，{report['rows_per_sec']:.0f} rows/sec")
+        if golden is None:
+            print(f"未找到基准文件 {args.golden}，跳过比较")
+        elif report["identical"]:
+            print(f"输出与 {golden} 逐字节一致")
+        else:
+            print(f"输出与 {golden} 不一致：{report['diff_rows']} 行差异（前 20 行）")
+            print(diff.head(20).to_string(index=False))
+        raise SystemExit(0)
+    if args.record:
+        set_page_corpus(PageCorpus(args.record, mode="record"))
+    elif args.replay:
+        set_page_corpus(PageCorpus(args.replay, mode="replay"))
+
+    if args.workers > 1:
+        all_seasons_order = scrape_seasons_concurrently(
+            target_seasons, workers=args.workers, rate=args.rate,
+            burst=args.burst, url_template=args.url_template, backend=args.parser,
+        )
+    else:
+        # 礼貌抓取：每个主机每 2 秒一个真实请求；缓存命中与回放不占令牌
+        polite_limiter = HostRateLimiter(rate=0.5, capacity=1)
+        for s in target_seasons:
+            print(f"正在抓取 Season {s} 的周次明细...")
+            data = scrape_dwts_weekly_details(s, url=season_url(s, args.url_template),
+                                              limiter=polite_limiter, backend=args.parser)
+            if data:
+                all_seasons_order.extend(data)
 
     # 转换为 DataFrame 并导出
     df_order = pd.DataFrame(all_seasons_order)
-    df_order.to_csv("dwts_weekly_details.csv", index=False)
-    print("✅ 数据已保存至 dwts_weekly_details.csv")
\ No newline at end of file
+    df_order.to_csv(args.output, index=False)
+    print(f"✅ 数据已保存至 {args.output}")
+    if get_http_cache() is not None:
+        print(f"HTTP 缓存统计：{get_http_cache().stats()}")
+    if get_page_corpus() is not None:
+        corpus = get_page_corpus()
+        corpus.close()
+        print(f"语料库 {corpus.path}（{corpus.mode}）：{corpus.counters}")
\ No newline at end of file
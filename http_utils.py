@@ -0,0 +1,435 @@
+"""抓取脚本共用的 HTTP 工具：带连接池的 Session、按主机的令牌桶限速器、磁盘响应缓存与录制 / 回放语料库。"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+class TokenBucket:
+    """线程安全的令牌桶：平均每秒 rate 个请求，最多连续突发 capacity 个。"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，令牌不足时阻塞到补足为止。"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """每个主机（netloc）一个令牌桶；rate <= 0 或 None 表示不限速。
+
+    per_host 可为个别主机单独指定 (rate, capacity)。
+    """
+
+    def __init__(self, rate=1.0, capacity=1, per_host=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.per_host = dict(per_host or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, capacity = self.per_host.get(host, (self.rate, self.capacity))
+                bucket = TokenBucket(rate, capacity) if rate and rate > 0 else None
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url):
+        bucket = self._bucket(urlparse(url).netloc)
+        if bucket is not None:
+            bucket.acquire()
+
+
+class HostConcurrencyLimiter:
+    """按主机限制同时在途的请求数：默认每个主机 max_concurrency 个，per_host 可单独指定。"""
+
+    def __init__(self, max_concurrency=2, per_host=None):
+        self.max_concurrency = max_concurrency
+        self.per_host = dict(per_host or {})
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host.get(host, self.max_concurrency))
+                self._semaphores[host] = sem
+            return sem
+
+    @contextmanager
+    def slot(self, url):
+        sem = self._semaphore(urlparse(url).netloc)
+        with sem:
+            yield
+
+
+class AimdLimiter:
+    """
+    AIMD 自适应并发上限：每个成功请求把上限加 increase / 上限（约每轮加 increase），
+    遇到 429 / 5xx / 连接错误时乘以 decrease。同一轮（上次下调之后才发出的请求）里的多次限流只下调一次，
+    避免并发中的一串失败把上限直接压到底。
+    slot(url) 与 HostConcurrencyLimiter 接口一致，返回的 ticket 由调用方填写 status 后交回。
+    """
+
+    THROTTLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, initial=2, minimum=1, maximum=16, increase=1.0, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.successes = 0
+        self.throttles = 0
+        self.decreases = 0
+        self._epoch = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, url=None):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            ticket = SimpleNamespace(epoch=self._epoch, status=None)
+        try:
+            yield ticket
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._observe(ticket)
+                self._cond.notify_all()
+
+    def _observe(self, ticket):
+        if ticket.status in (200, 304):
+            self.successes += 1
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+        elif ticket.status is None or ticket.status in self.THROTTLE_STATUS:
+            self.throttles += 1
+            if ticket.epoch == self._epoch:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.decreases += 1
+                self._epoch += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "decreases": self.decreases,
+            }
+
+
+def make_session(pool_size=10, headers=None):
+    """创建可在线程间共享的 requests.Session，连接池大小与并发数一致。"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+# -------------------------
+# 磁盘 HTTP 缓存（条件请求 + 按接口族 TTL）
+# -------------------------
+# 各接口族的新鲜期（秒）；过期后带 ETag / Last-Modified 做条件请求，304 则沿用缓存
+CACHE_TTLS = {
+    "wikipedia_api": 7 * 24 * 3600,
+    "wikipedia_page": 24 * 3600,
+    "wikidata": 7 * 24 * 3600,
+    "gdelt": 24 * 3600,
+    "default": 24 * 3600,
+}
+
+
+def endpoint_family(url):
+    """按 URL 归类接口族，用于选择 TTL。"""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("wikidata.org"):
+        return "wikidata"
+    if host.endswith("wikipedia.org"):
+        return "wikipedia_api" if parsed.path.endswith("/api.php") else "wikipedia_page"
+    if host.endswith("gdeltproject.org"):
+        return "gdelt"
+    return "default"
+
+
+class HttpCache:
+    """以 URL + 参数为键的磁盘缓存，正文 gzip 压缩存储，只缓存 200 响应。
+
+    每个条目为 <key>.json（元数据）与 <key>.body.gz（正文）两个文件。
+    计数：hits=新鲜命中，revalidated=304 沿用，misses=重新下载。
+    """
+
+    def __init__(self, cache_dir, ttls=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None):
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        return hashlib.sha1(json.dumps([url, items]).encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        sub = self.cache_dir / key[:2]
+        return sub / f"{key}.json", sub / f"{key}.body.gz"
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def load(self, url, params=None):
+        """返回 (meta, body)，不存在或损坏时返回 (None, None)。"""
+        meta_path, body_path = self._paths(self.key(url, params))
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = gzip.decompress(body_path.read_bytes())
+        except (OSError, ValueError, EOFError):
+            return None, None
+        return meta, body
+
+    def store(self, url, params, response, fetched_at=None):
+        meta_path, body_path = self._paths(self.key(url, params))
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = response_meta(response, url, fetched_at)
+        # 先写临时文件再替换，避免并发线程读到半个文件；临时文件名含进程号与线程号，多个进程共享缓存目录时互不覆盖
+        for path, data in ((body_path, gzip.compress(response.content)),
+                           (meta_path, json.dumps(meta).encode("utf-8"))):
+            tmp = path.with_suffix(path.suffix + f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+    def touch(self, url, params, meta):
+        meta_path, _ = self._paths(self.key(url, params))
+        meta = {**meta, "fetched_at": time.time()}
+        tmp = meta_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        total = sum(counters.values())
+        counters["hit_rate"] = (counters["hits"] + counters["revalidated"]) / total if total else 0.0
+        return counters
+
+
+def response_meta(response, url, fetched_at=None):
+    """缓存 / 语料库条目的元数据：还原响应所需的状态码、编码与少量响应头。"""
+    return {
+        "url": url,
+        "status": response.status_code,
+        "encoding": response.encoding,
+        "headers": {k: v for k, v in response.headers.items()
+                    if k.lower() in {"content-type", "etag", "last-modified"}},
+        "fetched_at": fetched_at if fetched_at is not None else time.time(),
+    }
+
+
+def response_from_cache(meta, body):
+    """由缓存条目还原出 requests.Response，调用方可照常使用 .text / .json()。"""
+    response = requests.Response()
+    response.status_code = meta["status"]
+    response._content = body
+    response.headers = CaseInsensitiveDict(meta["headers"])
+    response.encoding = meta["encoding"]
+    response.url = meta["url"]
+    return response
+
+
+_HTTP_CACHE = None
+_PAGE_CORPUS = None
+_URL_REWRITE_BASE = None
+
+
+def set_http_cache(cache):
+    """设置全局共享缓存（HttpCache 实例、目录路径或 None 关闭）。"""
+    global _HTTP_CACHE
+    _HTTP_CACHE = HttpCache(cache) if isinstance(cache, (str, Path)) else cache
+    return _HTTP_CACHE
+
+
+def get_http_cache():
+    return _HTTP_CACHE
+
+
+def set_url_rewrite(base):
+    """
+    把所有真实请求改写到 base/<原主机名><原路径>（如本地 mock 服务 http://127.0.0.1:9000），
+    缓存键、语料库键与按主机限速仍使用原始 URL；base 为 None 时关闭。
+    """
+    global _URL_REWRITE_BASE
+    _URL_REWRITE_BASE = base.rstrip("/") if base else None
+
+
+def rewrite_url(url):
+    if not _URL_REWRITE_BASE:
+        return url
+    parsed = urlparse(url)
+    rewritten = f"{_URL_REWRITE_BASE}/{parsed.netloc}{parsed.path}"
+    return f"{rewritten}?{parsed.query}" if parsed.query else rewritten
+
+
+def set_page_corpus(corpus):
+    """设置全局录制 / 回放语料库（PageCorpus 或 None 关闭）。"""
+    global _PAGE_CORPUS
+    _PAGE_CORPUS = corpus
+    return _PAGE_CORPUS
+
+
+def get_page_corpus():
+    return _PAGE_CORPUS
+
+
+def cached_get(url, params=None, headers=None, timeout=30, session=None, cache=None, limiter=None):
+    """
+    带缓存的 GET：新鲜条目直接返回；过期条目做条件请求；否则正常下载并写入缓存。
+    设置了回放语料库时完全不联网；录制模式下把每个 200 响应写入语料库。
+    limiter（HostRateLimiter）只在真正发出网络请求前取令牌，缓存命中与回放不等待。
+    """
+    corpus = _PAGE_CORPUS
+    if corpus is not None and corpus.mode == "replay":
+        return corpus.replay(url, params)
+    response = _fetch(url, params, headers, timeout, session, cache, limiter)
+    if corpus is not None and response is not None and response.status_code == 200:
+        corpus.record(url, params, response)
+    return response
+
+
+def _fetch(url, params, headers, timeout, session, cache, limiter=None):
+    cache = cache if cache is not None else _HTTP_CACHE
+    session_get = session.get if session is not None else requests.get
+
+    def get(*args, **kwargs):
+        if limiter is not None:
+            limiter.acquire(url)
+        return session_get(*args, **kwargs)
+
+    if cache is None:
+        return get(rewrite_url(url), params=params, headers=headers, timeout=timeout)
+
+    meta, body = cache.load(url, params)
+    request_headers = dict(headers or {})
+    if meta is not None:
+        ttl = cache.ttls.get(endpoint_family(url), cache.ttls["default"])
+        if time.time() - meta["fetched_at"] < ttl:
+            cache._count("hits")
+            return response_from_cache(meta, body)
+        cached_headers = CaseInsensitiveDict(meta["headers"])
+        if cached_headers.get("etag"):
+            request_headers["If-None-Match"] = cached_headers["etag"]
+        if cached_headers.get("last-modified"):
+            request_headers["If-Modified-Since"] = cached_headers["last-modified"]
+
+    response = get(rewrite_url(url), params=params, headers=request_headers, timeout=timeout)
+    if response.status_code == 304 and meta is not None:
+        cache.touch(url, params, meta)
+        cache._count("revalidated")
+        return response_from_cache(meta, body)
+    cache._count("misses")
+    if response.status_code == 200:
+        cache.store(url, params, response)
+    return response
+
+
+# -------------------------
+# 录制 / 回放语料库
+# -------------------------
+class PageCorpus:
+    """
+    把抓取到的页面存进单个 zip（deflate 压缩）语料库，供离线回放。
+    键与 HttpCache 相同（URL + 参数）；mode="record" 新建语料库，mode="replay" 只读。
+    回放时语料库中没有的页面返回 404，不会联网、也不会触发重试。
+    """
+
+    def __init__(self, path, mode="replay"):
+        if mode not in {"record", "replay"}:
+            raise ValueError(f"未知的语料库模式: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.counters = {"recorded": 0, "served": 0, "missing": 0}
+        self._lock = threading.Lock()
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._zip = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._zip = zipfile.ZipFile(self.path, "r")
+        self._names = set(self._zip.namelist())
+
+    def __len__(self):
+        return sum(name.endswith(".json") for name in self._names)
+
+    def urls(self):
+        """语料库中所有页面的 URL。"""
+        with self._lock:
+            return [json.loads(self._zip.read(name))["url"] for name in sorted(self._names) if name.endswith(".json")]
+
+    def record(self, url, params, response):
+        key = HttpCache.key(url, params)
+        with self._lock:
+            if f"{key}.json" in self._names:
+                return
+            self._zip.writestr(f"{key}.body", response.content)
+            self._zip.writestr(f"{key}.json", json.dumps(response_meta(response, url)))
+            self._names.update({f"{key}.body", f"{key}.json"})
+            self.counters["recorded"] += 1
+
+    def replay(self, url, params=None):
+        key = HttpCache.key(url, params)
+        with self._lock:
+            if f"{key}.json" not in self._names:
+                self.counters["missing"] += 1
+                response = requests.Response()
+                response.status_code = 404
+                response._content = b""
+                response.url = url
+                return response
+            meta = json.loads(self._zip.read(f"{key}.json"))
+            body = self._zip.read(f"{key}.body")
+            self.counters["served"] += 1
+        return response_from_cache(meta, body)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
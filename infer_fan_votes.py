@@ -0,0 +1,187 @@
+"""
+批量 CPU 推断：读取一个或多个 best_model_s*.pth，对全部历史重新估计粉丝票份额，写出 estimated_fan_votes.csv。
+
+与 notebook 的提取循环（extract_loader 逐组前向、再按 (season, week) 分组回填）相比：
+  - 数据集从 dwts_dataset 的打包缓存读取，每个权重按其训练折的标准化参数（排除该测试赛季）标准化；
+  - 在 torch.inference_mode 下赛季并行推断：全部赛季沿 batch 维堆叠，按周推进，每个权重只需 ~11 次前向；
+  - 结果按 row_index 一次散回面板各行，多个权重时各占一列，estimated_fan_vote 为其均值；
+  - 可选把模型 trace 成 TorchScript（FanVoteScorer）保存并用于推断；
+  - 输出每个权重与总体的吞吐（groups/sec）。
+
+用法：
+    python infer_fan_votes.py                                      # 全部 best_model_s*.pth → estimated_fan_votes.csv
+    python infer_fan_votes.py --checkpoints best_model_s34.pth     # 只用一个权重
+    python infer_fan_votes.py --torchscript-dir ./torchscript      # 导出 TorchScript 并用它推断
+    python infer_fan_votes.py --verify                             # 与逐组提取循环对比结果与吞吐
+"""
+import argparse
+import glob
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+from dwts_dataset import CACHE_DIR, DATA_PATH, DWTSDataset
+from dwts_model import HYPERPARAMS, FanVoteScorer, build_model, predict_groups, predict_seasons
+
+OUTPUT_PATH = './estimated_fan_votes.csv'
+CHECKPOINT_PATTERN = './best_model_s*.pth'
+
+
+def checkpoint_season(path):
+    """best_model_s34.pth → 34；文件名里没有赛季号时返回 None。"""
+    match = re.search(r'_s(\d+)\.pth$', str(path))
+    return int(match.group(1)) if match else None
+
+
+def load_checkpoint(path, hyperparams=HYPERPARAMS, device='cpu'):
+    """
+    rank_prior 只影响 SeasonAwareFusion 的初始值，load_state_dict 会覆盖全部参数，
+    因此这里统一用默认的 rank_prior=False 建模，对 notebook 全量单元格（rank_prior=True）训练的权重同样适用。
+    """
+    model = build_model(hyperparams)
+    model.load_state_dict(torch.load(path, map_location=device))
+    return model.to(device).eval()
+
+
+def checkpoint_dataset(raw_dataset, path, standardize='fold'):
+    """
+    按权重对应的训练折标准化：best_model_s{S}.pth 在排除赛季 S 的数据上训练，标准化参数也只在这些赛季上拟合；
+    standardize='all'（或文件名没有赛季号）时在全部数据上拟合，与全量训练单元格相同。
+    """
+    season = checkpoint_season(path)
+    exclude = [season] if standardize == 'fold' and season is not None else None
+    return raw_dataset.subset(standardizer=raw_dataset.fit_standardizer(exclude=exclude))
+
+
+def export_torchscript(model, dataset, path, device='cpu'):
+    """把 FanVoteScorer(model) trace 成 TorchScript 并冻结、保存；返回可直接调用的模块。"""
+    scorer = FanVoteScorer(model).eval()
+    batch = {k: v.to(device) for k, v in dataset.batch(np.arange(min(len(dataset), 8))).items()}
+    v_prev = batch['mask'] / batch['mask'].sum(dim=1, keepdim=True)
+    example = (batch['X_skill'], batch['X_pop'], batch['X_ctx'], batch['industry_code'],
+               batch['mask'], batch['season'], v_prev)
+    with torch.no_grad():
+        traced = torch.jit.freeze(torch.jit.trace(scorer, example))
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(traced, str(path))
+    return traced
+
+
+def fan_vote_frame(df, dataset, columns):
+    """
+    columns 为 {列名: (G, N_max) 数组}：按 row_index 一次散回面板各行（超出 N_max 被截断的行为 NaN），
+    输出按 (season, week, celebrity_name) 排序，与 notebook 导出的 estimated_fan_votes.csv 行序相同。
+    """
+    out = df.copy()
+    valid = dataset.row_index >= 0
+    rows = dataset.row_index[valid]
+    for name, values in columns.items():
+        column = np.full(len(df), np.nan)
+        column[rows] = values[valid]
+        out[name] = column
+    return out.sort_values(['season', 'week', 'celebrity_name']).reset_index(drop=True)
+
+
+def run_inference(df, checkpoints, hyperparams=HYPERPARAMS, cache_dir=CACHE_DIR, standardize='fold',
+                  torchscript_dir=None, device='cpu', verbose=True):
+    """对每个权重做赛季并行推断，返回 (结果表, 吞吐统计表)。"""
+    raw_dataset = DWTSDataset.cached(df, cache_dir, N_max=hyperparams['N_max'])
+    columns, stats = {}, []
+    for path in checkpoints:
+        model = load_checkpoint(path, hyperparams, device)
+        dataset = checkpoint_dataset(raw_dataset, path, standardize)
+        scorer = None
+        if torchscript_dir is not None:
+            scorer = export_torchscript(model, dataset, Path(torchscript_dir) / (Path(path).stem + '.pt'), device)
+
+        t0 = time.perf_counter()
+        v_hat = predict_seasons(model, dataset, device, scorer=scorer)
+        seconds = time.perf_counter() - t0
+
+        season = checkpoint_season(path)
+        columns[f'estimated_fan_vote_s{season}' if season is not None else Path(path).stem] = v_hat
+        stats.append({'checkpoint': Path(path).name, 'groups': len(dataset), 'seconds': seconds,
+                      'groups_per_sec': len(dataset) / seconds})
+        if verbose:
+            print(f"✓ {Path(path).name}: {len(dataset)} 组, {seconds:.3f}s, {len(dataset) / seconds:,.0f} groups/sec")
+
+    if len(columns) == 1:
+        columns = {'estimated_fan_vote': next(iter(columns.values()))}
+    else:
+        columns['estimated_fan_vote'] = np.mean(list(columns.values()), axis=0)
+    return fan_vote_frame(df, raw_dataset, columns), pd.DataFrame(stats)
+
+
+def verify_inference(df, checkpoints, hyperparams=HYPERPARAMS, cache_dir=CACHE_DIR, standardize='fold',
+                     device='cpu', repeats=5):
+    """
+    每个权重分别用逐组提取循环、赛季并行（eager）与 TorchScript 推断，比较 v_hat 最大差异与吞吐
+    （预热一次后取 repeats 次的中位数）。
+    """
+    import tempfile
+
+    raw_dataset = DWTSDataset.cached(df, cache_dir, N_max=hyperparams['N_max'])
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in checkpoints:
+            model = load_checkpoint(path, hyperparams, device)
+            dataset = checkpoint_dataset(raw_dataset, path, standardize)
+            scorer = export_torchscript(model, dataset, Path(tmp) / 'scorer.pt', device)
+            row = {'checkpoint': Path(path).name}
+            results = {}
+            for mode, func in [
+                ('per_group', lambda: predict_groups(model, dataset, device)),
+                ('batched', lambda: predict_seasons(model, dataset, device)),
+                ('torchscript', lambda: predict_seasons(model, dataset, device, scorer=scorer)),
+            ]:
+                results[mode] = func()  # 预热（TorchScript 前几次调用会做图优化）
+                times = []
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    func()
+                    times.append(time.perf_counter() - t0)
+                row[f'{mode}_groups_per_sec'] = len(dataset) / sorted(times)[len(times) // 2]
+            row['batched_max_abs_diff'] = float(np.abs(results['batched'] - results['per_group']).max())
+            row['torchscript_max_abs_diff'] = float(np.abs(results['torchscript'] - results['per_group']).max())
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量 CPU 推断粉丝票份额")
+    parser.add_argument("--checkpoints", nargs='+', default=[CHECKPOINT_PATTERN], help="权重文件或通配符")
+    parser.add_argument("--data", default=DATA_PATH, help="面板数据 CSV")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="输出 CSV")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="数据集缓存目录")
+    parser.add_argument("--standardize", choices=['fold', 'all'], default='fold',
+                        help="fold：按权重的训练折拟合标准化；all：在全部数据上拟合")
+    parser.add_argument("--torchscript-dir", default=None, help="导出 TorchScript 到该目录并用它推断")
+    parser.add_argument("--threads", type=int, default=None, help="torch 线程数")
+    parser.add_argument("--verify", action="store_true", help="与逐组提取循环对比结果与吞吐（不写输出）")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    matches = {pattern: glob.glob(pattern) for pattern in args.checkpoints}
+    unmatched = [pattern for pattern, found in matches.items() if not found]
+    if unmatched:
+        parser.error(f"没有匹配的权重文件: {', '.join(unmatched)}")
+    paths = sorted({p for found in matches.values() for p in found})
+    df_raw = pd.read_csv(args.data)
+
+    if args.verify:
+        print(verify_inference(df_raw, paths, cache_dir=args.cache_dir, standardize=args.standardize).to_string(index=False))
+        raise SystemExit
+
+    t0 = time.perf_counter()
+    df_output, stats = run_inference(df_raw, paths, cache_dir=args.cache_dir, standardize=args.standardize,
+                                     torchscript_dir=args.torchscript_dir)
+    df_output.to_csv(args.output, index=False)
+    total = stats['groups'].sum()
+    print(f"✓ 文件已保存: {args.output} ({len(df_output)} 行, {len(paths)} 个权重)")
+    print(f"✓ 推断吞吐: {total / stats['seconds'].sum():,.0f} groups/sec "
+          f"（含读取与导出共 {time.perf_counter() - t0:.2f}s）")
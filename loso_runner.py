@@ -0,0 +1,319 @@
+"""
+LOSO（留一赛季）交叉验证的多进程训练器。
+
+各折互相独立：父进程只构建一次数据集缓存（dwts_dataset），再把折分发到进程池，
+每个子进程用 torch.set_num_threads 限定线程数、从缓存目录打开同一份打包张量，训练完写出
+best_model_s{season}.pth。每完成一折就把结果并入 loso_results.csv（按赛季排序、原子替换），
+中途中断后可用 --resume 跳过已完成的折。
+
+每折的随机种子只取决于 seed 和测试赛季，结果与折的执行顺序、进程数无关。
+--season-batched 时每折改用赛季并行训练（全部训练赛季沿 batch 维堆叠、按周推进，每个 epoch ~11 步）。
+
+用法：
+    python loso_runner.py                                   # 最后 5 个赛季，按 CPU 核数开进程
+    python loso_runner.py --seasons all --threads 2         # 全部 34 折，每个进程 2 个线程
+    python loso_runner.py --seasons 30,31 --workers 1       # 在当前进程内顺序训练
+    python loso_runner.py --benchmark                       # 对比逐组与赛季并行的每 epoch 耗时，并校验推断一致
+"""
+import argparse
+import copy
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+from dwts_dataset import CACHE_DIR, DATA_PATH, DWTSDataset
+from dwts_model import (
+    HYPERPARAMS, build_criterion, build_model, evaluate, evaluate_seasons, predict_groups, predict_seasons,
+    train_one_epoch, train_one_epoch_seasons,
+)
+
+RESULTS_PATH = './loso_results.csv'
+RESULT_COLUMNS = ['test_season', 'test_loss', 'hit_rate_2', 'best_epoch', 'epochs_run', 'train_seconds']
+
+
+def train_fold(dataset, test_season, hyperparams=HYPERPARAMS, checkpoint_dir='.', seed=0,
+               device='cpu', log=print, season_batched=False):
+    """
+    训练并评估一折（与 notebook 的 LOSO 循环相同：每 10 个 epoch 检查一次训练损失，
+    保存最优权重、连续 early_stop_patience 次不改善则早停，最后用最优权重在测试赛季上评估）。
+    season_batched=True 时训练改为赛季并行；测试折只有一个赛季，评估结果与逐组版本相同。
+    """
+    t0 = time.perf_counter()
+    torch.manual_seed(seed + int(test_season))
+
+    standardizer = dataset.fit_standardizer(exclude=[test_season])
+    train_dataset = dataset.subset(exclude=[test_season], standardizer=standardizer)
+    test_dataset = dataset.subset(seasons=[test_season], standardizer=standardizer)
+    train_loader = train_dataset.loader(batch_size=hyperparams['batch_size'], shuffle=False)
+    test_loader = test_dataset.loader(batch_size=hyperparams['batch_size'], shuffle=False)
+
+    model = build_model(hyperparams).to(device)
+    criterion = build_criterion(hyperparams)
+    optimizer = torch.optim.Adam(model.parameters(), lr=hyperparams['learning_rate'])
+    scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+        optimizer, mode='min', factor=0.5, patience=5
+    )
+
+    best_val_loss = float('inf')
+    best_state = copy.deepcopy(model.state_dict())
+    best_epoch = 0
+    patience_counter = 0
+    epoch = 0
+
+    for epoch in range(1, hyperparams['num_epochs'] + 1):
+        if season_batched:
+            train_loss, train_components = train_one_epoch_seasons(
+                model, train_dataset, criterion, optimizer, device
+            )
+        else:
+            train_loss, train_components = train_one_epoch(
+                model, train_loader, criterion, optimizer, device
+            )
+
+        if epoch % 10 == 0:
+            log(f"[S{test_season}] Epoch {epoch}: Loss={train_loss:.4f}, "
+                f"elim={train_components['elim']:.4f}, "
+                f"kl={train_components['kl']:.4f}")
+
+            if train_loss < best_val_loss:
+                best_val_loss = train_loss
+                best_state = copy.deepcopy(model.state_dict())
+                best_epoch = epoch
+                patience_counter = 0
+            else:
+                patience_counter += 1
+
+            if patience_counter >= hyperparams['early_stop_patience']:
+                log(f"[S{test_season}] 早停触发")
+                break
+
+            scheduler.step(train_loss)
+
+    checkpoint = Path(checkpoint_dir) / f'best_model_s{test_season}.pth'
+    tmp = checkpoint.with_name(checkpoint.name + f'.{os.getpid()}.tmp')
+    torch.save(best_state, tmp)
+    os.replace(tmp, checkpoint)
+
+    model.load_state_dict(best_state)
+    if season_batched:
+        test_loss, test_hit_rate = evaluate_seasons(model, test_dataset, criterion, device)
+    else:
+        test_loss, test_hit_rate = evaluate(model, test_loader, criterion, device)
+    log(f"[S{test_season}] 测试结果: Loss={test_loss:.4f}, Hit-rate@2={test_hit_rate:.4f}")
+
+    return {
+        'test_season': int(test_season),
+        'test_loss': test_loss,
+        'hit_rate_2': test_hit_rate,
+        'best_epoch': best_epoch,
+        'epochs_run': epoch,
+        'train_seconds': time.perf_counter() - t0,
+    }
+
+
+# ==================== 子进程 ====================
+_worker_dataset = {}
+
+
+def _init_worker(threads):
+    torch.set_num_threads(threads)
+
+
+def _run_fold(cache_dir, test_season, hyperparams, checkpoint_dir, seed, device, season_batched):
+    if cache_dir not in _worker_dataset:
+        _worker_dataset[cache_dir] = DWTSDataset.load(cache_dir)
+    log = lambda message: print(message, flush=True)
+    return train_fold(_worker_dataset[cache_dir], test_season, hyperparams,
+                      checkpoint_dir=checkpoint_dir, seed=seed, device=device, log=log,
+                      season_batched=season_batched)
+
+
+def _write_results(rows, results_path):
+    results_df = pd.DataFrame(rows, columns=RESULT_COLUMNS).sort_values('test_season').reset_index(drop=True)
+    tmp = Path(f'{results_path}.{os.getpid()}.tmp')
+    results_df.to_csv(tmp, index=False)
+    os.replace(tmp, results_path)
+    return results_df
+
+
+def _load_finished(results_path, checkpoint_dir):
+    """--resume：结果表中已有、且权重文件存在的折视为完成。"""
+    if not Path(results_path).exists():
+        return []
+    done = pd.read_csv(results_path)
+    done = done[[
+        (Path(checkpoint_dir) / f'best_model_s{int(s)}.pth').exists() for s in done['test_season']
+    ]]
+    return done.reindex(columns=RESULT_COLUMNS).to_dict('records')
+
+
+def run_loso(df, test_seasons, hyperparams=HYPERPARAMS, workers=None, threads=None,
+             cache_dir=CACHE_DIR, checkpoint_dir='.', results_path=RESULTS_PATH,
+             seed=0, device='cpu', resume=False, season_batched=False):
+    """
+    把 test_seasons 中的每一折分发到进程池训练，返回按赛季排序的结果表（同时写入 results_path）。
+    workers 默认取 min(折数, CPU 核数)，threads 默认把 CPU 核平均分给各进程；workers=1 时在当前进程内顺序训练，
+    结束后恢复原来的 torch 线程数。两种方式下某一折失败都只打印并记录，其余折照常训练。
+    """
+    DWTSDataset.cached(df, cache_dir, N_max=hyperparams['N_max'], verbose=True)
+    Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
+
+    rows = _load_finished(results_path, checkpoint_dir) if resume else []
+    finished = {int(row['test_season']) for row in rows}
+    pending = [int(s) for s in test_seasons if int(s) not in finished]
+    if finished:
+        print(f"✓ 跳过已完成的 {len(finished)} 折: {sorted(finished)}")
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(len(pending), cpus if workers is None else workers))
+    threads = max(1, cpus // workers) if threads is None else threads
+    print(f"✓ LOSO: {len(pending)} 折, {workers} 个进程 × {threads} 个线程")
+
+    failed = []
+    t0 = time.perf_counter()
+
+    def _collect(season, row):
+        rows.append(row)
+        _write_results(rows, results_path)
+        print(f"✓ 完成赛季 {season} ({len(rows) - len(finished)}/{len(pending)}, "
+              f"{time.perf_counter() - t0:.1f}s): Hit-rate@2={row['hit_rate_2']:.4f}", flush=True)
+
+    def _fail(season):
+        failed.append(season)
+        print(f"✗ 赛季 {season} 训练失败:\n{traceback.format_exc()}", flush=True)
+
+    if workers == 1:
+        previous_threads = torch.get_num_threads()
+        torch.set_num_threads(threads)
+        try:
+            dataset = DWTSDataset.load(cache_dir)
+            for season in pending:
+                try:
+                    row = train_fold(dataset, season, hyperparams, checkpoint_dir=checkpoint_dir,
+                                     seed=seed, device=device, season_batched=season_batched)
+                except Exception:
+                    _fail(season)
+                    continue
+                _collect(season, row)
+        finally:
+            torch.set_num_threads(previous_threads)
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = {
+                pool.submit(_run_fold, cache_dir, season, hyperparams, checkpoint_dir, seed, device,
+                            season_batched): season
+                for season in pending
+            }
+            for future in as_completed(futures):
+                season = futures[future]
+                try:
+                    row = future.result()
+                except Exception:
+                    _fail(season)
+                    continue
+                _collect(season, row)
+
+    results_df = _write_results(rows, results_path)
+    if failed:
+        print(f"⚠️  失败的折: {sorted(failed)}（可用 --resume 重跑）")
+    return results_df
+
+
+def benchmark_season_batched(dataset, hyperparams=HYPERPARAMS, epochs=3, seed=0, device='cpu'):
+    """
+    在全量（已标准化）数据上，从同一初始权重分别用逐组与赛季并行训练 epochs 个 epoch，比较每 epoch 耗时；
+    再用训练后的模型校验赛季并行的推断 / 评估与逐组版本一致。返回 (耗时表, 校验结果)。
+    """
+    criterion = build_criterion(hyperparams)
+    rows, models = [], {}
+    for mode in ['per-group', 'season-batched']:
+        torch.manual_seed(seed)
+        model = build_model(hyperparams).to(device)
+        optimizer = torch.optim.Adam(model.parameters(), lr=hyperparams['learning_rate'])
+        loader = dataset.loader(batch_size=1)
+        times = []
+        for _ in range(epochs):
+            t0 = time.perf_counter()
+            if mode == 'season-batched':
+                loss, _ = train_one_epoch_seasons(model, dataset, criterion, optimizer, device)
+            else:
+                loss, _ = train_one_epoch(model, loader, criterion, optimizer, device)
+            times.append(time.perf_counter() - t0)
+        steps = len(dataset.season_schedule()[1]) if mode == 'season-batched' else len(dataset)
+        rows.append({'mode': mode, 'steps_per_epoch': steps, 'sec_per_epoch': sorted(times)[len(times) // 2],
+                     'last_loss': loss})
+        models[mode] = model
+    timing = pd.DataFrame(rows)
+    timing['speedup'] = timing['sec_per_epoch'].iloc[0] / timing['sec_per_epoch']
+
+    model = models['per-group']
+    checks = {'v_hat_max_abs_diff': float(np.abs(
+        predict_groups(model, dataset, device) - predict_seasons(model, dataset, device)
+    ).max())}
+    checks['hit_rate_2'] = (evaluate(model, dataset.loader(batch_size=1), criterion, device)[1],
+                            evaluate_seasons(model, dataset, criterion, device)[1])
+    loss_diffs = []
+    for season in dataset.season_schedule()[0]:
+        single = dataset.subset(seasons=[season], standardizer=dataset.standardizer)
+        loss_diffs.append(abs(evaluate(model, single.loader(batch_size=1), criterion, device)[0]
+                              - evaluate_seasons(model, single, criterion, device)[0]))
+    checks['single_season_loss_max_abs_diff'] = max(loss_diffs)
+    return timing, checks
+
+
+def parse_seasons(spec, all_seasons):
+    """'last5' / 'all' / '30,31,32'。"""
+    all_seasons = sorted(int(s) for s in all_seasons)
+    if spec == 'all':
+        return all_seasons
+    if spec.startswith('last'):
+        return all_seasons[-int(spec[4:]):]
+    return [int(s) for s in spec.split(',') if s.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LOSO 交叉验证多进程训练")
+    parser.add_argument("--data", default=DATA_PATH, help="面板数据 CSV")
+    parser.add_argument("--seasons", default="last5", help="测试赛季：last5 / all / 逗号分隔的赛季号")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 min(折数, CPU 核数)）")
+    parser.add_argument("--threads", type=int, default=None, help="每个进程的 torch 线程数（默认平均分配 CPU 核）")
+    parser.add_argument("--epochs", type=int, default=None, help="覆盖 num_epochs")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（每折再加上赛季号）")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="数据集缓存目录")
+    parser.add_argument("--checkpoint-dir", default='.', help="best_model_s*.pth 输出目录")
+    parser.add_argument("--results", default=RESULTS_PATH, help="结果 CSV")
+    parser.add_argument("--resume", action="store_true", help="跳过结果表中已完成的折")
+    parser.add_argument("--season-batched", action="store_true", help="赛季并行训练（赛季沿 batch 维堆叠、按周推进）")
+    parser.add_argument("--benchmark", action="store_true", help="对比逐组与赛季并行的每 epoch 耗时，并校验推断一致")
+    args = parser.parse_args()
+
+    hyperparams = dict(HYPERPARAMS)
+    if args.epochs is not None:
+        hyperparams['num_epochs'] = args.epochs
+
+    df_raw = pd.read_csv(args.data)
+    if args.benchmark:
+        raw = DWTSDataset.cached(df_raw, args.cache_dir, N_max=hyperparams['N_max'])
+        timing, checks = benchmark_season_batched(raw.subset(standardizer=raw.fit_standardizer()), hyperparams,
+                                                  seed=args.seed)
+        print(timing.to_string(index=False))
+        for name, value in checks.items():
+            print(f"  {name}: {value}")
+        raise SystemExit
+    seasons = parse_seasons(args.seasons, df_raw['season'].unique())
+    results_df = run_loso(
+        df_raw, seasons, hyperparams, workers=args.workers, threads=args.threads,
+        cache_dir=args.cache_dir, checkpoint_dir=args.checkpoint_dir, results_path=args.results,
+        seed=args.seed, resume=args.resume, season_batched=args.season_batched,
+    )
+    print(results_df.to_string(index=False))
+    print(f"\n平均 Hit-rate@2: {results_df['hit_rate_2'].mean():.4f}")
@@ -0,0 +1,304 @@
+"""
+选手名字解析：统一的名字标准化（含 NAME_MANUAL_MAP 手动映射）、从 "Joey & Ashly" 这类组合中取明星名，
+以及可复用的模糊匹配索引 NameIndex。
+
+NameIndex 的匹配规则与 notebook 中的 fuzzy_match_celebrity 相同（精确 → 互相包含取最短 → 姓氏相同取最短
+→ 至少 2 个词重合取重合最多），但不再把每个查询与全部目标逐一比较：
+  - 互相包含：用字符三元组倒排表分块，"查询 ⊂ 目标" 只看查询最稀有三元组的倒排表，"目标 ⊂ 查询" 只看
+    开头三元组出现在查询中的目标，再只对候选做字符串校验；
+  - 姓氏相同：按最后一个词分块直接查表；
+  - 词重合：用词倒排表统计候选的重合词数。
+同等长度 / 同等重合数时按名字字典序取第一个，结果不再依赖集合迭代顺序（PYTHONHASHSEED）。
+解析结果可存入 AliasCache（JSON），目标名单或手动映射变化时缓存自动失效。
+
+用法：
+    python name_index.py --benchmark     # 与逐一比较的旧实现对比耗时并校验结果一致
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+# 名字手动映射表
+NAME_MANUAL_MAP = {
+    'aj mclean': 'aj mclean',
+    'a j mclean': 'aj mclean',
+    'dj tanner': 'candace cameron bure',
+    'the situation': 'mike sorrentino',
+    'vanilla ice': 'robert van winkle',
+    'mr t': 'mr t',
+}
+
+NGRAM = 3
+
+
+def normalize_name(name, manual_map=None):
+    """增强版名字标准化"""
+    if pd.isna(name):
+        return ''
+    name = str(name).lower()
+    name = name.replace("'", "").replace("-", " ").replace(".", "").replace(",", "")
+    name = name.replace("&", " ").replace("  ", " ")
+    name = ' '.join(name.split())
+
+    manual_map = NAME_MANUAL_MAP if manual_map is None else manual_map
+    if name in manual_map:
+        return manual_map[name]
+
+    return name
+
+
+def normalize_names(names, manual_map=None):
+    """对一列名字做标准化：只对去重后的取值调用 normalize_name，再映射回各行。"""
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    normalized = pd.Series([normalize_name(name, manual_map) for name in uniques], dtype=object)
+    return pd.Series(normalized.to_numpy()[codes], index=names.index)
+
+
+def celebrity_from_couple(couples):
+    """周次明细的 Celebrity 列是 "明星 & 舞伴" 形式，取 & 之前的明星名。"""
+    return couples.fillna('').str.strip().str.split('&').str[0].str.strip()
+
+
+def dedupe_names(names, manual_map=None):
+    """按标准化后的名字去重（如 "A.J. McLean" 与 "AJ McLean"），保留字典序最前的原始写法。"""
+    kept = {}
+    for name in sorted(set(names)):
+        kept.setdefault(normalize_name(name, manual_map) or name, name)
+    return sorted(kept.values())
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class NameIndex:
+    """
+    对一组目标名字（如趋势表中的明星）建立索引，把查询名字解析为其中之一。
+    目标与查询都先经 normalize_name（含手动映射）标准化，空名字不参与匹配。
+    """
+
+    def __init__(self, names, manual_map=None):
+        self.manual_map = NAME_MANUAL_MAP if manual_map is None else manual_map
+        self.targets = sorted({normalize_name(name, self.manual_map) for name in names} - {''})
+        self._target_set = set(self.targets)
+        self._by_gram = defaultdict(list)
+        self._by_lead_gram = defaultdict(list)
+        self._short = []
+        self._by_last = defaultdict(list)
+        self._by_token = defaultdict(list)
+        for target in self.targets:
+            grams = _ngrams(target)
+            if grams:
+                for gram in grams:
+                    self._by_gram[gram].append(target)
+                self._by_lead_gram[target[:NGRAM]].append(target)
+            else:
+                self._short.append(target)
+            tokens = target.split()
+            self._by_last[tokens[-1]].append(target)
+            for token in set(tokens):
+                self._by_token[token].append(target)
+
+    def fingerprint(self):
+        payload = json.dumps([self.targets, sorted(self.manual_map.items())], ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _substring_candidates(self, query):
+        grams = _ngrams(query)
+        if not grams:
+            # 查询不足 3 个字符时无法分块，直接在全部目标里找
+            return [t for t in self.targets if query in t or t in query]
+        # 查询 ⊂ 目标：目标必含查询的每个三元组，取最短的倒排表作候选
+        rarest = min((self._by_gram.get(gram, ()) for gram in grams), key=len)
+        candidates = {t for t in rarest if query in t}
+        # 目标 ⊂ 查询：目标开头的三元组必在查询中
+        for gram in grams:
+            candidates.update(t for t in self._by_lead_gram.get(gram, ()) if t in query)
+        candidates.update(t for t in self._short if t in query)
+        return list(candidates)
+
+    def resolve(self, name):
+        """返回 (目标名字, 匹配方式)；方式为 exact / substring / last_name / token_overlap，未匹配为 (None, None)。"""
+        query = normalize_name(name, self.manual_map)
+        if not query:
+            return None, None
+        if query in self._target_set:
+            return query, 'exact'
+
+        matches = self._substring_candidates(query)
+        if matches:
+            return min(matches, key=lambda t: (len(t), t)), 'substring'
+
+        tokens = query.split()
+        if len(tokens[-1]) > 2 and self._by_last.get(tokens[-1]):
+            return min(self._by_last[tokens[-1]], key=lambda t: (len(t), t)), 'last_name'
+
+        overlap = Counter()
+        for token in set(tokens):
+            overlap.update(self._by_token.get(token, ()))
+        best = max(overlap.values(), default=0)
+        if best >= 2:
+            return min(t for t, n in overlap.items() if n == best), 'token_overlap'
+        return None, None
+
+    def resolve_many(self, names, cache=None):
+        """
+        批量解析，返回 {查询名字: 目标名字或 None}；cache 为 AliasCache 时先查缓存、再把新结果写回。
+        self.last_methods 记录本次各匹配方式（含 cached）的次数。
+        """
+        resolved = {}
+        methods = Counter()
+        for name in names:
+            hit = cache.get(name) if cache is not None else None
+            if hit is not None:
+                resolved[name] = hit[0]
+                methods['cached'] += 1
+                continue
+            target, method = self.resolve(name)
+            resolved[name] = target
+            methods[method or 'unmatched'] += 1
+            if cache is not None:
+                cache.put(name, target, method)
+        if cache is not None:
+            cache.save()
+        self.last_methods = methods
+        return resolved
+
+
+class AliasCache:
+    """
+    名字解析结果的持久缓存：{"fingerprint": ..., "aliases": {查询: [目标或 null, 匹配方式]}}。
+    fingerprint 取自 NameIndex（目标名单 + 手动映射），不一致时整个缓存作废重建。
+    """
+
+    def __init__(self, path, index):
+        self.path = Path(path)
+        self.fingerprint = index.fingerprint()
+        self.aliases = {}
+        self._dirty = False
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+            except ValueError:
+                data = {}
+            if data.get('fingerprint') == self.fingerprint:
+                self.aliases = data.get('aliases', {})
+
+    def get(self, name):
+        return self.aliases.get(name)
+
+    def put(self, name, target, method):
+        self.aliases[name] = [target, method]
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        payload = {'fingerprint': self.fingerprint, 'aliases': self.aliases}
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding='utf-8')
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+# ==================== 旧实现（逐一比较，仅供 benchmark 对照）====================
+def _fuzzy_match_legacy(panel_name, trend_names, trend_tokens_map):
+    """notebook 中的 fuzzy_match_celebrity；trend_names 按字典序迭代以得到确定的并列取舍。"""
+    if not panel_name:
+        return None
+    if panel_name in trend_tokens_map:
+        return panel_name
+
+    substring_matches = [
+        trend_name for trend_name in trend_names
+        if panel_name in trend_name or trend_name in panel_name
+    ]
+    if substring_matches:
+        return min(substring_matches, key=len)
+
+    panel_tokens = panel_name.split()
+    if panel_tokens:
+        panel_last = panel_tokens[-1]
+        if len(panel_last) > 2:
+            last_matches = [
+                trend_name for trend_name in trend_names
+                if (trend_name.split()[-1] if trend_name else '') == panel_last
+            ]
+            if last_matches:
+                return min(last_matches, key=len)
+
+        panel_token_set = set(panel_tokens)
+        best_match = None
+        best_overlap = 0
+        for trend_name in trend_names:
+            overlap = len(panel_token_set & trend_tokens_map[trend_name])
+            if overlap > best_overlap and overlap >= 2:
+                best_match = trend_name
+                best_overlap = overlap
+        if best_match:
+            return best_match
+
+    return None
+
+
+def benchmark_name_index(queries, targets, repeats=3):
+    """对比逐一比较与索引解析的耗时（秒，取中位数），并统计两者结果不同的查询数。"""
+    index = NameIndex(targets)
+    trend_names = index.targets
+    trend_tokens_map = {name: set(name.split()) for name in trend_names}
+    normalized = [normalize_name(q) for q in queries]
+
+    def _median(func):
+        times, result = [], None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - t0)
+        return sorted(times)[len(times) // 2], result
+
+    t_build, _ = _median(lambda: NameIndex(targets))
+    t_old, old = _median(lambda: [_fuzzy_match_legacy(q, trend_names, trend_tokens_map) for q in normalized])
+    t_new, new = _median(lambda: [index.resolve(q)[0] for q in queries])
+    return {
+        'queries': len(queries),
+        'targets': len(trend_names),
+        'legacy_s': t_old,
+        'index_build_s': t_build,
+        'index_s': t_new,
+        'speedup': t_old / (t_new + t_build),
+        'mismatches': sum(a != b for a, b in zip(old, new)),
+        'matched': sum(b is not None for b in new),
+    }
+
+
+def _synthetic_names(base, n, seed=0):
+    """用真实名字的名 / 姓随机组合出更大的名单，用于放大规模的基准。"""
+    rng = random.Random(seed)
+    firsts = [name.split()[0] for name in base if name.split()]
+    lasts = [name.split()[-1] for name in base if len(name.split()) > 1]
+    return [f"{rng.choice(firsts)} {rng.choice(lasts)}" for _ in range(n)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="选手名字解析索引")
+    parser.add_argument("--benchmark", action="store_true", help="与逐一比较的旧实现对比耗时并校验结果一致")
+    parser.add_argument("--panel", default="panel_data_clean_v2.csv", help="查询名字来源（celebrity_name 列）")
+    parser.add_argument("--trends", default="dwts_historical_trends.csv", help="目标名字来源（celebrity_name 列）")
+    parser.add_argument("--scale", type=int, default=20_000, help="放大规模基准的查询 / 目标数")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        queries = sorted(pd.read_csv(args.panel)['celebrity_name'].dropna().astype(str).unique())
+        targets = sorted(pd.read_csv(args.trends, usecols=['celebrity_name'])['celebrity_name'].dropna().unique())
+        rows = [{'case': 'real', **benchmark_name_index(queries, targets)}]
+        rows.append({'case': f'synthetic x{args.scale}', **benchmark_name_index(
+            _synthetic_names(targets, args.scale, seed=1), _synthetic_names(targets, args.scale, seed=2), repeats=1,
+        )})
+        print(pd.DataFrame(rows).to_string(index=False))
@@ -14,37 +14,63 @@ Dependencies:
   pip install pandas numpy matplotlib seaborn
 (Optional for parquet)
   pip install pyarrow
+
+matplotlib/seaborn are imported only when figures are rendered, so
+`--no-figures` (data tables only) runs without loading them.
 """
 
 from __future__ import annotations
 import re
 import os
+import json
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import argparse
+import shutil
+import subprocess
+import sys
+import time
 import numpy as np
 import pandas as pd
 
-import matplotlib.pyplot as plt
-import seaborn as sns
+# Plotting libraries are loaded on first use: every plot_* function calls _import_plotting()
+plt = None
+sns = None
 
 
 # -------------------------
 # Config: plotting
 # -------------------------
+PLOT_THEME = {
+    "style": "whitegrid",
+    "context": "talk",
+    "font": "DejaVu Sans",
+}
+PLOT_RC = {
+    "figure.dpi": 140,
+    "savefig.dpi": 300,
+    "axes.titleweight": "bold",
+    "axes.labelweight": "bold",
+    "axes.spines.top": False,
+    "axes.spines.right": False,
+}
+
+
+def _import_plotting():
+    """Import matplotlib/seaborn into module globals on first use."""
+    global plt, sns
+    if plt is None:
+        import matplotlib.pyplot as _plt
+        import seaborn as _sns
+        plt, sns = _plt, _sns
+
+
 def set_plot_style():
-    sns.set_theme(
-        style="whitegrid",
-        context="talk",
-        font="DejaVu Sans",
-    )
-    plt.rcParams.update({
-        "figure.dpi": 140,
-        "savefig.dpi": 300,
-        "axes.titleweight": "bold",
-        "axes.labelweight": "bold",
-        "axes.spines.top": False,
-        "axes.spines.right": False,
-    })
+    _import_plotting()
+    sns.set_theme(**PLOT_THEME)
+    plt.rcParams.update(PLOT_RC)
 
 
 # -------------------------
@@ -62,6 +88,15 @@ def find_score_cols(columns):
     return sorted(score_cols, key=key)
 
 
+def parse_score_cols(score_cols):
+    """Return (week, judge) int arrays for each column of `score_cols`."""
+    pairs = np.array(
+        [[int(x) for x in WEEK_JUDGE_RE.match(c).groups()] for c in score_cols],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
 def parse_elim_week_from_results(s: str):
     """results examples:
        'Eliminated Week 3', '1st Place', '2nd Place', 'Withdrew', ...
@@ -77,30 +112,160 @@ def safe_to_parquet(df: pd.DataFrame, path: Path):
     try:
         df.to_parquet(path, index=False)
         return True
-    except Exception:
+    except Exception as exc:
+        print(f"- Parquet unavailable ({exc.__class__.__name__}), wrote {path.with_suffix('.csv').name} instead")
         df.to_csv(path.with_suffix(".csv"), index=False, encoding="utf-8-sig")
         return False
 
 
+# -------------------------
+# Compact dtype schema
+# -------------------------
+STRING_DIMS = [
+    "celebrity_name", "ballroom_partner", "celebrity_industry",
+    "celebrity_homestate", "celebrity_homecountry_region", "results",
+]
+SCORE_DTYPE = "float32"
+UINT8_COLS = ["week", "judge", "n_judges", "weeks_competed"]
+NULLABLE_INT_COLS = ["season", "placement", "celebrity_age_during_season"]
+
+
+def raw_dtypes(columns) -> dict:
+    """read_csv dtypes that load the raw table straight into the compact schema."""
+    dtypes = {}
+    for c in columns:
+        name = "celebrity_homecountry_region" if c == "celebrity_homecountry/region" else c
+        if WEEK_JUDGE_RE.match(c):
+            dtypes[c] = SCORE_DTYPE
+        elif name in STRING_DIMS:
+            dtypes[c] = "category"
+    return dtypes
+
+
+def _compact_int(s: pd.Series) -> pd.Series:
+    """Smallest nullable integer dtype that holds `s` (float32 if not integral)."""
+    s = pd.to_numeric(s, errors="coerce")
+    if pd.api.types.is_float_dtype(s.dtype) and (s.dropna() % 1 != 0).any():
+        return s.astype(SCORE_DTYPE)
+    lo, hi = s.min(), s.max()
+    if pd.isna(lo):
+        return s.astype("UInt8")
+    prefix = "UInt" if lo >= 0 else "Int"
+    for bits in (8, 16, 32, 64):
+        info = np.iinfo(f"{prefix.lower()}{bits}")
+        if info.min <= lo and hi <= info.max:
+            return s.astype(f"{prefix}{bits}")
+    return s.astype("Int64")
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast a raw/intermediate frame to the compact schema.
+
+    String dimensions -> category, scores and other floats -> float32,
+    week/judge counts -> uint8, season/placement -> smallest nullable int.
+    """
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if c in STRING_DIMS:
+            s = s.astype("category")
+        elif c in UINT8_COLS and not s.isna().any():
+            s = s.astype("uint8")
+        elif c in NULLABLE_INT_COLS or pd.api.types.is_integer_dtype(s.dtype):
+            s = _compact_int(s)
+        elif pd.api.types.is_float_dtype(s.dtype):
+            s = s.astype(SCORE_DTYPE)
+        out[c] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def default_nbytes(df: pd.DataFrame) -> int:
+    """Deep memory `df` would take with the default dtypes (object strings, 64-bit numbers).
+
+    Computed from category counts, so the default-typed frame is never built.
+    """
+    total = df.index.memory_usage()
+    for c in df.columns:
+        s = df[c]
+        n = len(s)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            counts = s.cat.codes.value_counts()
+            sizes = np.array([sys.getsizeof(v) for v in s.cat.categories], dtype=np.int64)
+            n_missing = counts.get(-1, 0)
+            counts = counts.drop(-1, errors="ignore")
+            total += 8 * n + int((sizes[counts.index.to_numpy()] * counts.to_numpy()).sum())
+            total += n_missing * sys.getsizeof(np.nan)
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.dtype.kind in "iuf":
+            total += 9 * n  # Int64 / Float64: 8-byte values + 1-byte mask
+        elif s.dtype == bool:
+            total += n
+        elif s.dtype.kind in "iuf":
+            total += 8 * n
+        else:
+            total += s.memory_usage(deep=True, index=False)
+    return int(total)
+
+
+def compact_artifacts(artifacts: dict, keys=("df_clean_wide", "long", "weekly",
+                                             "contestant_summary", "season_summary")) -> pd.DataFrame:
+    """Cast artifacts to the compact schema in place; return per-artifact memory saved.
+
+    `default_mb` is the footprint with the default dtypes, `compact_mb` the actual
+    footprint after the cast.
+    """
+    rows = []
+    for key in keys:
+        frame = artifacts.get(key)
+        if frame is None:
+            continue
+        artifacts[key] = compact_frame(frame)
+        before = default_nbytes(artifacts[key])
+        after = artifacts[key].memory_usage(deep=True).sum()
+        rows.append({
+            "artifact": key,
+            "default_mb": before / 2**20,
+            "compact_mb": after / 2**20,
+            "saved_pct": 100.0 * (1 - after / before) if before else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def _strip_strings(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # strip the (few) categories instead of every row
+        codes = s.cat.codes.to_numpy()
+        cats = np.asarray(s.cat.categories.astype(str).str.strip(), dtype=object)
+        cats[cats == "nan"] = np.nan
+        values = np.where(codes >= 0, cats[codes], np.nan)
+        return pd.Series(pd.Categorical(values), index=s.index, name=s.name)
+    # strip each distinct value once; missing values map to the trailing NaN slot
+    codes, uniques = pd.factorize(s)
+    values = np.asarray(pd.Index(np.asarray(uniques).astype(str)).str.strip(), dtype=object)
+    values[values == "nan"] = np.nan
+    values = np.append(values, np.nan)
+    return pd.Series(values[codes], index=s.index, name=s.name, dtype=object)
+
+
 # -------------------------
 # Core preprocessing
 # -------------------------
-def load_raw(input_csv: Path) -> pd.DataFrame:
-    df = pd.read_csv(input_csv)
+def clean_raw(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """Rename, strip and type-cast a raw frame (the whole file or one chunk of it)."""
     # Rename column to avoid slash in name
     if "celebrity_homecountry/region" in df.columns:
         df = df.rename(columns={"celebrity_homecountry/region": "celebrity_homecountry_region"})
 
     # Basic cleanup for strings
-    str_cols = [
-        "celebrity_name", "ballroom_partner", "celebrity_industry",
-        "celebrity_homestate", "celebrity_homecountry_region", "results"
-    ]
-    for c in str_cols:
+    for c in STRING_DIMS:
         if c in df.columns:
-            df[c] = df[c].astype(str).str.strip().replace({"nan": np.nan})
+            df[c] = _strip_strings(df[c])
 
     # Enforce numeric types
+    if compact:
+        for c in NULLABLE_INT_COLS:
+            if c in df.columns:
+                df[c] = _compact_int(df[c])
+        return df
     if "season" in df.columns:
         df["season"] = pd.to_numeric(df["season"], errors="coerce").astype("Int64")
     if "placement" in df.columns:
@@ -111,59 +276,183 @@ def load_raw(input_csv: Path) -> pd.DataFrame:
     return df
 
 
-def preprocess(df_raw: pd.DataFrame):
-    df = df_raw.copy()
-    score_cols = find_score_cols(df.columns)
+def load_raw(input_csv: Path, compact: bool = False) -> pd.DataFrame:
+    """Read the raw CSV; `compact=True` parses straight into the compact schema."""
+    dtype = None
+    if compact:
+        dtype = raw_dtypes(pd.read_csv(input_csv, nrows=0).columns)
+    return clean_raw(pd.read_csv(input_csv, dtype=dtype), compact=compact)
+
+
+def iter_raw_chunks(input_csv: Path, chunksize: int = 100_000, compact: bool = False):
+    """Yield cleaned `chunksize`-row pieces of the raw CSV (see `clean_raw`)."""
+    dtype = None
+    if compact:
+        dtype = raw_dtypes(pd.read_csv(input_csv, nrows=0).columns)
+    with pd.read_csv(input_csv, dtype=dtype, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield clean_raw(chunk, compact=compact)
+
+
+ID_COLS = [
+    "celebrity_name", "ballroom_partner", "celebrity_industry",
+    "celebrity_homestate", "celebrity_homecountry_region",
+    "celebrity_age_during_season", "season", "results", "placement",
+]
+WEEKLY_KEYS = ["season", "celebrity_name", "ballroom_partner"]
+
+
+def build_score_cube(df_scores: pd.DataFrame, score_cols):
+    """Reshape the wide score block into a (rows x weeks x judges) array.
+
+    Week/judge combinations without a column in the input stay NaN and are
+    flagged False in `present`, so the long table can skip them.
+    """
+    col_weeks, col_judges = parse_score_cols(score_cols)
+    weeks = np.unique(col_weeks)
+    judges = np.unique(col_judges)
+    wi = np.searchsorted(weeks, col_weeks)
+    ji = np.searchsorted(judges, col_judges)
+
+    cube = np.full((len(df_scores), len(weeks), len(judges)), np.nan)
+    cube[:, wi, ji] = df_scores[score_cols].to_numpy(dtype=np.float64)
+    present = np.zeros((len(weeks), len(judges)), dtype=bool)
+    present[wi, ji] = True
+    return {"scores": cube, "weeks": weeks, "judges": judges, "present": present}
+
+
+def build_long(df_scores: pd.DataFrame, score_cols, cube: dict = None) -> pd.DataFrame:
+    """Long judge-score table (one row per contestant x week x judge column).
+
+    Same rows/order as melting `score_cols` of `df_scores`; built straight from
+    the score cube so no string parsing of melted column names is needed.
+    """
+    if cube is None:
+        cube = build_score_cube(df_scores, score_cols)
+    id_cols = [c for c in ID_COLS if c in df_scores.columns]
+    n_rows = len(df_scores)
+    col_weeks, col_judges = parse_score_cols(score_cols)
+
+    # column-major like melt: every row for the first score column, then the next ...
+    long = df_scores[id_cols].iloc[np.tile(np.arange(n_rows), len(score_cols))].reset_index(drop=True)
+    wi = np.searchsorted(cube["weeks"], col_weeks)
+    ji = np.searchsorted(cube["judges"], col_judges)
+    long["judge_score"] = cube["scores"][:, wi, ji].T.ravel()
+    long["week"] = np.repeat(col_weeks, n_rows)
+    long["judge"] = np.repeat(col_judges, n_rows)
+    return long
+
+
+def get_long(artifacts: dict) -> pd.DataFrame:
+    """Materialize (and memoize) the long table for a `preprocess` result."""
+    if artifacts.get("long") is None and artifacts.get("df_clean_wide") is not None:
+        artifacts["long"] = build_long(
+            artifacts["df_clean_wide"], artifacts["score_cols"], artifacts.get("score_cube")
+        )
+    return artifacts["long"]
+
+
+def _nansum_compensated(values: np.ndarray) -> np.ndarray:
+    """NaN-skipping sum over the last axis with Kahan compensation.
+
+    Matches pandas' groupby sum bit-for-bit, so fractional judge scores
+    (e.g. 9.6667) aggregate to exactly the same totals as the melt path.
+    """
+    total = np.zeros(values.shape[:-1])
+    comp = np.zeros(values.shape[:-1])
+    for k in range(values.shape[-1]):
+        v = values[..., k]
+        ok = ~np.isnan(v)
+        y = np.where(ok, v - comp, 0.0)
+        t = total + y
+        comp = np.where(ok, (t - total) - y, comp)
+        total = np.where(ok, t, total)
+    return total
+
+
+def weekly_rows(df_scores: pd.DataFrame, cube: dict) -> pd.DataFrame:
+    """One row per contestant-row x week with the judge_total / n_judges partials.
+
+    Rows with a missing key are dropped (as groupby would); `combine_weekly`
+    turns these partials into the weekly table. Partials from several chunks
+    of the same input can be concatenated before combining.
+    """
+    scores = cube["scores"]
+    weeks = cube["weeks"]
+    totals = _nansum_compensated(scores)
+    counts = (~np.isnan(scores)).sum(axis=2)
+
+    n_weeks = len(weeks)
+    rows = df_scores[WEEKLY_KEYS].iloc[np.repeat(np.arange(len(df_scores)), n_weeks)].reset_index(drop=True)
+    rows["week"] = np.tile(weeks, len(df_scores))
+    rows["judge_total"] = totals.ravel()
+    rows["n_judges"] = counts.ravel().astype(np.int64)
+    return rows.dropna(subset=WEEKLY_KEYS)
+
+
+def combine_weekly(rows: pd.DataFrame) -> pd.DataFrame:
+    """Sort (or pool duplicates of) weekly partials and derive judge_mean / competed."""
+    keys = WEEKLY_KEYS + ["week"]
+    if rows.duplicated(subset=keys).any():
+        # same contestant listed twice in a season: pool their judge scores
+        weekly = rows.groupby(keys, as_index=False, observed=True)[["judge_total", "n_judges"]].sum()
+    else:
+        weekly = rows.sort_values(keys, kind="mergesort").reset_index(drop=True)
+
+    n = weekly["n_judges"].to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weekly["judge_mean"] = np.where(n > 0, weekly["judge_total"].to_numpy() / n, np.nan)
+    weekly["competed"] = weekly["n_judges"] > 0
+    return weekly
+
+
+def aggregate_weekly(df_scores: pd.DataFrame, cube: dict) -> pd.DataFrame:
+    """Per contestant-week judge_total / n_judges / judge_mean via masked reductions."""
+    return combine_weekly(weekly_rows(df_scores, cube))
+
 
-    # Convert score cols to numeric
-    df[score_cols] = df[score_cols].apply(pd.to_numeric, errors="coerce")
+def clean_scores(df_raw: pd.DataFrame, score_cols):
+    """Copy of `df_raw` with numeric score columns where 0 is treated as missing.
 
+    Returns (df_scores, block) where block is the float64 score matrix.
+    """
     # IMPORTANT:
     # In this dataset, "0 score" indicates eliminated (or not competing) after that week.
     # We treat 0 as missing score (not a real judge score).
-    df_scores = df.copy()
-    df_scores[score_cols] = df_scores[score_cols].mask(df_scores[score_cols] == 0, np.nan)
-
-    # Build long judge score table
-    id_cols = [
-        "celebrity_name", "ballroom_partner", "celebrity_industry",
-        "celebrity_homestate", "celebrity_homecountry_region",
-        "celebrity_age_during_season", "season", "results", "placement",
-    ]
-    # keep only those that exist (robust)
-    id_cols = [c for c in id_cols if c in df_scores.columns]
-
-    long = df_scores.melt(
-        id_vars=id_cols,
-        value_vars=score_cols,
-        var_name="week_judge",
-        value_name="judge_score",
-    )
-    long[["week", "judge"]] = long["week_judge"].str.extract(r"^week(\d+)_judge(\d+)_score$").astype(int)
-    long = long.drop(columns=["week_judge"])
+    df_scores = df_raw.copy()
+    block = df_scores[score_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    block[block == 0] = np.nan
+    # keep float32 score columns when the input was loaded with the compact schema
+    compact_scores = all(df_raw[c].dtype == SCORE_DTYPE for c in score_cols)
+    df_scores[score_cols] = block.astype(SCORE_DTYPE) if compact_scores else block
+    return df_scores, block
+
+
+def missing_pivot_from_counts(n_missing: pd.Series, n_rows: int) -> pd.DataFrame:
+    """Week x judge missing-rate pivot from per-column missing counts."""
+    score_cols = list(n_missing.index)
+    col_weeks, col_judges = parse_score_cols(score_cols)
+    miss = pd.DataFrame({"col": score_cols, "week": col_weeks, "judge": col_judges})
+    miss["missing_rate"] = n_missing.to_numpy() / n_rows if n_rows else np.nan
+    return miss.pivot(index="week", columns="judge", values="missing_rate").sort_index()
 
-    # Weekly aggregate per contestant
-    weekly = (
-        long.groupby(["season", "celebrity_name", "ballroom_partner", "week"], as_index=False)
-            .agg(
-                judge_total=("judge_score", "sum"),
-                n_judges=("judge_score", "count"),
-                judge_mean=("judge_score", "mean"),
-            )
-    )
-    weekly["competed"] = weekly["n_judges"] > 0
 
+def summarize(weekly: pd.DataFrame, meta: pd.DataFrame) -> dict:
+    """Season/contestant summaries and weekly features from the weekly table.
+
+    `meta` holds the ID_COLS of every contestant row of the wide table.
+    """
     # Last competed week (use competed=True)
     last_week = (
         weekly[weekly["competed"]]
-        .groupby(["season", "celebrity_name"], as_index=False)["week"]
+        .groupby(["season", "celebrity_name"], as_index=False, observed=True)["week"]
         .max()
         .rename(columns={"week": "last_competed_week"})
     )
 
     # Elimination week from results, then fallback to last_competed_week for finalists/withdrew
-    meta = df_scores[id_cols].copy()
-    meta["elim_week_from_results"] = meta["results"].apply(parse_elim_week_from_results)
+    meta = meta.copy()
+    meta["elim_week_from_results"] = meta["results"].astype(object).apply(parse_elim_week_from_results)
 
     meta = meta.merge(last_week, on=["season", "celebrity_name"], how="left")
     meta["elim_week"] = meta["elim_week_from_results"].fillna(meta["last_competed_week"])
@@ -182,7 +471,7 @@ def preprocess(df_raw: pd.DataFrame):
     # Contestant summary (features for modeling)
     contestant_summary = (
         weekly[weekly["competed"]]
-        .groupby(["season", "celebrity_name", "ballroom_partner"], as_index=False)
+        .groupby(["season", "celebrity_name", "ballroom_partner"], as_index=False, observed=True)
         .agg(
             avg_judge_total=("judge_total", "mean"),
             std_judge_total=("judge_total", "std"),
@@ -201,7 +490,7 @@ def preprocess(df_raw: pd.DataFrame):
 
     # Extra weekly features (useful for vote estimation / later models)
     # - within-week judge rank (1 = best) per season-week
-    weekly_feat = weekly.copy()
+    weekly_feat = weekly
     weekly_feat["judge_rank_in_week"] = weekly_feat.groupby(["season", "week"])["judge_total"] \
         .rank(method="min", ascending=False)
     weekly_feat["judge_percent_in_week"] = weekly_feat["judge_total"] / weekly_feat.groupby(["season", "week"])["judge_total"] \
@@ -209,22 +498,219 @@ def preprocess(df_raw: pd.DataFrame):
     # normalized by max possible (10 points per judge)
     weekly_feat["judge_total_norm"] = weekly_feat["judge_total"] / (10.0 * weekly_feat["n_judges"].replace(0, np.nan))
 
+    return {
+        "weekly": weekly_feat,
+        "contestant_summary": contestant_summary,
+        "season_summary": season_summary,
+    }
+
+
+def preprocess(df_raw: pd.DataFrame, materialize_long: bool = False):
+    score_cols = find_score_cols(df_raw.columns)
+    df_scores, block = clean_scores(df_raw, score_cols)
+    cube = build_score_cube(df_scores, score_cols)
+    id_cols = [c for c in ID_COLS if c in df_scores.columns]
+
+    # Weekly aggregate per contestant + summaries
+    weekly = aggregate_weekly(df_scores, cube)
+    summaries = summarize(weekly, df_scores[id_cols])
+
     # missingness table (week x judge)
-    miss = pd.DataFrame({"col": score_cols})
-    miss[["week", "judge"]] = miss["col"].str.extract(r"^week(\d+)_judge(\d+)_score$").astype(int)
-    miss["missing_rate"] = df_scores[score_cols].isna().mean().values
-    miss_pivot = miss.pivot(index="week", columns="judge", values="missing_rate").sort_index()
+    n_missing = pd.Series(np.isnan(block).sum(axis=0), index=score_cols)
+    miss_pivot = missing_pivot_from_counts(n_missing, len(df_scores))
 
-    return {
+    artifacts = {
         "df_raw": df_raw,
         "df_clean_wide": df_scores,
         "score_cols": score_cols,
-        "long": long,
-        "weekly": weekly_feat,
-        "contestant_summary": contestant_summary,
-        "season_summary": season_summary,
+        "score_cube": cube,
+        "long": None,
+        **summaries,
         "missing_pivot": miss_pivot,
     }
+    if materialize_long:
+        get_long(artifacts)
+    return artifacts
+
+
+def _concat_chunks(frames) -> pd.DataFrame:
+    """Concatenate per-chunk frames, unioning categoricals so they stay categorical."""
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    out = pd.concat(frames, ignore_index=True)
+    for c in frames[0].columns:
+        if isinstance(frames[0][c].dtype, pd.CategoricalDtype) and not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = pd.api.types.union_categoricals([f[c] for f in frames], sort_categories=True)
+    return out
+
+
+def preprocess_streaming(input_csv: Path, chunksize: int = 100_000, compact: bool = False,
+                         wide_csv: Path = None, verbose: bool = True):
+    """`preprocess` over the CSV read `chunksize` rows at a time.
+
+    Only one chunk of the wide table is held in memory: each chunk is cleaned,
+    reduced to its weekly partials (`weekly_rows`) and ID columns, and dropped.
+    The weekly table, summaries and missingness pivot equal those of
+    `preprocess(load_raw(input_csv))`. The cleaned wide table is appended to
+    `wide_csv` chunk by chunk when given; `df_clean_wide` and `long` are None
+    in the returned artifacts.
+    """
+    parts, metas = [], []
+    n_missing = None
+    n_rows = 0
+    score_cols = None
+    for i, chunk in enumerate(iter_raw_chunks(input_csv, chunksize=chunksize, compact=compact)):
+        if score_cols is None:
+            score_cols = find_score_cols(chunk.columns)
+        df_scores, block = clean_scores(chunk, score_cols)
+        cube = build_score_cube(df_scores, score_cols)
+        parts.append(weekly_rows(df_scores, cube))
+        metas.append(df_scores[[c for c in ID_COLS if c in df_scores.columns]])
+        counts = np.isnan(block).sum(axis=0)
+        n_missing = counts if n_missing is None else n_missing + counts
+        n_rows += len(df_scores)
+        if wide_csv is not None:
+            # BOM + header once, like DataFrame.to_csv(encoding="utf-8-sig")
+            df_scores.to_csv(wide_csv, index=False, mode="w" if i == 0 else "a", header=i == 0,
+                             encoding="utf-8-sig" if i == 0 else "utf-8")
+        del chunk, df_scores, block, cube
+        if verbose:
+            print(f"- Streamed chunk {i + 1}: {n_rows} rows")
+
+    weekly = combine_weekly(_concat_chunks(parts))
+    del parts
+    summaries = summarize(weekly, _concat_chunks(metas))
+    return {
+        "df_raw": None,
+        "df_clean_wide": None,
+        "score_cols": score_cols,
+        "score_cube": None,
+        "long": None,
+        **summaries,
+        "missing_pivot": missing_pivot_from_counts(pd.Series(n_missing, index=score_cols), n_rows),
+    }
+
+
+# -------------------------
+# Incremental (per-season) preprocessing
+# -------------------------
+CACHE_VERSION = 1
+SEASON_ARTIFACTS = ["df_clean_wide", "weekly", "contestant_summary", "season_summary"]
+
+
+def season_fingerprints(df_raw: pd.DataFrame, season_key: pd.Series) -> dict:
+    """Content hash (values + schema) of each season's slice of the raw table.
+
+    Rows are hashed once for the whole frame; each season's digest covers its
+    row hashes in input order. Returns {season_key: (fingerprint, row positions)}.
+    """
+    schema = repr([(c, str(t)) for c, t in df_raw.dtypes.items()]).encode("utf-8")
+    row_hash = pd.util.hash_pandas_object(df_raw, index=False).to_numpy()
+    codes, keys = pd.factorize(season_key, sort=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+    out = {}
+    for i, key in enumerate(keys):
+        rows = order[bounds[i]:bounds[i + 1]]
+        h = hashlib.sha1(schema)
+        h.update(row_hash[rows].tobytes())
+        out[key] = (h.hexdigest(), rows)
+    return out
+
+
+def _season_cache_key(season) -> str:
+    return "none" if pd.isna(season) else str(int(season))
+
+
+def preprocess_incremental(df_raw: pd.DataFrame, cache_dir: Path, verbose: bool = True):
+    """Same artifacts as `preprocess`, recomputing only seasons whose input changed.
+
+    Each season's slice of the input is fingerprinted. Per-season partials
+    (wide slice, weekly, contestant/season summaries, missing counts) live in
+    one season-keyed store under `cache_dir`; on refresh the rows of changed or
+    removed seasons are dropped and freshly computed partials appended.
+    Cross-season outputs are re-derived from the store; `long` is left to `get_long`.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = cache_dir / "manifest.json"
+    store_path = cache_dir / "season_artifacts.pkl"
+
+    manifest = {}
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except ValueError:
+            manifest = {}
+    store = None
+    if manifest.get("version") == CACHE_VERSION and store_path.exists():
+        try:
+            store = pd.read_pickle(store_path)
+        except Exception:
+            store = None
+    cached = manifest.get("seasons", {}) if store is not None else {}
+
+    score_cols = find_score_cols(df_raw.columns)
+    season_key = df_raw["season"].map(_season_cache_key)
+    fingerprints = season_fingerprints(df_raw, season_key)
+    stale = [k for k, (fp, _) in fingerprints.items() if cached.get(k) != fp]
+    removed = [k for k in cached if k not in fingerprints]
+
+    if stale or removed:
+        drop = set(stale) | set(removed)
+        parts = {name: [] for name in SEASON_ARTIFACTS + ["n_missing"]}
+        if store is not None:
+            for name in SEASON_ARTIFACTS:
+                frame = store[name]
+                parts[name].append(frame[~frame["season"].map(_season_cache_key).isin(drop)])
+            parts["n_missing"].append(store["n_missing"].drop(index=list(drop), errors="ignore"))
+        if stale:
+            # every artifact is partitioned by season, so all stale seasons go in one pass
+            rows = np.sort(np.concatenate([fingerprints[k][1] for k in stale]))
+            art = preprocess(df_raw.iloc[rows])
+            for name in SEASON_ARTIFACTS:
+                parts[name].append(art[name])
+            wide = art["df_clean_wide"]
+            parts["n_missing"].append(wide[score_cols].isna().groupby(season_key.iloc[rows]).sum())
+
+        store = {"df_clean_wide": pd.concat(parts["df_clean_wide"])}
+        for name in SEASON_ARTIFACTS[1:]:
+            store[name] = (
+                pd.concat(parts[name])
+                .sort_values("season", kind="mergesort")
+                .reset_index(drop=True)
+            )
+        store["n_missing"] = pd.concat(parts["n_missing"])
+        pd.to_pickle(store, store_path)
+        manifest = {"version": CACHE_VERSION, "seasons": {k: fp for k, (fp, _) in fingerprints.items()}}
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    if verbose:
+        print(f"- Incremental cache: {len(fingerprints) - len(stale)} season(s) reused, "
+              f"{len(stale)} recomputed {stale}")
+
+    # cached wide rows may carry stale labels if rows moved in the input;
+    # relabel each season's block with its current positions
+    wide = store["df_clean_wide"]
+    keys = list(fingerprints)
+    codes = pd.Categorical(wide["season"].map(_season_cache_key), categories=keys).codes
+    wide = wide.iloc[np.argsort(codes, kind="stable")]
+    wide.index = df_raw.index[np.concatenate([fingerprints[k][1] for k in keys])]
+    wide = wide.sort_index()
+
+    n_missing = store["n_missing"][score_cols].sum()
+    return {
+        "df_raw": df_raw,
+        "df_clean_wide": wide,
+        "score_cols": score_cols,
+        "score_cube": None,
+        "long": None,
+        "weekly": store["weekly"],
+        "contestant_summary": store["contestant_summary"],
+        "season_summary": store["season_summary"],
+        "missing_pivot": missing_pivot_from_counts(n_missing, len(wide)),
+    }
 
 
 # -------------------------
@@ -238,6 +724,7 @@ def savefig(fig, path: Path):
 
 
 def plot_season_contestants(season_summary: pd.DataFrame, outdir: Path):
+    _import_plotting()
     fig, ax = plt.subplots(figsize=(12, 5))
     sns.lineplot(data=season_summary, x="season", y="n_contestants", marker="o", ax=ax)
     ax.set_title("Number of Contestants per Season")
@@ -247,6 +734,7 @@ def plot_season_contestants(season_summary: pd.DataFrame, outdir: Path):
 
 
 def plot_season_length(season_summary: pd.DataFrame, outdir: Path):
+    _import_plotting()
     fig, ax = plt.subplots(figsize=(12, 5))
     sns.lineplot(data=season_summary, x="season", y="season_length", marker="o", ax=ax)
     ax.set_title("Season Length (Max Week with Competition)")
@@ -256,6 +744,7 @@ def plot_season_length(season_summary: pd.DataFrame, outdir: Path):
 
 
 def plot_age_distribution(df_clean_wide: pd.DataFrame, outdir: Path):
+    _import_plotting()
     fig, ax = plt.subplots(figsize=(10, 5))
     sns.histplot(df_clean_wide["celebrity_age_during_season"].dropna(), bins=20, kde=True, ax=ax)
     ax.set_title("Celebrity Age Distribution")
@@ -265,6 +754,7 @@ def plot_age_distribution(df_clean_wide: pd.DataFrame, outdir: Path):
 
 
 def plot_industry_counts(df_clean_wide: pd.DataFrame, outdir: Path, topk: int = 15):
+    _import_plotting()
     ind = df_clean_wide["celebrity_industry"].value_counts().head(topk).reset_index()
     ind.columns = ["industry", "count"]
 
@@ -277,6 +767,7 @@ def plot_industry_counts(df_clean_wide: pd.DataFrame, outdir: Path, topk: int =
 
 
 def plot_missingness_heatmap(missing_pivot: pd.DataFrame, outdir: Path):
+    _import_plotting()
     fig, ax = plt.subplots(figsize=(8, 6))
     sns.heatmap(
         missing_pivot,
@@ -292,6 +783,7 @@ def plot_missingness_heatmap(missing_pivot: pd.DataFrame, outdir: Path):
 
 
 def plot_avg_judge_total_by_week(weekly: pd.DataFrame, outdir: Path):
+    _import_plotting()
     # average across all seasons, only competed weeks
     tmp = weekly[weekly["competed"]].groupby("week", as_index=False)["judge_total"].mean()
 
@@ -304,6 +796,7 @@ def plot_avg_judge_total_by_week(weekly: pd.DataFrame, outdir: Path):
 
 
 def plot_season_week_heatmap(weekly: pd.DataFrame, outdir: Path):
+    _import_plotting()
     # season x week matrix of avg judge_total
     tmp = (weekly[weekly["competed"]]
            .groupby(["season", "week"], as_index=False)["judge_total"].mean())
@@ -318,6 +811,7 @@ def plot_season_week_heatmap(weekly: pd.DataFrame, outdir: Path):
 
 
 def plot_placement_vs_score(contestant_summary: pd.DataFrame, outdir: Path):
+    _import_plotting()
     # placement: 1 is best; score: higher is better
     tmp = contestant_summary.dropna(subset=["placement", "avg_judge_total"]).copy()
     tmp["placement"] = tmp["placement"].astype(int)
@@ -332,10 +826,13 @@ def plot_placement_vs_score(contestant_summary: pd.DataFrame, outdir: Path):
 
 
 def plot_industry_score_box(contestant_summary: pd.DataFrame, outdir: Path, topk: int = 10):
+    _import_plotting()
     # Focus on industries with enough samples
     vc = contestant_summary["celebrity_industry"].value_counts()
     keep = vc.head(topk).index
     tmp = contestant_summary[contestant_summary["celebrity_industry"].isin(keep)].copy()
+    # compact schema: don't let seaborn draw empty slots for unused categories
+    tmp["celebrity_industry"] = tmp["celebrity_industry"].astype(object)
 
     fig, ax = plt.subplots(figsize=(14, 7))
     sns.boxplot(data=tmp, x="celebrity_industry", y="avg_judge_total", ax=ax)
@@ -346,47 +843,320 @@ def plot_industry_score_box(contestant_summary: pd.DataFrame, outdir: Path, topk
     savefig(fig, outdir / "figures" / "industry_box_avg_score.png")
 
 
-def run_eda(artifacts: dict, outdir: Path):
-    df_clean = artifacts["df_clean_wide"]
-    season_summary = artifacts["season_summary"]
-    weekly = artifacts["weekly"]
-    contestant_summary = artifacts["contestant_summary"]
-    missing_pivot = artifacts["missing_pivot"]
+# (function, artifact key, input columns or None for the whole frame, kwargs, figure file)
+EDA_PLOTS = [
+    (plot_season_contestants, "season_summary", ["season", "n_contestants"], {}, "season_n_contestants.png"),
+    (plot_season_length, "season_summary", ["season", "season_length"], {}, "season_length.png"),
+    (plot_age_distribution, "df_clean_wide", ["celebrity_age_during_season"], {}, "age_distribution.png"),
+    (plot_industry_counts, "df_clean_wide", ["celebrity_industry"], {"topk": 15}, "industry_topk.png"),
+    (plot_missingness_heatmap, "missing_pivot", None, {}, "missingness_week_judge.png"),
+    (plot_avg_judge_total_by_week, "weekly", ["week", "judge_total", "competed"], {}, "avg_judge_total_by_week.png"),
+    (plot_season_week_heatmap, "weekly", ["season", "week", "judge_total", "competed"], {},
+     "season_week_judge_total_heatmap.png"),
+    (plot_placement_vs_score, "contestant_summary", ["placement", "avg_judge_total"], {},
+     "placement_vs_avg_score.png"),
+    (plot_industry_score_box, "contestant_summary", ["celebrity_industry", "avg_judge_total"], {"topk": 10},
+     "industry_box_avg_score.png"),
+]
+RENDER_MANIFEST = ".render_manifest.json"
+
+
+def plot_input_hash(func, frame: pd.DataFrame, kwargs: dict) -> str:
+    """Hash of everything a figure depends on: data, kwargs, style config and plot code."""
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    h.update(repr((list(frame.columns), [str(t) for t in frame.dtypes])).encode("utf-8"))
+    h.update(repr((sorted(kwargs.items()), PLOT_THEME, sorted(PLOT_RC.items()))).encode("utf-8"))
+    h.update(inspect.getsource(func).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _render_plot(func, frame: pd.DataFrame, kwargs: dict, outdir: Path):
+    set_plot_style()
+    func(frame, outdir, **kwargs)
+
+
+def run_eda(artifacts: dict, outdir: Path, jobs: int = None, force: bool = False):
+    """Render the EDA figures, skipping those whose inputs are unchanged.
 
-    plot_season_contestants(season_summary, outdir)
-    plot_season_length(season_summary, outdir)
-    plot_age_distribution(df_clean, outdir)
-    plot_industry_counts(df_clean, outdir, topk=15)
-    plot_missingness_heatmap(missing_pivot, outdir)
-    plot_avg_judge_total_by_week(weekly, outdir)
-    plot_season_week_heatmap(weekly, outdir)
-    plot_placement_vs_score(contestant_summary, outdir)
-    plot_industry_score_box(contestant_summary, outdir, topk=10)
+    Figures are rendered in a process pool of `jobs` workers (default: one per
+    figure, capped at the CPU count); `jobs=1` renders in-process. A figure is
+    skipped when its file exists and the hash of its input columns, kwargs,
+    style config and plotting code matches the last run. If any figure fails,
+    the others are still rendered and recorded, then a RuntimeError is raised.
+    """
+    outdir = Path(outdir)
+    fig_dir = outdir / "figures"
+    fig_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = fig_dir / RENDER_MANIFEST
+    manifest = {}
+    if manifest_path.exists() and not force:
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except ValueError:
+            manifest = {}
+
+    todo = []
+    hashes = {}
+    skipped = 0
+    for func, key, cols, kwargs, fname in EDA_PLOTS:
+        if artifacts.get(key) is None:
+            # source table not held in memory (streaming mode)
+            skipped += 1
+            continue
+        frame = artifacts[key] if cols is None else artifacts[key][cols]
+        hashes[fname] = plot_input_hash(func, frame, kwargs)
+        if manifest.get(fname) == hashes[fname] and (fig_dir / fname).exists():
+            continue
+        todo.append((func, frame, kwargs, fname))
+
+    if jobs is None:
+        jobs = min(len(todo), os.cpu_count() or 1)
+    rendered = {}
+    failed = {}
+    if jobs <= 1:
+        for func, frame, kwargs, fname in todo:
+            try:
+                _render_plot(func, frame, kwargs, outdir)
+            except Exception as exc:
+                failed[fname] = exc
+                continue
+            rendered[fname] = hashes[fname]
+    elif todo:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(_render_plot, func, frame, kwargs, outdir): fname
+                for func, frame, kwargs, fname in todo
+            }
+            for fut in as_completed(futures):
+                fname = futures[fut]
+                try:
+                    fut.result()
+                except Exception as exc:
+                    failed[fname] = exc
+                    continue
+                rendered[fname] = hashes[fname]
+
+    # keep entries of skipped figures, refresh the ones just rendered
+    known = {fname for *_, fname in EDA_PLOTS}
+    manifest = {f: h for f, h in manifest.items() if f in known and (fig_dir / f).exists()}
+    manifest.update(rendered)
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    msg = f"- Figures: {len(rendered)} rendered, {len(hashes) - len(todo)} unchanged"
+    print(msg + (f", {skipped} skipped (source table not loaded)" if skipped else ""))
+    if failed:
+        # raise only after the manifest is saved, so figures that did render are not redone
+        for fname, exc in failed.items():
+            print(f"- Figure {fname} failed: {exc!r}")
+        raise RuntimeError(f"{len(failed)} figure(s) failed to render: {', '.join(sorted(failed))}")
 
 
 # -------------------------
 # Save artifacts
 # -------------------------
-def save_outputs(artifacts: dict, outdir: Path):
+ARTIFACT_FILES = {
+    "df_clean_wide": "dwts_clean_wide",
+    "long": "dwts_long_scores",
+    "weekly": "dwts_weekly",
+    "contestant_summary": "dwts_contestant_summary",
+    "season_summary": "dwts_season_summary",
+}
+OUTPUT_FORMATS = ["csv", "parquet", "arrow"]
+ROW_COL = "_row"
+
+
+def _write_dataset(frame: pd.DataFrame, path: Path, fmt: str):
+    """Season-partitioned (hive layout) Parquet or Arrow IPC dataset.
+
+    A `_row` column records the original row order, which partition
+    discovery would otherwise lose.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if path.exists():
+        shutil.rmtree(path)
+    frame = frame.reset_index(drop=True).assign(**{ROW_COL: np.arange(len(frame))})
+    # categoricals go out as plain values: a sliced dictionary array would carry
+    # the full category list into every partition file
+    categories = {
+        c: frame[c].cat.categories.tolist()
+        for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)
+    }
+    frame = frame.astype({c: object for c in categories})
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    partitioning = ds.partitioning(pa.schema([table.schema.field("season")]), flavor="hive")
+    ds.write_dataset(
+        table, path,
+        format="parquet" if fmt == "parquet" else "ipc",
+        partitioning=partitioning,
+    )
+    if categories:
+        # leading underscore: skipped by dataset discovery
+        (path / "_categories.json").write_text(json.dumps(categories), encoding="utf-8")
+
+
+def _read_dataset(path: Path, fmt: str, seasons=None) -> pd.DataFrame:
+    """Read a dataset written by `_write_dataset`; Arrow IPC files are memory-mapped."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+
+    # partition values come back as int64; pandas metadata restores the original dtype
+    partitioning = ds.partitioning(pa.schema([("season", pa.int64())]), flavor="hive")
+    dataset = ds.dataset(
+        str(path),
+        format="parquet" if fmt == "parquet" else "ipc",
+        partitioning=partitioning,
+        filesystem=pafs.LocalFileSystem(use_mmap=fmt == "arrow"),
+    )
+    filt = ds.field("season").isin(list(seasons)) if seasons is not None else None
+    table = dataset.to_table(filter=filt)
+    categories = {}
+    categories_path = path / "_categories.json"
+    if categories_path.exists():
+        categories = json.loads(categories_path.read_text(encoding="utf-8"))
+    for c in categories:
+        # dictionary-encode in Arrow so pandas gets codes, not millions of str objects
+        i = table.schema.get_field_index(c)
+        table = table.set_column(i, c, pc.dictionary_encode(table[c]))
+    df = table.to_pandas()
+    for c, cats in categories.items():
+        df[c] = df[c].cat.set_categories(cats)
+    columns = [c["name"] for c in dataset.schema.pandas_metadata["columns"] if c["name"] != ROW_COL]
+    df = df.sort_values(ROW_COL, kind="mergesort").reset_index(drop=True)
+    return df[columns]
+
+
+def save_outputs(artifacts: dict, outdir: Path, fmt: str = "csv"):
+    """Write the data artifacts under <outdir>/data.
+
+    fmt="csv" keeps the original layout (UTF-8-BOM CSVs, long/weekly as single
+    parquet files when pyarrow is available). "parquet" / "arrow" write every
+    artifact as a season-partitioned dataset under data/<fmt>/<name>/; read them
+    back with `load_artifacts`. Artifacts that are None (the wide/long tables in
+    streaming mode) are skipped.
+    """
     outdir = Path(outdir)
     (outdir / "data").mkdir(parents=True, exist_ok=True)
 
     df_clean = artifacts["df_clean_wide"]
-    long = artifacts["long"]
+    long = get_long(artifacts)
     weekly = artifacts["weekly"]
     contestant_summary = artifacts["contestant_summary"]
     season_summary = artifacts["season_summary"]
 
+    if fmt in ("parquet", "arrow"):
+        for key, name in ARTIFACT_FILES.items():
+            frame = long if key == "long" else artifacts[key]
+            if frame is not None:
+                _write_dataset(frame, outdir / "data" / fmt / name, fmt)
+        return
+
     # Wide cleaned
-    df_clean.to_csv(outdir / "data" / "dwts_clean_wide.csv", index=False, encoding="utf-8-sig")
+    if df_clean is not None:
+        df_clean.to_csv(outdir / "data" / "dwts_clean_wide.csv", index=False, encoding="utf-8-sig")
 
     # Long + weekly + summaries (parquet preferred)
-    safe_to_parquet(long, outdir / "data" / "dwts_long_scores.parquet")
+    if long is not None:
+        safe_to_parquet(long, outdir / "data" / "dwts_long_scores.parquet")
     safe_to_parquet(weekly, outdir / "data" / "dwts_weekly.parquet")
     contestant_summary.to_csv(outdir / "data" / "dwts_contestant_summary.csv", index=False, encoding="utf-8-sig")
     season_summary.to_csv(outdir / "data" / "dwts_season_summary.csv", index=False, encoding="utf-8-sig")
 
 
+def load_artifacts(outdir: Path, fmt: str = None, seasons=None, keys=None) -> dict:
+    """Load artifacts written by `save_outputs`.
+
+    `fmt` defaults to the first of arrow / parquet / csv found under
+    <outdir>/data. For the columnar formats `seasons` prunes partitions so only
+    those seasons are read.
+    """
+    data_dir = Path(outdir) / "data"
+    if fmt is None:
+        fmt = next((f for f in ("arrow", "parquet") if (data_dir / f).is_dir()), "csv")
+    keys = list(keys or ARTIFACT_FILES)
+    out = {}
+    for key in keys:
+        name = ARTIFACT_FILES[key]
+        if fmt in ("parquet", "arrow"):
+            out[key] = _read_dataset(data_dir / fmt / name, fmt, seasons)
+            continue
+        parquet_path = data_dir / f"{name}.parquet"
+        if parquet_path.exists():
+            df = pd.read_parquet(parquet_path)
+        else:
+            df = pd.read_csv(data_dir / f"{name}.csv", encoding="utf-8-sig")
+        if seasons is not None:
+            df = df[df["season"].isin(list(seasons))].reset_index(drop=True)
+        out[key] = df
+    return out
+
+
+def benchmark_formats(artifacts: dict, outdir: Path, repeats: int = 3) -> pd.DataFrame:
+    """Write/read time and on-disk size of every artifact for each output format.
+
+    The csv row writes all artifacts as plain CSV (no parquet shortcut) so it
+    is the pure text baseline.
+    """
+    bench_dir = Path(outdir) / "format_benchmark"
+    frames = {key: (get_long(artifacts) if key == "long" else artifacts[key]) for key in ARTIFACT_FILES}
+    rows = []
+    for fmt in OUTPUT_FORMATS:
+        base = bench_dir / fmt
+        write_t, read_t = [], []
+        for _ in range(repeats):
+            if base.exists():
+                shutil.rmtree(base)
+            base.mkdir(parents=True)
+            t0 = time.perf_counter()
+            for key, name in ARTIFACT_FILES.items():
+                if fmt == "csv":
+                    frames[key].to_csv(base / f"{name}.csv", index=False, encoding="utf-8-sig")
+                else:
+                    _write_dataset(frames[key], base / name, fmt)
+            write_t.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            for key, name in ARTIFACT_FILES.items():
+                if fmt == "csv":
+                    pd.read_csv(base / f"{name}.csv", encoding="utf-8-sig")
+                else:
+                    _read_dataset(base / name, fmt)
+            read_t.append(time.perf_counter() - t0)
+        size = sum(f.stat().st_size for f in base.rglob("*") if f.is_file())
+        rows.append({
+            "format": fmt,
+            "write_s": float(np.median(write_t)),
+            "read_s": float(np.median(read_t)),
+            "size_mb": size / 2**20,
+        })
+    shutil.rmtree(bench_dir)
+    return pd.DataFrame(rows)
+
+
+# -------------------------
+# Startup benchmark
+# -------------------------
+def benchmark_startup(repeats: int = 5):
+    """Time fresh-interpreter imports: bare python, data-only, and data + plotting."""
+    here = str(Path(__file__).resolve().parent)
+    cases = {
+        "python": "pass",
+        "prepare_data (data only)": "import prepare_data",
+        "prepare_data + plotting": "import prepare_data; prepare_data.set_plot_style()",
+    }
+    print(f"Startup time, median of {repeats} fresh interpreters:")
+    for label, code in cases.items():
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=here, check=True)
+            times.append(time.perf_counter() - t0)
+        print(f"  {label:<26s} {np.median(times) * 1000:8.1f} ms")
+
+
 # -------------------------
 # Main
 # -------------------------
@@ -404,23 +1174,107 @@ def main():
         default="dwts_outputs",
         help="Output directory for cleaned data & figures",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse cached per-season artifacts; only recompute seasons whose rows changed",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Per-season artifact cache for --incremental (default: <outdir>/cache)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the CSV in chunks with bounded memory; the wide table is written chunk by chunk "
+             "and the long table / wide-table figures are skipped",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=100_000,
+        help="Rows per chunk for --stream",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for figure rendering (default: one per figure, 1 = serial)",
+    )
+    parser.add_argument(
+        "--force-figures",
+        action="store_true",
+        help="Re-render every figure even if its inputs are unchanged",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Load and keep tables in compact dtypes (float32 scores, uint8 week/judge, categoricals)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="Data artifact format: csv (default layout) or season-partitioned parquet / arrow datasets",
+    )
+    parser.add_argument(
+        "--benchmark-formats",
+        action="store_true",
+        help="Compare write/read time and size of csv, parquet and arrow outputs",
+    )
+    parser.add_argument(
+        "--no-figures",
+        action="store_true",
+        help="Only write the cleaned data tables; skip EDA (matplotlib/seaborn are never imported)",
+    )
+    parser.add_argument(
+        "--benchmark-startup",
+        action="store_true",
+        help="Measure module import cost with and without the plotting stack, then exit",
+    )
     args = parser.parse_args()
+    if args.stream and args.incremental:
+        parser.error("--stream cannot be combined with --incremental")
+    if args.stream and (args.format != "csv" or args.benchmark_formats):
+        parser.error("--stream only writes the csv layout")
 
-    set_plot_style()
+    if args.benchmark_startup:
+        benchmark_startup()
+        return
 
     input_csv = Path(args.input)
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    df_raw = load_raw(input_csv)
-    artifacts = preprocess(df_raw)
-
-    save_outputs(artifacts, outdir)
-    run_eda(artifacts, outdir)
+    if args.stream:
+        (outdir / "data").mkdir(parents=True, exist_ok=True)
+        artifacts = preprocess_streaming(input_csv, chunksize=args.chunksize, compact=args.compact,
+                                         wide_csv=outdir / "data" / "dwts_clean_wide.csv")
+    elif args.incremental:
+        df_raw = load_raw(input_csv, compact=args.compact)
+        cache_dir = Path(args.cache_dir) if args.cache_dir else outdir / "cache"
+        artifacts = preprocess_incremental(df_raw, cache_dir)
+    else:
+        artifacts = preprocess(load_raw(input_csv, compact=args.compact))
+    if args.compact:
+        get_long(artifacts)
+        report = compact_artifacts(artifacts)
+        print("- Memory per artifact (compact schema):")
+        print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    save_outputs(artifacts, outdir, fmt=args.format)
+    if args.benchmark_formats:
+        print("- Output format benchmark:")
+        print(benchmark_formats(artifacts, outdir).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    if not args.no_figures:
+        run_eda(artifacts, outdir, jobs=args.jobs, force=args.force_figures)
 
     print("Done.")
     print(f"- Cleaned data saved to: {outdir / 'data'}")
-    print(f"- Figures saved to:      {outdir / 'figures'}")
+    if not args.no_figures:
+        print(f"- Figures saved to:      {outdir / 'figures'}")
 
 
 if __name__ == "__main__":